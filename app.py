@@ -3,16 +3,29 @@ import os, sys
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 if PROJECT_ROOT not in sys.path:
 	sys.path.insert(0, PROJECT_ROOT)
-from src.data_loader import load_all
-from src.retrieval import route_and_search
+from src.reload import LiveKnowledgeBase
 from src.weather import get_weather_recommendation
-from src.i18n import detect_language, to_english, from_english
+from src.answers import answer_query, reference_lines
+from src.history import ChatArchive, ChatHistory
+from src import deadline, metrics
 
 st.set_page_config(page_title="Agri Assistant (Prototype)", page_icon="🌾", layout="wide")
 
-@st.cache_data(show_spinner=False)
-def load_data():
-	return load_all()
+@st.cache_resource(show_spinner=False)
+def load_knowledge_base():
+	# One live knowledge base per process; it picks up CSV edits in the background
+	kb = LiveKnowledgeBase()
+	kb.start()
+	return kb
+
+@st.cache_resource(show_spinner=False)
+def load_chat_archive():
+	# Turns that scroll out of a session's in-memory window, shared by all sessions
+	return ChatArchive()
+
+if "history" not in st.session_state:
+	st.session_state.history = ChatHistory(load_chat_archive())
+history = st.session_state.history
 
 st.title("🌾 Agri Assistant - Farmer Chatbot (Prototype)")
 st.caption("Ask about pests, schemes/subsidies, weather tips, and general agri queries.")
@@ -28,89 +41,72 @@ with st.sidebar:
 	if st.button("Get weather advice", use_container_width=True):
 		if location_input:
 			try:
-				rec = get_weather_recommendation(location_input)
-				st.session_state.history.append({"role": "user", "content": f"weather: {location_input}"})
-				st.session_state.history.append({"role": "assistant", "content": rec.get("message", "Could not build advice.")})
+				with deadline.request_budget():
+					rec = get_weather_recommendation(location_input)
+				history.append("user", f"weather: {location_input}")
+				history.append("assistant", rec.get("message", "Could not build advice."))
 				st.success("Weather advice added to chat.")
 			except Exception as e:
 				st.error(f"Failed to fetch weather: {e}")
 		else:
 			st.warning("Please enter a location.")
+	if metrics.ENABLED:
+		st.divider()
+		with st.expander("Stage timings (debug)"):
+			rows = metrics.snapshot()
+			if rows:
+				st.dataframe(rows, hide_index=True, use_container_width=True)
+			else:
+				st.caption("No requests timed yet.")
 
 # Load data
 try:
-	df_schemes, df_pests, df_qa = load_data()
+	kb = load_knowledge_base()
 except Exception as e:
 	st.error(f"Failed to load data: {e}")
 	raise
 
-if "history" not in st.session_state:
-	st.session_state.history = []
+# Known questions and names completing the typed text; a pick is answered from its stored row
+picked = None
+typed = st.text_input("Find a known question, crop, pest or scheme", key="suggest_prefix")
+if typed:
+	for n, item in enumerate(kb.suggest(typed)):
+		if st.button(item["text"], key=f"suggestion_{n}"):
+			picked = item["text"]
 
-user_query = st.chat_input("Type your question... e.g., Brown planthopper in paddy / मौसम कैसा रहेगा")
+typed_query = st.chat_input("Type your question... e.g., Brown planthopper in paddy / मौसम कैसा रहेगा")
+user_query = typed_query or picked
 
 chat = st.container()
 with chat:
-	for turn in st.session_state.history:
+	# Only the recent window (plus pages the user asked for) is rendered
+	if history.has_earlier and st.button("Show earlier messages"):
+		history.load_earlier()
+	for turn in history.turns():
 		with st.chat_message(turn["role"]):
 			st.markdown(turn["content"])
 
 if user_query:
-	# Detect input language and translate to English for retrieval
-	user_lang = detect_language(user_query)
-	query_en = to_english(user_query)
-	st.session_state.history.append({"role": "user", "content": user_query})
+	history.append("user", user_query)
 	with st.spinner("Searching knowledge base..."):
-		result = route_and_search(df_schemes, df_pests, df_qa, query_en)
+		# Translates, searches and translates back within the request budget
+		result = answer_query(kb, user_query, picked=not typed_query)
 
-	answer_lines = []
 	if result["results"]:
 		best = result["results"][0]
-		if best["type"] == "pest":
-			answer_lines.append(f"**Crop:** {best.get('crop','')}")
-			answer_lines.append(f"**Issue:** {best.get('name','')}")
-			answer_lines.append(f"**Symptoms:** {best.get('symptoms','')}")
-			answer_lines.append(f"**Recommended Solution:** {best.get('solution','')}")
-			if best.get("source"):
-				answer_lines.append(f"**Source:** {best.get('source')}")
-		elif best["type"] == "scheme":
-			answer_lines.append(f"**Scheme:** {best.get('scheme','')} ({best.get('acronym','')})")
-			answer_lines.append(f"**Objective:** {best.get('objective','')}")
-			answer_lines.append(f"**Benefits:** {best.get('benefits','')}")
-			answer_lines.append(f"**Beneficiaries:** {best.get('beneficiaries','')}")
-			answer_lines.append(f"**Funding:** {best.get('funding','')}")
-			if best.get("link"):
-				answer_lines.append(f"**Official Link:** {best.get('link')}")
-		elif best["type"] == "weather":
+		if best["type"] == "weather":
 			assistant_msg = result["results"][0].get("message", "Couldn't retrieve weather.")
-			st.session_state.history.append({"role": "assistant", "content": assistant_msg})
+			history.append("assistant", assistant_msg)
 			with st.chat_message("assistant"):
 				st.markdown(assistant_msg)
-				refs = []
 				st.stop()
-		else:
-			answer_lines.append(best.get("answer", "I couldn't find an exact match, but here are some tips."))
-			if best.get("source"):
-				answer_lines.append(f"**Source:** {best.get('source')}")
 
 		# Show top-3 as references
-		refs = []
-		for item in result["results"]:
-			label = item.get("type")
-			score = int(item.get("score", 0))
-			if label == "pest":
-				refs.append(f"Pest: {item.get('crop','')} - {item.get('name','')} (score {score})")
-			elif label == "scheme":
-				refs.append(f"Scheme: {item.get('scheme','')} ({item.get('acronym','')}) (score {score})")
-			else:
-				refs.append(f"Q&A: {item.get('query','')[:60]} (score {score})")
-
-		# Compose assistant message text in English
-		assistant_msg_en = "\n\n".join(answer_lines) if answer_lines else "I couldn't find a good match. Please try rephrasing your question."
+		refs = reference_lines(result)
 
-		# Translate to user's language if it is not English
-		assistant_msg = from_english(assistant_msg_en, user_lang)
-		st.session_state.history.append({"role": "assistant", "content": assistant_msg})
+		# Already in the user's language, or English if translation ran out of time
+		assistant_msg = result["answer"]
+		history.append("assistant", assistant_msg)
 
 		with st.chat_message("assistant"):
 			st.markdown(assistant_msg)
@@ -0,0 +1,195 @@
+"""Retrieval benchmark: latency, throughput and recall@3 over scaled synthetic corpora.
+
+Usage (from the project root):
+	python benchmarks/bench_retrieval.py --scales 1 10 100 1000 --output bench.json
+	python benchmarks/bench_retrieval.py --engines fuzzy tfidf
+
+Each scale grows the three CSVs in data/raw by adding perturbed copies of every
+row (shuffled words, tagged answers). The original rows stay in place, so the
+Q&A `Query` column replayed as the workload still has a known correct `Answer`.
+`route_and_search` is timed with the result cache cleared before every call;
+repeated queries answered from the cache are reported as `route_and_search_cached`.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src.data_loader import load_all
+from src.retrieval import ENGINES, RETRIEVAL_ENGINE, KnowledgeIndex, clear_result_cache, detect_intent, search_pests, search_qa, search_schemes
+
+# Columns perturbed in synthetic copies; the remaining columns are copied as-is
+SHUFFLE_COLUMNS = {
+	"schemes": ["Scheme Name", "Primary Objective"],
+	"pests": ["Pest/Disease", "Symptoms"],
+	"qa": ["Query"],
+}
+TAG_COLUMNS = {
+	"schemes": "Key Features & Benefits",
+	"pests": "Recommended Solution",
+	"qa": "Answer",
+}
+
+
+def _perturb(text, rng: random.Random) -> str:
+	words = str(text).split()
+	if len(words) > 3:
+		words.pop(rng.randrange(len(words)))
+	rng.shuffle(words)
+	return " ".join(words)
+
+
+def scale_frame(df: pd.DataFrame, kind: str, scale: int, seed: int = 0) -> pd.DataFrame:
+	"""Return `df` followed by `scale - 1` perturbed copies of every row."""
+	if scale <= 1:
+		return df
+	rng = random.Random(seed)
+	records = df.to_dict("records")
+	out = list(records)
+	for copy in range(1, scale):
+		for row in records:
+			row = dict(row)
+			for col in SHUFFLE_COLUMNS[kind]:
+				if col in row:
+					row[col] = _perturb(row[col], rng)
+			tag_col = TAG_COLUMNS[kind]
+			if tag_col in row:
+				row[tag_col] = f"{row[tag_col]} [synthetic {copy}]"
+			out.append(row)
+	return pd.DataFrame(out, columns=df.columns)
+
+
+def latency_stats(samples: List[float]) -> Dict:
+	arr = np.asarray(samples) * 1000.0
+	total = float(np.sum(samples))
+	return {
+		"calls": len(samples),
+		"p50_ms": round(float(np.percentile(arr, 50)), 4),
+		"p95_ms": round(float(np.percentile(arr, 95)), 4),
+		"p99_ms": round(float(np.percentile(arr, 99)), 4),
+		"throughput_qps": round(len(samples) / total, 1) if total > 0 else None,
+	}
+
+
+def time_calls(fn: Callable, queries: List[str], before: Optional[Callable[[], None]] = None) -> List[float]:
+	"""Seconds taken by `fn(q)` for each query; `before` runs untimed ahead of every call."""
+	samples = []
+	for q in queries:
+		if before is not None:
+			before()
+		start = time.perf_counter()
+		fn(q)
+		samples.append(time.perf_counter() - start)
+	return samples
+
+
+def recall_at_3(results: List[List[Dict]], expected: List[str]) -> float:
+	hits = sum(1 for found, answer in zip(results, expected) if any(r.get("answer") == answer for r in found[:3]))
+	return round(hits / len(expected), 4) if expected else 0.0
+
+
+def run_scale(frames, scale: int, queries: List[str], answers: List[str], repeat: int, engine: str) -> Dict:
+	df_schemes, df_pests, df_qa = (scale_frame(df, kind, scale) for df, kind in zip(frames, ["schemes", "pests", "qa"]))
+	start = time.perf_counter()
+	index = KnowledgeIndex(df_schemes, df_pests, df_qa, engine=engine)
+	for corpus in (index.schemes, index.pests, index.qa):
+		# engines and facets are built lazily; include them in the build time
+		corpus.engine
+		corpus.facets
+	build_s = time.perf_counter() - start
+
+	workload = queries * repeat
+	stages = {
+		"detect_intent": detect_intent,
+		"search_pests": lambda q: search_pests(index.pests, q),
+		"search_schemes": lambda q: search_schemes(index.schemes, q),
+		"search_qa": lambda q: search_qa(index.qa, q),
+	}
+	stage_stats = {name: latency_stats(time_calls(fn, workload)) for name, fn in stages.items()}
+	# Repeats would otherwise be result-cache hits; those are reported on their own
+	stage_stats["route_and_search"] = latency_stats(time_calls(index.search, workload, before=clear_result_cache))
+	for q in queries:
+		index.search(q)
+	stage_stats["route_and_search_cached"] = latency_stats(time_calls(index.search, workload))
+	report = {
+		"scale": scale,
+		"engine": engine,
+		"rows": {"schemes": len(df_schemes), "pests": len(df_pests), "qa": len(df_qa)},
+		"index_build_s": round(build_s, 4),
+		"stages": stage_stats,
+		"recall@3": {
+			"search_qa": recall_at_3([search_qa(index.qa, q) for q in queries], answers),
+			"route_and_search": recall_at_3([index.search(q)["results"] for q in queries], answers),
+		},
+	}
+	return report
+
+
+def _git_commit() -> str:
+	try:
+		return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+	except Exception:
+		return "unknown"
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 1000])
+	parser.add_argument("--repeat", type=int, default=3, help="replay the query workload this many times per stage")
+	parser.add_argument("--limit", type=int, default=0, help="only replay the first N Q&A queries (0 = all)")
+	parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=[RETRIEVAL_ENGINE], help="retrieval engines to compare")
+	parser.add_argument("--output", help="write the JSON report here instead of stdout")
+	args = parser.parse_args(argv)
+
+	start = time.perf_counter()
+	frames = load_all()
+	load_s = time.perf_counter() - start
+	df_qa = frames[2].dropna(subset=["Query", "Answer"])
+	if args.limit:
+		df_qa = df_qa.head(args.limit)
+	queries = [str(q) for q in df_qa["Query"]]
+	answers = list(df_qa["Answer"])
+
+	runs = []
+	for scale in args.scales:
+		for engine in args.engines:
+			run = run_scale(frames, scale, queries, answers, args.repeat, engine)
+			runs.append(run)
+			route = run["stages"]["route_and_search"]
+			print(
+				f"engine={engine:<6} scale={scale:<5} qa_rows={run['rows']['qa']:<7} build={run['index_build_s']}s "
+				f"route p50={route['p50_ms']}ms p99={route['p99_ms']}ms qps={route['throughput_qps']} "
+				f"recall@3={run['recall@3']['route_and_search']}",
+				file=sys.stderr,
+			)
+
+	report = {
+		"commit": _git_commit(),
+		"python": platform.python_version(),
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"load_all_s": round(load_s, 4),
+		"workload_queries": len(queries),
+		"runs": runs,
+	}
+	text = json.dumps(report, indent=2)
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as fh:
+			fh.write(text + "\n")
+	else:
+		print(text)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
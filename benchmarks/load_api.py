@@ -0,0 +1,75 @@
+"""Load test for the HTTP API (src/api.py): latency percentiles and requests per second.
+
+Usage (from the project root, with the API running):
+	python -m src.api --workers 4 &
+	python benchmarks/load_api.py --url http://127.0.0.1:8080 --concurrency 32 --requests 5000
+
+The Q&A `Query` column is replayed against /search over keep-alive connections.
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from typing import List
+from urllib.parse import quote, urlsplit
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from benchmarks.bench_retrieval import latency_stats
+from src.data_loader import load_all_records
+
+
+def _worker(url: str, paths: List[str], samples: List[float], errors: List[int]) -> None:
+	parts = urlsplit(url)
+	conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+	for path in paths:
+		start = time.perf_counter()
+		try:
+			conn.request("GET", path)
+			resp = conn.getresponse()
+			resp.read()
+			if resp.status != 200:
+				errors.append(resp.status)
+		except (OSError, http.client.HTTPException):
+			errors.append(0)
+			conn.close()
+			conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+		samples.append(time.perf_counter() - start)
+	conn.close()
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--url", default="http://127.0.0.1:8080")
+	parser.add_argument("--concurrency", type=int, default=32)
+	parser.add_argument("--requests", type=int, default=5000)
+	args = parser.parse_args(argv)
+
+	queries = [q for q in load_all_records()[2].column("Query") if isinstance(q, str)]
+	paths = [f"/search?q={quote(queries[i % len(queries)])}&lang=en" for i in range(args.requests)]
+	samples: List[float] = []
+	errors: List[int] = []
+	threads = [
+		threading.Thread(target=_worker, args=(args.url, paths[n::args.concurrency], samples, errors))
+		for n in range(args.concurrency)
+	]
+	start = time.perf_counter()
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	wall = time.perf_counter() - start
+
+	report = latency_stats(samples)
+	report["throughput_qps"] = round(len(samples) / wall, 1) if wall > 0 else None
+	report.update({"concurrency": args.concurrency, "errors": len(errors), "wall_s": round(wall, 3)})
+	print(json.dumps(report, indent=2))
+	return 0 if not errors else 1
+
+
+if __name__ == "__main__":
+	sys.exit(main())
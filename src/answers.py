@@ -0,0 +1,100 @@
+"""Turn route_and_search results into the English answer shown to farmers.
+
+Shared by the Streamlit app and the HTTP API so both channels answer alike.
+"""
+from typing import Any, Dict, List, Optional
+
+from . import deadline, metrics
+from .i18n import detect_language, from_english_many, to_english
+
+NO_MATCH = "I couldn't find a good match. Please try rephrasing your question."
+
+
+def answer_lines(result: Dict) -> List[str]:
+	"""Markdown lines describing the best result, in English; one line per field so each is translated (and cached) separately."""
+	if not result.get("results"):
+		return [NO_MATCH]
+	best = result["results"][0]
+	lines: List[str] = []
+	if best["type"] == "pest":
+		lines.append(f"**Crop:** {best.get('crop','')}")
+		lines.append(f"**Issue:** {best.get('name','')}")
+		lines.append(f"**Symptoms:** {best.get('symptoms','')}")
+		lines.append(f"**Recommended Solution:** {best.get('solution','')}")
+		if best.get("source"):
+			lines.append(f"**Source:** {best.get('source')}")
+	elif best["type"] == "scheme":
+		lines.append(f"**Scheme:** {best.get('scheme','')} ({best.get('acronym','')})")
+		lines.append(f"**Objective:** {best.get('objective','')}")
+		lines.append(f"**Benefits:** {best.get('benefits','')}")
+		lines.append(f"**Beneficiaries:** {best.get('beneficiaries','')}")
+		lines.append(f"**Funding:** {best.get('funding','')}")
+		if best.get("link"):
+			lines.append(f"**Official Link:** {best.get('link')}")
+	elif best["type"] == "weather":
+		lines.append(best.get("message") or best.get("error") or "Couldn't retrieve weather.")
+	else:
+		lines.append(best.get("answer", "I couldn't find an exact match, but here are some tips."))
+		if best.get("source"):
+			lines.append(f"**Source:** {best.get('source')}")
+	return lines or [NO_MATCH]
+
+
+def reference_lines(result: Dict) -> List[str]:
+	"""One line per top match, with its score."""
+	refs = []
+	for item in result.get("results", []):
+		label = item.get("type")
+		score = int(item.get("score", 0))
+		if label == "pest":
+			refs.append(f"Pest: {item.get('crop','')} - {item.get('name','')} (score {score})")
+		elif label == "scheme":
+			refs.append(f"Scheme: {item.get('scheme','')} ({item.get('acronym','')}) (score {score})")
+		else:
+			refs.append(f"Q&A: {item.get('query','')[:60]} (score {score})")
+	return refs
+
+
+def answer_query(kb: Any, query: str, lang: Optional[str] = None, budget_s: float = deadline.REQUEST_BUDGET_S, picked: bool = False) -> Dict:
+	"""Answer one chat turn within `budget_s` seconds, in the asker's language.
+
+	A non-English query is translated on a background thread while the native
+	text is searched (intent keywords include Hindi), and the translated search
+	replaces that result only if the translation arrives in time. Stages that
+	run out of budget are listed in `degraded`: "translate_query" (answered
+	from the native search) and "translate_answer" (answer left in English).
+	A `picked` suggestion that is exactly a known question or entity is
+	answered from its stored row, skipping retrieval; typed queries are always
+	searched, so the same text gets the same answer in every worker.
+	"""
+	with metrics.profile("answer"), metrics.span("answer"), deadline.request_budget(budget_s):
+		lang = lang or detect_language(query)
+		degraded: List[str] = []
+		query_en = query
+		known = kb.known_answer(query) if picked else None
+		if known is not None:
+			result = known
+		elif lang.startswith("en"):
+			result = kb.search(query)
+		else:
+			pending = deadline.submit(to_english, query, lang, stage="translate")
+			result = kb.search(query)
+			query_en = deadline.wait(pending, default=query)
+			if not pending.done() or deadline.expired():
+				# Only a translation the budget cut short counts; an unavailable translator returns the text unchanged
+				degraded.append("translate_query")
+			elif query_en != query:
+				result = kb.search(query_en)
+		lines_en = answer_lines(result)
+		lines = from_english_many(lines_en, lang)
+		if not lang.startswith("en") and lines == lines_en and deadline.expired():
+			degraded.append("translate_answer")
+	return {
+		"query": query,
+		"query_en": query_en,
+		"lang": lang,
+		"intent": result["intent"],
+		"results": result["results"],
+		"answer": "\n\n".join(lines),
+		"degraded": degraded,
+	}
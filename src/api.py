@@ -0,0 +1,279 @@
+"""Headless HTTP API for channels that cannot go through Streamlit (WhatsApp, IVR, SMS gateways).
+
+	python -m src.api --port 8080 --workers 4
+
+Endpoints take query parameters (GET) or a JSON object (POST):
+	/search   q=<question>[&lang=hi]      answer plus the top matches, in the asker's language
+	          [&picked=1]                 q is a /suggest pick: answer from its stored row
+	/suggest  q=<typed prefix>[&limit=5]  known questions, crops, pests and schemes completing the prefix
+	/weather  location=<place>[&lang=hi]  7-day weather summary and crop advice
+	/health                               liveness and knowledge-base status
+	/metrics                              stage timings in Prometheus text format (AGRI_METRICS=1)
+
+Each request gets AGRI_REQUEST_BUDGET seconds (see `src.deadline`); /search
+answers that ran short of time list the skipped stages in "degraded".
+
+Every worker is a forked process that loads the knowledge base once (the
+compiled artifact is memory-mapped, so workers share its pages) and serves a
+thread per connection. Weather and translation calls only block their own
+thread and release the GIL while they wait, so retrieval for other requests
+keeps running.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from . import deadline, metrics
+from .answers import answer_query
+from .i18n import from_english
+from .reload import LiveKnowledgeBase
+from .suggest import SUGGEST_LIMIT
+
+logger = logging.getLogger(__name__)
+
+API_HOST = os.environ.get("AGRI_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("AGRI_API_PORT", "8080"))
+API_WORKERS = int(os.environ.get("AGRI_API_WORKERS", str(os.cpu_count() or 1)))
+MAX_BODY_BYTES = 64 * 1024
+LISTEN_BACKLOG = 1024
+
+# A dict is sent as JSON, a string as plain text
+Response = Tuple[int, Union[Dict, str]]
+
+
+def _jsonable(value: Any) -> Any:
+	# Missing CSV cells are NaN, which is not valid JSON
+	if isinstance(value, float):
+		return None if math.isnan(value) or math.isinf(value) else value
+	if isinstance(value, dict):
+		return {str(k): _jsonable(v) for k, v in value.items()}
+	if isinstance(value, (list, tuple)):
+		return [_jsonable(v) for v in value]
+	if hasattr(value, "item"):
+		return _jsonable(value.item())
+	return value
+
+
+def handle_search(kb: LiveKnowledgeBase, params: Dict[str, str]) -> Response:
+	query = (params.get("q") or params.get("query") or "").strip()
+	if not query:
+		return 400, {"error": "missing 'q'"}
+	picked = (params.get("picked") or "").lower() in ("1", "true", "yes")
+	return 200, answer_query(kb, query, params.get("lang"), picked=picked)
+
+
+def handle_suggest(kb: LiveKnowledgeBase, params: Dict[str, str]) -> Response:
+	prefix = params.get("q") or params.get("prefix") or ""
+	try:
+		limit = min(int(params.get("limit") or SUGGEST_LIMIT), 20)
+	except ValueError:
+		return 400, {"error": "'limit' must be an integer"}
+	# Row numbers are internal (and -1 for names shared by several rows)
+	suggestions = [{"text": s["text"], "kind": s["kind"]} for s in kb.suggest(prefix, limit)]
+	return 200, {"prefix": prefix, "suggestions": suggestions}
+
+
+def handle_weather(kb: LiveKnowledgeBase, params: Dict[str, str]) -> Response:
+	from .weather import get_weather_recommendation
+	location = (params.get("location") or "").strip()
+	if not location:
+		return 400, {"error": "missing 'location'"}
+	with metrics.profile("weather"), metrics.span("weather"), deadline.request_budget():
+		try:
+			rec = get_weather_recommendation(location)
+		except deadline.DeadlineExceeded:
+			return 504, {"error": "weather lookup timed out"}
+		except Exception:
+			logger.exception("Weather lookup failed for %r", location)
+			return 502, {"error": "weather service unavailable"}
+		if "error" in rec:
+			return 404, rec
+		lang = params.get("lang") or "en"
+		if rec.get("message"):
+			rec = dict(rec, message=from_english(rec["message"], lang))
+	return 200, rec
+
+
+def handle_health(kb: LiveKnowledgeBase, params: Dict[str, str]) -> Response:
+	index = kb.index
+	return 200, {
+		"status": "ok",
+		"pid": os.getpid(),
+		"reloads": kb.reloads,
+		"rows": {"schemes": len(index.schemes), "pests": len(index.pests), "qa": len(index.qa)},
+	}
+
+
+def handle_metrics(kb: LiveKnowledgeBase, params: Dict[str, str]) -> Response:
+	return 200, metrics.render_prometheus()
+
+
+ROUTES: Dict[str, Callable[[LiveKnowledgeBase, Dict[str, str]], Response]] = {
+	"/search": handle_search,
+	"/suggest": handle_suggest,
+	"/weather": handle_weather,
+	"/health": handle_health,
+	"/metrics": handle_metrics,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+	# Keep-alive connections; every response carries a Content-Length
+	protocol_version = "HTTP/1.1"
+	server_version = "AgriAssistant"
+	# Headers and body are separate writes; with Nagle on, the body waits for a delayed ACK (~40 ms)
+	disable_nagle_algorithm = True
+
+	def do_GET(self) -> None:
+		query = parse_qs(urlsplit(self.path).query)
+		self._dispatch({k: v[0] for k, v in query.items() if v})
+
+	def do_POST(self) -> None:
+		header = self.headers.get("Content-Length")
+		try:
+			length = int(header) if header is not None else None
+		except ValueError:
+			length = -1
+		# The body is left unread on these errors, so the connection cannot be reused
+		if length is None:
+			self.close_connection = True
+			self._send(411, {"error": "Content-Length required"})
+			return
+		if length < 0:
+			self.close_connection = True
+			self._send(400, {"error": "invalid Content-Length"})
+			return
+		if length > MAX_BODY_BYTES:
+			self.close_connection = True
+			self._send(413, {"error": "request body too large"})
+			return
+		try:
+			body = json.loads(self.rfile.read(length) or b"{}")
+			if not isinstance(body, dict):
+				raise ValueError
+		except ValueError:
+			self._send(400, {"error": "body must be a JSON object"})
+			return
+		self._dispatch({k: str(v) for k, v in body.items() if v is not None})
+
+	def _dispatch(self, params: Dict[str, str]) -> None:
+		route = ROUTES.get(urlsplit(self.path).path.rstrip("/"))
+		if route is None:
+			self._send(404, {"error": "not found", "endpoints": sorted(ROUTES)})
+			return
+		try:
+			status, payload = route(self.server.kb, params)
+		except Exception:
+			logger.exception("Request %s failed", self.path)
+			status, payload = 500, {"error": "internal error"}
+		self._send(status, payload)
+
+	def _send(self, status: int, payload: Union[Dict, str]) -> None:
+		if isinstance(payload, str):
+			body = payload.encode("utf-8")
+			content_type = "text/plain; version=0.0.4; charset=utf-8"
+		else:
+			body = json.dumps(_jsonable(payload), ensure_ascii=False).encode("utf-8")
+			content_type = "application/json; charset=utf-8"
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format: str, *args) -> None:
+		logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ApiServer(ThreadingHTTPServer):
+	"""Threaded HTTP server holding one process' knowledge base."""
+
+	daemon_threads = True
+	request_queue_size = LISTEN_BACKLOG
+
+	def __init__(self, address: Tuple[str, int], kb: LiveKnowledgeBase, bind_and_activate: bool = True):
+		super().__init__(address, _Handler, bind_and_activate)
+		self.kb = kb
+
+
+def _listen(host: str, port: int) -> socket.socket:
+	sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+	sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	sock.bind((host, port))
+	sock.listen(LISTEN_BACKLOG)
+	return sock
+
+
+def _run_worker(sock: socket.socket) -> None:
+	kb = LiveKnowledgeBase()
+	kb.start()
+	server = ApiServer(sock.getsockname()[:2], kb, bind_and_activate=False)
+	server.socket.close()
+	server.socket = sock
+	# shutdown() blocks until serve_forever returns, so it cannot run on the serving thread
+	signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		kb.stop()
+
+
+def serve(host: str = API_HOST, port: int = API_PORT, workers: int = API_WORKERS) -> None:
+	"""Serve the API until interrupted, on `workers` forked processes sharing one listening socket."""
+	sock = _listen(host, port)
+	logger.info("Serving on http://%s:%d with %d worker(s)", host, sock.getsockname()[1], workers)
+	if workers <= 1 or not hasattr(os, "fork"):
+		_run_worker(sock)
+		return
+	children = []
+	for _ in range(workers):
+		pid = os.fork()
+		if pid == 0:
+			code = 0
+			try:
+				_run_worker(sock)
+			except Exception:
+				logger.exception("Worker %d crashed", os.getpid())
+				code = 1
+			finally:
+				os._exit(code)
+		children.append(pid)
+
+	def stop(signum, frame) -> None:
+		for pid in children:
+			try:
+				os.kill(pid, signal.SIGTERM)
+			except OSError:
+				pass
+
+	signal.signal(signal.SIGTERM, stop)
+	signal.signal(signal.SIGINT, stop)
+	for pid in children:
+		os.waitpid(pid, 0)
+	sock.close()
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description="Serve the assistant over HTTP.")
+	parser.add_argument("--host", default=API_HOST)
+	parser.add_argument("--port", type=int, default=API_PORT)
+	parser.add_argument("--workers", type=int, default=API_WORKERS, help="worker processes, each with its own copy of the index")
+	args = parser.parse_args(argv)
+	logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+	serve(args.host, args.port, args.workers)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
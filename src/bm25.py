@@ -0,0 +1,145 @@
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Very common words carry almost no BM25 weight but have the longest posting lists
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it my of on or should the this to what when which with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+	"""Lowercase word tokens with stopwords removed."""
+	return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def _postings(docs: Iterable[str], first_id: int = 0) -> Tuple[Dict[str, List[int]], Dict[str, List[int]], List[int]]:
+	postings: Dict[str, List[int]] = defaultdict(list)
+	freqs: Dict[str, List[int]] = defaultdict(list)
+	lengths: List[int] = []
+	for doc_id, doc in enumerate(docs, first_id):
+		counts = Counter(tokenize(doc))
+		lengths.append(sum(counts.values()))
+		for token, tf in counts.items():
+			postings[token].append(doc_id)
+			freqs[token].append(tf)
+	return postings, freqs, lengths
+
+
+class BM25Index:
+	"""Token inverted index that ranks documents with Okapi BM25.
+
+	Each posting stores the document id and its precomputed BM25 term weight,
+	so a query only touches the postings of its own tokens. Postings live in
+	flat arrays (`ids`/`tfs`/`weights` sliced by `offsets`, one slice per entry
+	of the sorted `vocab`) so the index can be saved and memory-mapped as is.
+	"""
+
+	def __init__(self, docs: Iterable[str], k1: float = 1.5, b: float = 0.75):
+		postings, freqs, lengths = _postings(docs)
+		self.k1 = k1
+		self.b = b
+		self.vocab: Sequence[str] = sorted(postings)
+		self.doc_lens = np.asarray(lengths, dtype=np.float32)
+		self._set_postings([postings[t] for t in self.vocab], [freqs[t] for t in self.vocab])
+
+	def _set_postings(self, ids_parts: List, tf_parts: List) -> None:
+		self.offsets = np.zeros(len(ids_parts) + 1, dtype=np.int64)
+		np.cumsum([len(a) for a in ids_parts], out=self.offsets[1:])
+		self.ids = np.concatenate(ids_parts).astype(np.int32) if ids_parts else np.zeros(0, dtype=np.int32)
+		self.tfs = np.concatenate(tf_parts).astype(np.float32) if tf_parts else np.zeros(0, dtype=np.float32)
+		self.weights = self._compute_weights()
+		self._token_ids: Optional[Dict[str, int]] = None
+
+	def _compute_weights(self) -> np.ndarray:
+		num_docs = len(self.doc_lens)
+		avg_len = float(self.doc_lens.mean()) if num_docs else 0.0
+		norm = self.k1 * (1 - self.b + self.b * self.doc_lens / avg_len) if avg_len else np.full(num_docs, self.k1, dtype=np.float32)
+		df = np.diff(self.offsets)
+		idf = np.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+		return (np.repeat(idf, df) * self.tfs * (self.k1 + 1) / (self.tfs + norm[self.ids])).astype(np.float32)
+
+	@classmethod
+	def from_arrays(cls, vocab: Sequence[str], offsets: np.ndarray, ids: np.ndarray, tfs: np.ndarray, doc_lens: np.ndarray, weights: np.ndarray, k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+		"""Rebuild an index from previously saved arrays without re-tokenizing the corpus."""
+		index = cls.__new__(cls)
+		index.k1 = k1
+		index.b = b
+		index.vocab = vocab
+		index.offsets = offsets
+		index.ids = ids
+		index.tfs = tfs
+		index.doc_lens = doc_lens
+		index.weights = weights
+		index._token_ids = None
+		return index
+
+	def extended(self, docs: Iterable[str]) -> "BM25Index":
+		"""Return a new index that also covers `docs`, appended after the existing documents.
+
+		Only the new documents are tokenized; weights are recomputed in bulk
+		because every idf and the average length shift. `self` is left untouched.
+		"""
+		postings, freqs, lengths = _postings(docs, len(self))
+		old = self._lookup()
+		index = BM25Index.__new__(BM25Index)
+		index.k1 = self.k1
+		index.b = self.b
+		index.vocab = sorted(set(old) | set(postings))
+		index.doc_lens = np.concatenate([self.doc_lens, np.asarray(lengths, dtype=np.float32)])
+		ids_parts: List = []
+		tf_parts: List = []
+		for token in index.vocab:
+			j = old.get(token)
+			ids = [self.ids[self.offsets[j]:self.offsets[j + 1]]] if j is not None else []
+			tfs = [self.tfs[self.offsets[j]:self.offsets[j + 1]]] if j is not None else []
+			if token in postings:
+				ids.append(np.asarray(postings[token], dtype=np.int32))
+				tfs.append(np.asarray(freqs[token], dtype=np.float32))
+			ids_parts.append(np.concatenate(ids))
+			tf_parts.append(np.concatenate(tfs))
+		index._set_postings(ids_parts, tf_parts)
+		return index
+
+	@property
+	def num_docs(self) -> int:
+		return len(self.doc_lens)
+
+	def __len__(self) -> int:
+		return self.num_docs
+
+	def _lookup(self) -> Dict[str, int]:
+		if self._token_ids is None:
+			self._token_ids = {token: i for i, token in enumerate(self.vocab)}
+		return self._token_ids
+
+	def candidates(self, query: str, limit: int, allowed: Optional[Sequence[int]] = None) -> List[int]:
+		"""Return up to `limit` document ids with the highest BM25 score, in ascending id order.
+
+		Documents sharing no token with the query are never returned, and when
+		`allowed` is given neither are documents outside it.
+		"""
+		lookup = self._lookup()
+		slots = [lookup[t] for t in set(tokenize(query)) if t in lookup]
+		if not slots or limit <= 0:
+			return []
+		ids = np.concatenate([self.ids[self.offsets[j]:self.offsets[j + 1]] for j in slots])
+		weights = np.concatenate([self.weights[self.offsets[j]:self.offsets[j + 1]] for j in slots])
+		if allowed is not None:
+			keep = np.isin(ids, allowed)
+			ids, weights = ids[keep], weights[keep]
+			if not len(ids):
+				return []
+		order = np.argsort(ids, kind="stable")
+		ids = ids[order]
+		starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+		doc_ids = ids[starts]
+		scores = np.add.reduceat(weights[order], starts)
+		if len(doc_ids) > limit:
+			keep = np.argpartition(scores, len(doc_ids) - limit)[len(doc_ids) - limit:]
+			doc_ids = np.sort(doc_ids[keep])
+		return doc_ids.tolist()
@@ -0,0 +1,157 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from . import deadline
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CACHE_DIR = os.environ.get("AGRI_CACHE_DIR") or os.path.join(PROJECT_ROOT, ".cache")
+
+_MISSING = object()
+
+
+class TTLCache:
+	"""Thread-safe LRU cache with an optional per-entry time-to-live.
+
+	`ttl=None` keeps entries until they are evicted by `maxsize`. Expired
+	entries read as missing but stay until evicted, so `get(key, stale=True)`
+	can still serve them when fresh data cannot be had.
+	"""
+
+	def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def get(self, key: Hashable, default: Any = None, stale: bool = False) -> Any:
+		with self._lock:
+			item = self._data.get(key, _MISSING)
+			if item is not _MISSING:
+				expires, value = item
+				if stale or expires is None or expires > time.monotonic():
+					self._data.move_to_end(key)
+					self.hits += 1
+					return value
+			self.misses += 1
+			return default
+
+	def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+		ttl = self.ttl if ttl is None else ttl
+		expires = time.monotonic() + ttl if ttl is not None else None
+		with self._lock:
+			self._data[key] = (expires, value)
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+				self.evictions += 1
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def stats(self) -> Dict[str, int]:
+		return {"size": len(self._data), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class DiskCache:
+	"""Small persistent key -> JSON value store backed by SQLite.
+
+	Safe to share between threads and worker processes. Entries may carry an
+	expiry timestamp; expired entries read as missing.
+	"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._lock = threading.Lock()
+		self._conn: Optional[sqlite3.Connection] = None
+
+	def _connect(self) -> sqlite3.Connection:
+		if self._conn is None:
+			os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+			conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+			conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+			self._conn = conn
+		return self._conn
+
+	def get(self, key: str, default: Any = None) -> Any:
+		try:
+			with self._lock:
+				row = self._connect().execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+		except sqlite3.Error:
+			return default
+		if row is None or (row[1] is not None and row[1] <= time.time()):
+			return default
+		return json.loads(row[0])
+
+	def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+		expires = time.time() + ttl if ttl is not None else None
+		try:
+			with self._lock:
+				conn = self._connect()
+				conn.execute("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)", (key, json.dumps(value), expires))
+				conn.commit()
+		except sqlite3.Error:
+			# A cache that cannot be written (read-only disk, locked file) must not break lookups
+			pass
+
+	def clear(self) -> None:
+		with self._lock:
+			conn = self._connect()
+			conn.execute("DELETE FROM cache")
+			conn.commit()
+
+
+class SingleFlight:
+	"""Coalesce concurrent calls for the same key into one execution.
+
+	The first caller runs `fn`; callers arriving while it is in flight wait and
+	receive the same result (or exception). A waiting caller gives up with
+	DeadlineExceeded when its own request deadline passes.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._calls: Dict[Hashable, "_Call"] = {}
+
+	def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+		with self._lock:
+			call = self._calls.get(key)
+			leader = call is None
+			if leader:
+				call = self._calls[key] = _Call()
+		if not leader:
+			if not call.done.wait(deadline.remaining()):
+				raise deadline.DeadlineExceeded("gave up waiting for an in-flight call")
+			if call.error is not None:
+				raise call.error
+			return call.result
+		try:
+			call.result = fn()
+			return call.result
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self._lock:
+				del self._calls[key]
+			call.done.set()
+
+
+class _Call:
+	__slots__ = ("done", "result", "error")
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.result: Any = None
+		self.error: Optional[BaseException] = None
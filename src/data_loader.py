@@ -1,6 +1,10 @@
 import os
-import pandas as pd
-from typing import Tuple
+from typing import TYPE_CHECKING, Tuple
+
+from .records import ColumnRecords, read_csv_records
+
+if TYPE_CHECKING:
+	import pandas as pd
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 RAW_DATA_PATH = os.path.join(PROJECT_ROOT, 'data', 'raw')
@@ -10,11 +14,12 @@ PEST_FILE = 'crop_pest_solution.csv'
 QA_FILE = 'farmer queries with answers.csv'
 
 
-def load_csv_safe(path: str) -> pd.DataFrame:
+def load_csv_safe(path: str) -> "pd.DataFrame":
+	import pandas as pd
 	return pd.read_csv(path)
 
 
-def load_all() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+def load_all() -> Tuple["pd.DataFrame", "pd.DataFrame", "pd.DataFrame"]:
 	"""Load schemes, pests, and Q&A CSVs from data/raw.
 
 	Returns a tuple: (df_schemes, df_pests, df_qa)
@@ -28,7 +33,7 @@ def load_all() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
 	df_qa = load_csv_safe(qa_path)
 
 	# Normalize column names (strip)
-	def normalize(df: pd.DataFrame) -> pd.DataFrame:
+	def normalize(df: "pd.DataFrame") -> "pd.DataFrame":
 		df = df.copy()
 		df.columns = [c.strip() for c in df.columns]
 		return df
@@ -38,3 +43,11 @@ def load_all() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
 	df_qa = normalize(df_qa)
 
 	return df_schemes, df_pests, df_qa
+
+
+def load_all_records() -> Tuple[ColumnRecords, ColumnRecords, ColumnRecords]:
+	"""Pandas-free variant of `load_all` returning compact column-wise records.
+
+	Returns a tuple: (schemes, pests, qa)
+	"""
+	return tuple(read_csv_records(os.path.join(RAW_DATA_PATH, name)) for name in (SCHEMES_FILE, PEST_FILE, QA_FILE))
@@ -0,0 +1,139 @@
+"""Per-request latency budgets.
+
+`request_budget(seconds)` starts a deadline for the current request; it is
+kept in a context variable, so translation, retrieval and weather code pick
+it up without threading it through every signature. Code that may block
+asks `timeout()` how long it may wait, or runs through `call()`, which stops
+waiting when the budget is spent and lets the caller fall back to a cheaper
+answer.
+
+Background calls run on one small thread pool per stage ("translate",
+"weather"), so a slow upstream can only tie up its own stage's threads. A
+call still queued when its request runs out of time is dropped instead of
+being sent.
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+REQUEST_BUDGET_S = float(os.environ.get("AGRI_REQUEST_BUDGET", "8"))
+# Threads per stage, per process, for blocking calls run under a deadline; calls that overrun keep a thread until they finish
+STAGE_WORKERS = int(os.environ.get("AGRI_STAGE_WORKERS", "4"))
+
+_current: "contextvars.ContextVar[Optional[Deadline]]" = contextvars.ContextVar("agri_deadline", default=None)
+# Created on first use, so each forked API worker starts its own
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+	pass
+
+
+class Deadline:
+	def __init__(self, budget_s: float):
+		self.budget_s = budget_s
+		self.expires = time.monotonic() + budget_s
+
+	def remaining(self) -> float:
+		return max(0.0, self.expires - time.monotonic())
+
+	def expired(self) -> bool:
+		return time.monotonic() >= self.expires
+
+
+@contextmanager
+def request_budget(budget_s: float = REQUEST_BUDGET_S) -> Iterator[Deadline]:
+	"""Run the enclosed block under a `budget_s`-second deadline (nested budgets can only shorten it)."""
+	outer = _current.get()
+	deadline = Deadline(budget_s)
+	if outer is not None and outer.expires < deadline.expires:
+		deadline = outer
+	token = _current.set(deadline)
+	try:
+		yield deadline
+	finally:
+		_current.reset(token)
+
+
+def current() -> Optional[Deadline]:
+	return _current.get()
+
+
+def expired() -> bool:
+	deadline = _current.get()
+	return deadline is not None and deadline.expired()
+
+
+def check() -> None:
+	"""Raise DeadlineExceeded if the current request is out of time."""
+	if expired():
+		raise DeadlineExceeded("request latency budget exhausted")
+
+
+def remaining() -> Optional[float]:
+	"""Seconds left in the current request's budget, or None when there is no deadline."""
+	deadline = _current.get()
+	return None if deadline is None else deadline.remaining()
+
+
+def timeout(cap: float) -> float:
+	"""How long a blocking call may wait: `cap`, or less if the request deadline is closer."""
+	deadline = _current.get()
+	if deadline is None:
+		return cap
+	check()
+	return min(cap, deadline.remaining())
+
+
+def _pool(stage: str) -> ThreadPoolExecutor:
+	pool = _pools.get(stage)
+	if pool is None:
+		with _pools_lock:
+			pool = _pools.get(stage)
+			if pool is None:
+				pool = _pools[stage] = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix=f"deadline-{stage}")
+	return pool
+
+
+def _run_in_time(fn: Callable, *args) -> Any:
+	# A task that waited in the queue past its request's deadline has no one left to answer
+	check()
+	return fn(*args)
+
+
+def submit(fn: Callable, *args, stage: str = "default") -> Future:
+	"""Run `fn(*args)` on one of `stage`'s background threads, under the caller's deadline.
+
+	If the deadline has passed by the time a thread is free, `fn` is not run
+	and the future raises DeadlineExceeded.
+	"""
+	return _pool(stage).submit(contextvars.copy_context().run, _run_in_time, fn, *args)
+
+
+def call(fn: Callable, *args, default: Any = None, stage: str = "default") -> Any:
+	"""Run `fn(*args)`, but stop waiting and return `default` once the request deadline passes.
+
+	Without a deadline this is a plain call. A call that overruns is not
+	cancelled: it finishes in the background, so whatever it caches is there
+	for the next request.
+	"""
+	if _current.get() is None:
+		return fn(*args)
+	if expired():
+		return default
+	return wait(submit(fn, *args, stage=stage), default)
+
+
+def wait(future: Future, default: Any = None) -> Any:
+	"""The result of `future`, or `default` if it is not done by the request deadline (or was dropped)."""
+	deadline = _current.get()
+	try:
+		return future.result(timeout=None if deadline is None else deadline.remaining())
+	except (FutureTimeout, DeadlineExceeded):
+		return default
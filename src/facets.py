@@ -0,0 +1,118 @@
+"""Crop, pest and category facets used to narrow retrieval before scoring.
+
+Facet values come from the knowledge bases themselves - the `Crop` and
+`Pest/Disease` columns of crop_pest_solution.csv and the `Category` column of
+the Q&A CSV - plus a few common crop aliases. A query's facet values are
+found with the same single-pass keyword matcher as its intent.
+"""
+import re
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .intent import KeywordMatcher
+
+# Other names farmers use for the crops in crop_pest_solution.csv
+CROP_ALIASES: Dict[str, List[str]] = {
+	"Paddy": ["rice"],
+	"Banana": ["bananas", "plantain"],
+	"Coconut": ["coconuts", "coconut palm"],
+	"Black Pepper": ["pepper"],
+	"Tapioca": ["cassava"],
+	"Brinjal": ["eggplant", "baingan"],
+	"Okra": ["bhindi", "ladies finger", "lady finger"],
+	"Chilli": ["chili", "chillies", "chilies"],
+	"Tomato": ["tomatoes"],
+}
+# The Q&A CSV has rows whose columns are shifted; categories seen fewer times than this are ignored
+MIN_CATEGORY_ROWS = 2
+
+_PARENS_RE = re.compile(r"\(([^)]*)\)")
+
+Facet = Tuple[str, str]
+
+
+def _clean(value) -> Optional[str]:
+	return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def _name_variants(name: str) -> List[str]:
+	# "Bud Rot (Phytophthora)" is also written "bud rot" or "phytophthora"
+	variants = [name, _PARENS_RE.sub("", name)] + _PARENS_RE.findall(name)
+	return [" ".join(v.split()) for v in variants if v.strip()]
+
+
+class FacetIndex:
+	"""Sorted row ids per facet value (e.g. ("crop", "Paddy") -> rows) and a matcher for those values."""
+
+	def __init__(self, postings: Dict[Facet, Iterable[int]], keywords: Dict[Facet, List[str]]):
+		self.postings = {key: np.asarray(sorted(set(ids)), dtype=np.int64) for key, ids in postings.items()}
+		self.postings = {key: ids for key, ids in self.postings.items() if len(ids)}
+		self._matcher = KeywordMatcher({key: words for key, words in keywords.items() if key in self.postings})
+
+	def match(self, query: str) -> Dict[str, Set[str]]:
+		"""Facet values mentioned in the query, e.g. {"crop": {"Paddy"}}."""
+		found: Dict[str, Set[str]] = {}
+		for _, _, (facet, value) in self._matcher.find(query):
+			found.setdefault(facet, set()).add(value)
+		return found
+
+	def candidates(self, query: str, min_rows: int) -> Optional[List[int]]:
+		"""Row ids to score for the query, ascending, or None to search the whole corpus.
+
+		These are the rows carrying any facet value the query mentions. Facets
+		are not intersected: a word like "pest" in "crop insurance for pest
+		damage" names a category the answer is not filed under. With no facet
+		match, or fewer than `min_rows` rows, the whole corpus is searched.
+		"""
+		found = self.match(query)
+		if not found:
+			return None
+		rows = reduce(np.union1d, [self.postings[(facet, v)] for facet, values in found.items() for v in values])
+		return rows.tolist() if len(rows) >= min_rows else None
+
+
+def crop_names(crops: Iterable) -> Dict[str, List[str]]:
+	"""Crop -> names it goes by (itself plus CROP_ALIASES)."""
+	names: Dict[str, List[str]] = {}
+	for crop in crops:
+		crop = _clean(crop)
+		if crop is not None and crop not in names:
+			names[crop] = [crop] + CROP_ALIASES.get(crop, [])
+	return names
+
+
+def pest_facets(records: Sequence) -> FacetIndex:
+	"""Crop and pest/disease facets of the crop-pest knowledge base."""
+	postings: Dict[Facet, List[int]] = {}
+	keywords: Dict[Facet, List[str]] = {}
+	crops = crop_names(row.get("Crop") for row in records)
+	for i, row in enumerate(records):
+		crop, pest = _clean(row.get("Crop")), _clean(row.get("Pest/Disease"))
+		if crop is not None:
+			postings.setdefault(("crop", crop), []).append(i)
+			keywords[("crop", crop)] = crops[crop]
+		if pest is not None:
+			postings.setdefault(("pest", pest), []).append(i)
+			keywords[("pest", pest)] = _name_variants(pest)
+	return FacetIndex(postings, keywords)
+
+
+def qa_facets(records: Sequence, crops: Dict[str, List[str]]) -> FacetIndex:
+	"""Category facet of the Q&A knowledge base, plus a crop facet from the crops each question mentions."""
+	postings: Dict[Facet, List[int]] = {}
+	keywords: Dict[Facet, List[str]] = {}
+	crop_matcher = KeywordMatcher(crops)
+	for i, row in enumerate(records):
+		category = _clean(row.get("Category"))
+		if category is not None and category.replace(" ", "").isalpha():
+			postings.setdefault(("category", category), []).append(i)
+			keywords[("category", category)] = [category]
+		query = row.get("Query")
+		if isinstance(query, str):
+			for crop in {crop for _, _, crop in crop_matcher.find(query)}:
+				postings.setdefault(("crop", crop), []).append(i)
+				keywords[("crop", crop)] = crops[crop]
+	postings = {key: ids for key, ids in postings.items() if key[0] != "category" or len(ids) >= MIN_CATEGORY_ROWS}
+	return FacetIndex(postings, keywords)
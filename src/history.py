@@ -0,0 +1,149 @@
+"""Bounded chat history for the Streamlit app.
+
+A session keeps only its last HISTORY_WINDOW turns in memory. Older turns
+are moved to a shared SQLite archive (zlib-compressed, one row per turn)
+and come back a page at a time when the user asks to see earlier messages,
+so rendering a turn costs the same however long the session has run.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+HISTORY_WINDOW = int(os.environ.get("AGRI_HISTORY_WINDOW", "20"))
+HISTORY_PAGE = int(os.environ.get("AGRI_HISTORY_PAGE", "20"))
+HISTORY_PATH = os.environ.get("AGRI_HISTORY_DB") or os.path.join(CACHE_DIR, "chat_history.sqlite")
+# Archived turns of sessions idle for longer than this are deleted
+HISTORY_TTL_S = 7 * 24 * 60 * 60
+
+Turn = Dict[str, str]
+
+
+class ChatArchive:
+	"""Append-only store of archived turns, keyed by session and turn number.
+
+	Safe to share between the threads serving different sessions. Like
+	DiskCache, a disk that cannot be written loses turns rather than failing
+	the chat.
+	"""
+
+	def __init__(self, path: str = HISTORY_PATH, ttl: Optional[float] = HISTORY_TTL_S):
+		self.path = path
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._conn: Optional[sqlite3.Connection] = None
+
+	def _connect(self) -> sqlite3.Connection:
+		if self._conn is None:
+			os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+			conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+			conn.execute(
+				"CREATE TABLE IF NOT EXISTS turns ("
+				"session TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content BLOB NOT NULL, created REAL NOT NULL, "
+				"PRIMARY KEY (session, seq)) WITHOUT ROWID"
+			)
+			if self.ttl is not None:
+				# Whole sessions go at once: a session still in use keeps its oldest turns
+				conn.execute(
+					"DELETE FROM turns WHERE session IN (SELECT session FROM turns GROUP BY session HAVING MAX(created) < ?)",
+					(time.time() - self.ttl,),
+				)
+			conn.commit()
+			self._conn = conn
+		return self._conn
+
+	def append(self, session: str, turns: List[Tuple[int, Turn]]) -> None:
+		now = time.time()
+		rows = [(session, seq, turn["role"], zlib.compress(turn["content"].encode("utf-8")), now) for seq, turn in turns]
+		try:
+			with self._lock:
+				conn = self._connect()
+				conn.executemany("INSERT OR REPLACE INTO turns (session, seq, role, content, created) VALUES (?, ?, ?, ?, ?)", rows)
+				conn.commit()
+		except sqlite3.Error:
+			logger.warning("Could not archive %d chat turn(s)", len(rows), exc_info=True)
+
+	def page(self, session: str, before: int, limit: int) -> List[Tuple[int, Turn]]:
+		"""Up to `limit` archived turns numbered below `before`, oldest first."""
+		try:
+			with self._lock:
+				rows = self._connect().execute(
+					"SELECT seq, role, content FROM turns WHERE session = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+					(session, before, limit),
+				).fetchall()
+		except sqlite3.Error:
+			return []
+		return [(seq, {"role": role, "content": zlib.decompress(content).decode("utf-8")}) for seq, role, content in reversed(rows)]
+
+	def clear(self, session: Optional[str] = None) -> None:
+		with self._lock:
+			conn = self._connect()
+			if session is None:
+				conn.execute("DELETE FROM turns")
+			else:
+				conn.execute("DELETE FROM turns WHERE session = ?", (session,))
+			conn.commit()
+
+
+class ChatHistory:
+	"""One session's turns: the last `window` in memory, the rest in `archive`.
+
+	`turns()` is what to render: any pages loaded with `load_earlier()`,
+	followed by the in-memory window. Appending a turn drops the loaded pages
+	again, so the view returns to the window size.
+	"""
+
+	def __init__(self, archive: Optional[ChatArchive] = None, window: int = HISTORY_WINDOW, session_id: Optional[str] = None):
+		self.archive = archive
+		self.window = max(1, window)
+		self.session_id = session_id or uuid.uuid4().hex
+		self._recent: Deque[Tuple[int, Turn]] = deque()
+		self._earlier: List[Tuple[int, Turn]] = []
+		self._next_seq = 0
+		# Turns below this number are not in the archive (never written, or expired)
+		self._floor = 0
+
+	def append(self, role: str, content: str) -> None:
+		self._recent.append((self._next_seq, {"role": role, "content": content}))
+		self._next_seq += 1
+		self._earlier = []
+		overflow = []
+		while len(self._recent) > self.window:
+			overflow.append(self._recent.popleft())
+		if overflow and self.archive is not None:
+			self.archive.append(self.session_id, overflow)
+
+	def _first_shown(self) -> int:
+		if self._earlier:
+			return self._earlier[0][0]
+		return self._recent[0][0] if self._recent else self._next_seq
+
+	@property
+	def has_earlier(self) -> bool:
+		return self.archive is not None and self._first_shown() > self._floor
+
+	def load_earlier(self, page: int = HISTORY_PAGE) -> int:
+		"""Prepend the next `page` archived turns to the view; returns how many were loaded."""
+		if not self.has_earlier:
+			return 0
+		older = self.archive.page(self.session_id, self._first_shown(), page)
+		self._earlier = older + self._earlier
+		if len(older) < page:
+			self._floor = self._first_shown()
+		return len(older)
+
+	def turns(self) -> List[Turn]:
+		return [turn for _, turn in self._earlier] + [turn for _, turn in self._recent]
+
+	def __len__(self) -> int:
+		"""Turns in the whole session, archived ones included."""
+		return self._next_seq
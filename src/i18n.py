@@ -1,13 +1,169 @@
-from typing import Optional
+import functools
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-try:
-	from deep_translator import GoogleTranslator  # type: ignore
-	_HAS_TRANSLATOR = True
-except Exception:
-	GoogleTranslator = None  # type: ignore
-	_HAS_TRANSLATOR = False
+from . import deadline, metrics
+from .cache import DiskCache, TTLCache
 
+TRANSLATION_CACHE_SIZE = 4096
+# Set to a file path to keep translations across restarts and share them between workers
+TRANSLATION_CACHE_PATH = os.environ.get("AGRI_TRANSLATION_CACHE")
+# Google Translate rejects requests above 5000 characters
+MAX_REQUEST_CHARS = 4500
 
+_cache = TTLCache(maxsize=TRANSLATION_CACHE_SIZE)
+_disk_cache: Optional[DiskCache] = DiskCache(TRANSLATION_CACHE_PATH) if TRANSLATION_CACHE_PATH else None
+_translators: Dict[Tuple[str, str], Any] = {}
+_translators_lock = threading.Lock()
+_backend: Optional[Callable[[str, str], Any]] = None
+
+
+def set_translator_backend(factory: Optional[Callable[[str, str], Any]]) -> None:
+	"""Replace the translator factory, e.g. with a stub for tests.
+
+	`factory(source, target)` must return an object with a `translate(text)` method.
+	Pass None to go back to GoogleTranslator. Cached translations are dropped.
+	"""
+	global _backend
+	with _translators_lock:
+		_backend = factory
+		_translators.clear()
+	_cache.clear()
+
+
+def translation_cache_stats() -> Dict[str, int]:
+	return _cache.stats()
+
+
+@functools.lru_cache(maxsize=None)
+def _google_translator_class() -> Any:
+	"""Import deep_translator on first use; None if it is not installed."""
+	try:
+		from deep_translator import GoogleTranslator  # type: ignore
+		return GoogleTranslator
+	except Exception:
+		return None
+
+
+def _get_translator(source: str, target: str) -> Any:
+	"""Reuse one translator per (source, target) pair instead of building one per call."""
+	key = (source, target)
+	translator = _translators.get(key)
+	if translator is None:
+		with _translators_lock:
+			translator = _translators.get(key)
+			if translator is None:
+				if _backend is not None:
+					translator = _backend(source, target)
+				else:
+					google = _google_translator_class()
+					if google is None:
+						return None
+					translator = google(source=source, target=target)
+				_translators[key] = translator
+	return translator
+
+
+def _cached(key: Tuple[str, str, str]) -> Optional[str]:
+	value = _cache.get(key)
+	if value is None and _disk_cache is not None:
+		value = _disk_cache.get("\x1f".join(key))
+		if value is not None:
+			_cache.set(key, value)
+	return value
+
+
+def _store(key: Tuple[str, str, str], value: str) -> None:
+	_cache.set(key, value)
+	if _disk_cache is not None:
+		_disk_cache.set("\x1f".join(key), value)
+
+
+def _translate_segments(translator: Any, texts: List[str]) -> List[str]:
+	"""Translate several single-line segments in as few round trips as possible.
+
+	Segments are joined with newlines, which the upstream translator preserves;
+	if the split does not line up, fall back to one request per segment. Once
+	the request deadline passes no further requests are sent, and only the
+	leading segments translated so far are returned.
+	"""
+	out: List[str] = []
+	group: List[str] = []
+	size = 0
+
+	def flush() -> None:
+		if not group:
+			return
+		if len(group) > 1:
+			deadline.check()
+			parts = (translator.translate("\n".join(group)) or "").split("\n")
+			if len(parts) == len(group):
+				out.extend(p.strip() or t for p, t in zip(parts, group))
+				return
+		for t in group:
+			deadline.check()
+			out.append(translator.translate(t) or t)
+
+	try:
+		for text in texts:
+			if "\n" in text or size + len(text) + 1 > MAX_REQUEST_CHARS:
+				flush()
+				group, size = [], 0
+			if "\n" in text:
+				deadline.check()
+				out.append(translator.translate(text) or text)
+				continue
+			group.append(text)
+			size += len(text) + 1
+		flush()
+	except deadline.DeadlineExceeded:
+		pass
+	return out
+
+
+def _fetch(pending: List[str], source: str, target: str) -> Dict[str, str]:
+	# Fragments the deadline cut off are left out, so they are neither cached nor returned
+	translator = _get_translator(source, target)
+	if translator is None:
+		return {}
+	translated = dict(zip(pending, _translate_segments(translator, pending)))
+	for text, value in translated.items():
+		_store((text, source, target), value)
+	return translated
+
+
+def translate_many(texts: List[str], source: str, target: str) -> List[str]:
+	"""Translate a list of fragments, reusing cached ones and batching the rest into one request.
+
+	Fragments that cannot be translated - including when the request deadline
+	(see `src.deadline`) runs out first - are returned unchanged. A request
+	already sent when the deadline passes still finishes and is cached for
+	next time; later requests for the same call are not sent.
+	"""
+	results = list(texts)
+	misses: Dict[str, List[int]] = {}
+	for i, text in enumerate(texts):
+		if not text or not text.strip():
+			continue
+		cached = _cached((text, source, target))
+		if cached is not None:
+			results[i] = cached
+		else:
+			misses.setdefault(text, []).append(i)
+	if not misses:
+		return results
+	try:
+		translated = deadline.call(_fetch, list(misses), source, target, default={}, stage="translate")
+	except Exception:
+		return results
+	for text, value in translated.items():
+		for i in misses[text]:
+			results[i] = value
+	return results
+
+
+@metrics.timed("detect_language")
 def detect_language(text: str) -> str:
 	"""Return ISO code like 'hi' or 'en'. Defaults to 'en' on failure."""
 	try:
@@ -21,32 +177,34 @@ def detect_language(text: str) -> str:
 		return "en"
 
 
-def to_english(text: str) -> str:
-	"""Translate input to English if not already English. Falls back to original on errors."""
+@metrics.timed("to_english")
+def to_english(text: str, source_lang: Optional[str] = None) -> str:
+	"""Translate input to English if not already English. Falls back to original on errors.
+
+	Pass `source_lang` when the caller already ran `detect_language` to avoid detecting twice.
+	"""
 	try:
 		if not text:
 			return text
-		lang = detect_language(text)
+		lang = source_lang or detect_language(text)
 		if lang.startswith("en"):
 			return text
-		if _HAS_TRANSLATOR:
-			return GoogleTranslator(source="auto", target="en").translate(text) or text
-		return text
+		return translate_many([text], "auto", "en")[0]
 	except Exception:
 		return text
 
 
 def from_english(text: str, target_lang: str) -> str:
 	"""Translate English text to target_lang. If target is English or error, return original."""
+	return from_english_many([text], target_lang)[0]
+
+
+@metrics.timed("from_english")
+def from_english_many(texts: List[str], target_lang: str) -> List[str]:
+	"""Translate several English fragments (e.g. the lines of one answer) to target_lang together."""
 	try:
-		if not text:
-			return text
 		if not target_lang or target_lang.startswith("en"):
-			return text
-		if _HAS_TRANSLATOR:
-			return GoogleTranslator(source="en", target=target_lang).translate(text) or text
-		return text
+			return list(texts)
+		return translate_many(texts, "en", target_lang)
 	except Exception:
-		return text
-
-
+		return list(texts)
@@ -0,0 +1,288 @@
+"""Streaming ingestion for knowledge bases too large to read in one go.
+
+`ingest_corpus()` reads a CSV in chunks of CHUNK_ROWS rows, normalizes the
+header, drops columns the corpus does not use (such as the blank trailing
+columns of the Q&A export), and optionally collapses near-duplicate rows
+with MinHash. Kept rows go straight into compact UTF-8 column blobs (the
+`StringColumn` layout of the compiled artifact), so memory grows with the
+distinct rows kept rather than with the size of the file.
+
+	python -m src.ingest "data/raw/farmer queries with answers.csv" --dedupe-column Query
+"""
+import argparse
+import csv
+import hashlib
+import logging
+import math
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data_loader import PEST_FILE, QA_FILE, RAW_DATA_PATH, SCHEMES_FILE
+from .records import NA_VALUES, ColumnRecords, StringColumn, read_csv_records
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = int(os.environ.get("AGRI_INGEST_CHUNK_ROWS", "50000"))
+# Files at least this large are streamed (and their Q&A rows de-duplicated) instead of read whole
+STREAM_MIN_BYTES = int(os.environ.get("AGRI_STREAM_MIN_BYTES", str(64 * 1024 * 1024)))
+# Estimated Jaccard similarity of character shingles above which two queries are one question
+NEAR_DUP_THRESHOLD = float(os.environ.get("AGRI_NEAR_DUP_THRESHOLD", "0.8"))
+SHINGLE_CHARS = 5
+NUM_PERM = 64
+LSH_BANDS = 16
+# Rows hashed per NumPy batch; bounds the (shingles x NUM_PERM) scratch matrix to a few MB
+HASH_BATCH_ROWS = 1024
+# Column whose near-duplicates are collapsed when a knowledge base is streamed
+DEDUPE_COLUMNS = {"qa": "Query"}
+
+def _header_key(name: str) -> str:
+	return " ".join(str(name).split()).lower()
+
+
+def normalize_header(header: Sequence[str], columns: Optional[Sequence[str]] = None) -> List[Optional[str]]:
+	"""Clean column names, in file order; None marks a column to drop.
+
+	Names are stripped and matched to `columns` ignoring case and repeated
+	whitespace (" query " -> "Query"). Blank names are always dropped, and so
+	is anything not in `columns` when it is given.
+	"""
+	wanted = {_header_key(c): c for c in columns} if columns is not None else None
+	names: List[Optional[str]] = []
+	seen = set()
+	for raw in header:
+		name = " ".join(str(raw).split())
+		if wanted is not None:
+			name = wanted.get(name.lower())
+		if not name or name in seen:
+			names.append(None)
+			continue
+		seen.add(name)
+		names.append(name)
+	return names
+
+
+def iter_csv_chunks(path: str, columns: Optional[Sequence[str]] = None, chunk_rows: int = CHUNK_ROWS) -> Iterator[ColumnRecords]:
+	"""Yield the rows of a CSV as ColumnRecords of at most `chunk_rows` rows, with normalized headers."""
+	with open(path, newline="", encoding="utf-8-sig") as fh:
+		reader = csv.reader(fh)
+		names = normalize_header(next(reader, []), columns)
+		keep = [j for j, name in enumerate(names) if name is not None]
+		kept_names = [names[j] for j in keep]
+		if columns is not None:
+			# Columns the file lacks read as missing, like they do in pandas
+			kept_names += [c for c in columns if c not in kept_names]
+		width = len(kept_names)
+		rows: List[List] = []
+		for row in reader:
+			if not any(v.strip() for v in row):
+				continue
+			values = [row[j] if j < len(row) else "" for j in keep]
+			values += [""] * (width - len(values))
+			rows.append([math.nan if v in NA_VALUES else v for v in values])
+			if len(rows) >= chunk_rows:
+				yield ColumnRecords.from_rows(kept_names, rows)
+				rows = []
+		if rows:
+			yield ColumnRecords.from_rows(kept_names, rows)
+
+
+def _shingle_text(value) -> str:
+	from .retrieval import normalize_query
+	text = normalize_query("" if isinstance(value, float) else str(value))
+	return text.ljust(SHINGLE_CHARS)
+
+
+class MinHashDeduper:
+	"""Streaming near-duplicate filter: MinHash signatures over character shingles, bucketed with LSH.
+
+	A text is a duplicate when a text already kept shares an LSH band with it
+	and their signatures agree on at least `threshold` of their positions (an
+	estimate of the Jaccard similarity of their shingle sets). Memory is one
+	signature and LSH_BANDS bucket entries per kept text, plus one hash per
+	distinct text.
+	"""
+
+	def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, num_perm: int = NUM_PERM, bands: int = LSH_BANDS, seed: int = 1):
+		if num_perm % bands:
+			raise ValueError("num_perm must be a multiple of bands")
+		rng = np.random.default_rng(seed)
+		self.threshold = threshold
+		self.bands = bands
+		self.rows_per_band = num_perm // bands
+		self._a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+		self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+		self._band_mix = rng.integers(1, 1 << 62, size=self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+		self._buckets: List[Dict[int, int]] = [{} for _ in range(bands)]
+		self._signatures = np.zeros((1024, num_perm), dtype=np.uint32)
+		# Hashes of every distinct normalized text seen, kept or not
+		self._seen = set()
+		self.kept = 0
+		self.duplicates = 0
+
+	def signatures(self, texts: Sequence[str]) -> np.ndarray:
+		"""MinHash signatures (len(texts) x num_perm, uint32) of already-normalized texts."""
+		lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+		codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+		# Polynomial hash of every window of SHINGLE_CHARS code points
+		windows = len(codes) - SHINGLE_CHARS + 1
+		hashes = np.zeros(windows, dtype=np.uint64)
+		for j in range(SHINGLE_CHARS):
+			hashes = hashes * np.uint64(1000003) + codes[j:j + windows]
+		# Keep the windows that lie inside one text; each text has len - SHINGLE_CHARS + 1 of them
+		counts = lengths - SHINGLE_CHARS + 1
+		starts = np.zeros(len(texts), dtype=np.int64)
+		np.cumsum(counts[:-1], out=starts[1:])
+		text_starts = np.zeros(len(texts), dtype=np.int64)
+		np.cumsum(lengths[:-1], out=text_starts[1:])
+		inside = np.arange(counts.sum()) - np.repeat(starts - text_starts, counts)
+		# Multiply-shift hashing: one universal hash per permutation, top 32 bits kept.
+		# Permutations are rows so the per-text minimum runs over contiguous memory.
+		permuted = ((self._a[:, None] * hashes[inside] + self._b[:, None]) >> np.uint64(32)).astype(np.uint32)
+		return np.minimum.reduceat(permuted, starts, axis=1).T
+
+	def _band_keys(self, signatures: np.ndarray) -> List[List[int]]:
+		bands = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows_per_band)
+		return (bands * self._band_mix).sum(axis=2).tolist()
+
+	def _keep(self, signature: np.ndarray, keys: List[int]) -> bool:
+		seen = set()
+		for bucket, key in zip(self._buckets, keys):
+			other = bucket.get(key)
+			if other is None or other in seen:
+				continue
+			seen.add(other)
+			if np.count_nonzero(self._signatures[other] == signature) >= self.threshold * len(signature):
+				return False
+		if self.kept == len(self._signatures):
+			self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+		self._signatures[self.kept] = signature
+		for bucket, key in zip(self._buckets, keys):
+			bucket.setdefault(key, self.kept)
+		self.kept += 1
+		return True
+
+	def filter(self, values: Sequence) -> List[int]:
+		"""Positions of the values to keep, in order; missing values are always kept.
+
+		Texts are compared after `normalize_query`, and exact repeats of a text
+		seen before are dropped without computing a signature.
+		"""
+		out = [i for i, v in enumerate(values) if isinstance(v, float) and math.isnan(v)]
+		present = [i for i, v in enumerate(values) if not (isinstance(v, float) and math.isnan(v))]
+		for lo in range(0, len(present), HASH_BATCH_ROWS):
+			fresh: List[Tuple[int, str]] = []
+			for i in present[lo:lo + HASH_BATCH_ROWS]:
+				text = _shingle_text(values[i])
+				key = hash(text)
+				if key in self._seen:
+					self.duplicates += 1
+					continue
+				self._seen.add(key)
+				fresh.append((i, text))
+			if not fresh:
+				continue
+			signatures = self.signatures([text for _, text in fresh])
+			for (i, _), signature, keys in zip(fresh, signatures, self._band_keys(signatures)):
+				if self._keep(signature, keys):
+					out.append(i)
+				else:
+					self.duplicates += 1
+		return sorted(out)
+
+
+class _StringColumnBuilder:
+	"""Append-only StringColumn: chunks are encoded as they arrive and joined once at the end."""
+
+	def __init__(self):
+		self._data = bytearray()
+		self._lengths: List[np.ndarray] = []
+		self._null: List[np.ndarray] = []
+
+	def extend(self, values: Sequence) -> None:
+		data, offsets, null = StringColumn.encode(values)
+		self._data += data.tobytes()
+		self._lengths.append(np.diff(offsets))
+		self._null.append(null)
+
+	def build(self) -> StringColumn:
+		lengths = np.concatenate(self._lengths) if self._lengths else np.zeros(0, dtype=np.int64)
+		offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+		np.cumsum(lengths, out=offsets[1:])
+		null = np.concatenate(self._null) if self._null else np.zeros(0, dtype=np.bool_)
+		return StringColumn(np.frombuffer(bytes(self._data), dtype=np.uint8), offsets, null)
+
+
+def _file_sha256(path: str) -> str:
+	digest = hashlib.sha256()
+	with open(path, "rb") as fh:
+		for block in iter(lambda: fh.read(1 << 20), b""):
+			digest.update(block)
+	return digest.hexdigest()
+
+
+def ingest_corpus(path: str, text_columns: List[str], dedupe_column: Optional[str] = None, chunk_rows: int = CHUNK_ROWS, threshold: float = NEAR_DUP_THRESHOLD):
+	"""Build a retrieval Corpus from a CSV chunk by chunk.
+
+	Only `text_columns` are kept. With `dedupe_column`, a row whose value in
+	that column is a near-duplicate of an earlier row's is dropped; the first
+	occurrence wins.
+	"""
+	from .bm25 import BM25Index
+	from .retrieval import BM25_MIN_DOCS, Corpus, _join_docs
+
+	columns = {name: _StringColumnBuilder() for name in text_columns}
+	docs = _StringColumnBuilder()
+	deduper = MinHashDeduper(threshold) if dedupe_column else None
+	rows_read = 0
+	for chunk in iter_csv_chunks(path, text_columns, chunk_rows):
+		rows_read += len(chunk)
+		if deduper is not None:
+			keep = deduper.filter(chunk.column(dedupe_column))
+			if len(keep) < len(chunk):
+				chunk = ColumnRecords(chunk.names, [[column[i] for i in keep] for column in chunk.columns])
+		for name, builder in columns.items():
+			builder.extend(chunk.column(name))
+		docs.extend(_join_docs(chunk, text_columns))
+	records = ColumnRecords(text_columns, [columns[name].build() for name in text_columns])
+	doc_column = docs.build()
+	logger.info(
+		"Ingested %s: %d rows read, %d near-duplicates collapsed, %d kept",
+		os.path.basename(path), rows_read, deduper.duplicates if deduper is not None else 0, len(records),
+	)
+	bm25 = BM25Index(doc_column) if len(doc_column) >= BM25_MIN_DOCS else None
+	return Corpus.from_columns(text_columns, records, doc_column, bm25, _file_sha256(path))
+
+
+def load_corpora(raw_path: str = RAW_DATA_PATH, stream_min_bytes: int = STREAM_MIN_BYTES) -> Tuple:
+	"""The three corpora from the CSVs; files of `stream_min_bytes` or more are streamed and their Q&A rows de-duplicated."""
+	from .retrieval import PEST_COLUMNS, QA_COLUMNS, SCHEME_COLUMNS, Corpus
+
+	corpora = []
+	for kind, name, text_columns in (("schemes", SCHEMES_FILE, SCHEME_COLUMNS), ("pests", PEST_FILE, PEST_COLUMNS), ("qa", QA_FILE, QA_COLUMNS)):
+		path = os.path.join(raw_path, name)
+		if os.path.getsize(path) >= stream_min_bytes:
+			corpora.append(ingest_corpus(path, text_columns, DEDUPE_COLUMNS.get(kind)))
+		else:
+			corpora.append(Corpus(read_csv_records(path), text_columns))
+	return tuple(corpora)
+
+
+def main(argv=None) -> int:
+	from .retrieval import QA_COLUMNS
+	parser = argparse.ArgumentParser(description="Stream a knowledge-base CSV and report what ingestion keeps.")
+	parser.add_argument("path")
+	parser.add_argument("--columns", nargs="+", default=QA_COLUMNS, help="columns to keep (default: the Q&A columns)")
+	parser.add_argument("--dedupe-column", help="collapse rows whose value in this column is a near-duplicate")
+	parser.add_argument("--threshold", type=float, default=NEAR_DUP_THRESHOLD)
+	parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+	args = parser.parse_args(argv)
+	corpus = ingest_corpus(args.path, args.columns, args.dedupe_column, args.chunk_rows, args.threshold)
+	print(f"{len(corpus)} rows kept, BM25 {'built' if corpus.bm25 is not None else 'skipped'}, version {corpus.version[:12]}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,138 @@
+"""Single-pass intent scoring over English, Devanagari and transliterated Hindi keywords.
+
+All keywords are compiled into one Aho-Corasick automaton, so a query is
+scanned once no matter how many keywords there are, and every intent that
+has a keyword in the query gets a score. Native-script keywords mean a Hindi
+query can be routed before (or without) translating it.
+"""
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple
+
+# Order doubles as the tie-break when two intents score the same
+INTENTS = ["pest", "scheme", "weather"]
+
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+	"pest": [
+		"pest", "disease", "insect", "mite", "borer", "blight", "rot", "weevil", "aphid", "thrips", "wilt",
+		"virus", "fungus", "fungal", "bacteria", "bacterial",
+		# transliterated Hindi
+		"keet", "keeda", "keede", "kida", "kide", "rog", "bimari", "beemari", "fafund", "phaphund", "illi", "sundi", "mahu",
+		# Devanagari
+		"कीट", "कीड़ा", "कीड़े", "कीडा", "कीडे", "रोग", "बीमारी", "फफूंद", "फफूंदी", "इल्ली", "सुंडी", "माहू", "छेदक",
+		"झुलसा", "सड़न", "उकठा", "विषाणु", "दीमक",
+	],
+	"scheme": [
+		"scheme", "subsidy", "pm-kisan", "pm kisan", "pmkisan", "pm-kusum", "pm kusum", "pmkusum", "kcc", "loan",
+		"support", "grant", "policy", "benefit",
+		"yojana", "yojna", "anudan", "karz", "karj", "karja", "sahayata", "bima", "pension",
+		"योजना", "सब्सिडी", "अनुदान", "ऋण", "कर्ज", "कर्ज़", "लोन", "सहायता", "पीएम किसान", "किसान क्रेडिट कार्ड", "बीमा", "पेंशन",
+	],
+	"weather": [
+		"weather", "rain", "monsoon", "flood", "drought", "hail", "storm", "wind", "heat", "temperature", "forecast",
+		"mausam", "barish", "baarish", "varsha", "barsaat", "baadh", "badh", "sukha", "sookha", "aandhi", "toofan",
+		"tufan", "garmi", "tapman", "hawa",
+		"मौसम", "बारिश", "वर्षा", "बरसात", "बाढ़", "बाढ", "सूखा", "ओले", "ओला", "आंधी", "आँधी", "तूफान", "तूफ़ान",
+		"गर्मी", "तापमान", "हवा", "पूर्वानुमान", "मानसून",
+	],
+}
+
+
+def _is_word_char(ch: str) -> bool:
+	# Devanagari vowel signs are combining marks, not alphanumerics, but still part of a word
+	return ch.isalnum() or ch == "_" or unicodedata.category(ch).startswith("M")
+
+
+_ASCII_NON_WORD_RE = re.compile(r"[^a-z0-9_]+")
+
+
+def normalize_text(text: str) -> str:
+	"""Lowercase `text`, turn everything but word characters into spaces and collapse whitespace."""
+	text = str(text).lower()
+	if text.isascii():
+		return " ".join(_ASCII_NON_WORD_RE.sub(" ", text).split())
+	return " ".join("".join(ch if _is_word_char(ch) else " " for ch in text).split())
+
+
+class KeywordMatcher:
+	"""Aho-Corasick automaton mapping keywords to labels.
+
+	ASCII keywords must match whole words (like a regex `\\b...\\b`). Other
+	keywords only need to start a word, so inflected Hindi forms such as
+	"कीटों" still match "कीट".
+	"""
+
+	def __init__(self, keywords: Dict[Hashable, Iterable[str]]):
+		self._goto: List[Dict[str, int]] = [{}]
+		self._fail: List[int] = [0]
+		self._out: List[List[Tuple[int, Hashable, bool]]] = [[]]
+		for label, words in keywords.items():
+			for word in words:
+				# Also match the punctuation-free form, e.g. "pm kisan" for "pm-kisan" in normalized queries
+				for form in dict.fromkeys((word.lower(), normalize_text(word))):
+					if form:
+						self._add(form, label)
+		self._link()
+
+	def _add(self, word: str, label: Hashable) -> None:
+		state = 0
+		for ch in word:
+			nxt = self._goto[state].get(ch)
+			if nxt is None:
+				nxt = len(self._goto)
+				self._goto[state][ch] = nxt
+				self._goto.append({})
+				self._fail.append(0)
+				self._out.append([])
+			state = nxt
+		self._out[state].append((len(word), label, word.isascii()))
+
+	def _link(self) -> None:
+		# Breadth-first, so a state's failure target is always linked before the state itself
+		queue = deque(self._goto[0].values())
+		while queue:
+			state = queue.popleft()
+			for ch, nxt in self._goto[state].items():
+				queue.append(nxt)
+				fail = self._fail[state]
+				while fail and ch not in self._goto[fail]:
+					fail = self._fail[fail]
+				target = self._goto[fail].get(ch, 0)
+				self._fail[nxt] = target if target != nxt else 0
+				self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+	def find(self, text: str) -> Iterator[Tuple[int, int, Hashable]]:
+		"""Yield (start, end, label) for every keyword occurrence in `text`."""
+		text = (text or "").lower()
+		goto, fail, out = self._goto, self._fail, self._out
+		state = 0
+		for i, ch in enumerate(text):
+			while state and ch not in goto[state]:
+				state = fail[state]
+			state = goto[state].get(ch, 0)
+			for length, label, whole_word in out[state]:
+				start = i - length + 1
+				if start > 0 and _is_word_char(text[start - 1]):
+					continue
+				if whole_word and i + 1 < len(text) and _is_word_char(text[i + 1]):
+					continue
+				yield start, i + 1, label
+
+
+_matcher = KeywordMatcher(INTENT_KEYWORDS)
+
+
+def score_intents(query: str) -> Dict[str, float]:
+	"""Count keyword hits per intent in one scan; every intent in INTENTS is present in the result."""
+	scores = {intent: 0.0 for intent in INTENTS}
+	# A keyword and its longer spelling starting at the same place (e.g. "कर्ज"/"कर्ज़") count once
+	for _, label in {(start, label) for start, _, label in _matcher.find(query)}:
+		scores[label] += 1.0
+	return scores
+
+
+def best_intent(scores: Dict[str, float]) -> str:
+	"""Highest-scoring intent, earlier INTENTS winning ties; "general" when nothing matched."""
+	best = max(INTENTS, key=lambda intent: (scores.get(intent, 0.0), -INTENTS.index(intent)))
+	return best if scores.get(best, 0.0) > 0 else "general"
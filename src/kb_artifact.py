@@ -0,0 +1,241 @@
+"""Compiled knowledge-base artifact.
+
+`compile_artifact()` turns data/raw/*.csv into one versioned, checksummed
+binary file holding the searchable columns, the pre-joined documents and the
+BM25 postings of every corpus. `load_artifact()` memory-maps it, so worker
+processes share the same pages and nothing is decoded until a query needs it.
+The artifact is ignored when it is missing, fails its payload checksum, was
+built by a different format/builder, or is older than the CSVs it was
+compiled from.
+
+	python -m src.kb_artifact compile
+	python -m src.kb_artifact verify
+"""
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .bm25 import BM25Index
+from .data_loader import PEST_FILE, PROJECT_ROOT, QA_FILE, RAW_DATA_PATH, SCHEMES_FILE
+from .records import ColumnRecords, StringColumn
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+MAGIC = b"AGRIKB\x00\x01"
+ARTIFACT_PATH = os.environ.get("AGRI_KB_ARTIFACT") or os.path.join(PROJECT_ROOT, "data", "compiled", "knowledge_base.agrikb")
+SOURCE_FILES = {"schemes": SCHEMES_FILE, "pests": PEST_FILE, "qa": QA_FILE}
+_ALIGN = 8
+HASH_BLOCK_BYTES = 1 << 20
+
+
+def _builder_stamp() -> Dict:
+	"""Settings baked into the artifact; a mismatch means it must be recompiled."""
+	from .retrieval import BM25_MIN_DOCS, PEST_COLUMNS, QA_COLUMNS, SCHEME_COLUMNS
+	return {
+		"format": FORMAT_VERSION,
+		"bm25_min_docs": BM25_MIN_DOCS,
+		"columns": {"schemes": SCHEME_COLUMNS, "pests": PEST_COLUMNS, "qa": QA_COLUMNS},
+	}
+
+
+def _file_sha256(path: str) -> str:
+	digest = hashlib.sha256()
+	with open(path, "rb") as fh:
+		for block in iter(lambda: fh.read(1 << 20), b""):
+			digest.update(block)
+	return digest.hexdigest()
+
+
+def _source_info(path: str) -> Dict:
+	st = os.stat(path)
+	return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _file_sha256(path)}
+
+
+def _source_is_fresh(path: str, info: Dict) -> bool:
+	try:
+		st = os.stat(path)
+	except OSError:
+		return False
+	if st.st_size != info["size"]:
+		return False
+	# Same size and mtime is trusted; a touched-but-identical file costs one hash
+	return st.st_mtime_ns == info["mtime_ns"] or _file_sha256(path) == info["sha256"]
+
+
+class _Writer:
+	def __init__(self):
+		self.sections: Dict[str, List] = {}
+		self.chunks: List[bytes] = []
+		self.size = 0
+
+	def add(self, name: str, arr: np.ndarray) -> None:
+		pad = -self.size % _ALIGN
+		if pad:
+			self.chunks.append(b"\0" * pad)
+			self.size += pad
+		data = np.ascontiguousarray(arr).tobytes()
+		self.sections[name] = [self.size, len(arr), np.asarray(arr).dtype.str]
+		self.chunks.append(data)
+		self.size += len(data)
+
+	def add_strings(self, name: str, values: Iterable) -> None:
+		data, offsets, null = StringColumn.encode(values)
+		self.add(name + ".data", data)
+		self.add(name + ".offsets", offsets)
+		self.add(name + ".null", null)
+
+
+def compile_artifact(path: str = ARTIFACT_PATH) -> str:
+	"""Compile data/raw/*.csv into the binary artifact at `path` (written atomically). Returns the path."""
+	from .ingest import load_corpora
+	from .retrieval import KnowledgeIndex
+
+	sources = {kind: _source_info(os.path.join(RAW_DATA_PATH, name)) for kind, name in SOURCE_FILES.items()}
+	index = KnowledgeIndex.from_corpora(*load_corpora(RAW_DATA_PATH))
+	writer = _Writer()
+	corpora: Dict[str, Dict] = {}
+	for kind, corpus in (("schemes", index.schemes), ("pests", index.pests), ("qa", index.qa)):
+		for i, col in enumerate(corpus.text_columns):
+			writer.add_strings(f"{kind}.col{i}", (row.get(col, "") for row in corpus.records))
+		writer.add_strings(f"{kind}.docs", corpus.docs)
+		if corpus.bm25 is not None:
+			writer.add_strings(f"{kind}.bm25.vocab", corpus.bm25.vocab)
+			writer.add(f"{kind}.bm25.offsets", corpus.bm25.offsets)
+			writer.add(f"{kind}.bm25.ids", corpus.bm25.ids)
+			writer.add(f"{kind}.bm25.tfs", corpus.bm25.tfs)
+			writer.add(f"{kind}.bm25.doc_lens", corpus.bm25.doc_lens)
+			writer.add(f"{kind}.bm25.weights", corpus.bm25.weights)
+		corpora[kind] = {"text_columns": corpus.text_columns, "rows": len(corpus), "bm25": None}
+		if corpus.bm25 is not None:
+			corpora[kind]["bm25"] = {"k1": corpus.bm25.k1, "b": corpus.bm25.b}
+
+	payload_sha = hashlib.sha256()
+	for chunk in writer.chunks:
+		payload_sha.update(chunk)
+	header = json.dumps({
+		"builder": _builder_stamp(),
+		"sources": sources,
+		"corpora": corpora,
+		"sections": writer.sections,
+		"payload_size": writer.size,
+		"payload_sha256": payload_sha.hexdigest(),
+	}).encode("utf-8")
+	prefix = MAGIC + struct.pack("<Q", len(header)) + header
+	prefix += b"\0" * (-len(prefix) % _ALIGN)
+
+	os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+	tmp_path = f"{path}.tmp{os.getpid()}"
+	with open(tmp_path, "wb") as fh:
+		fh.write(prefix)
+		for chunk in writer.chunks:
+			fh.write(chunk)
+	os.replace(tmp_path, path)
+	return path
+
+
+def _read_header(buf) -> Tuple[Dict, int]:
+	if buf[:len(MAGIC)] != MAGIC:
+		raise ValueError("not a knowledge-base artifact")
+	(header_len,) = struct.unpack_from("<Q", buf, len(MAGIC))
+	start = len(MAGIC) + 8
+	header = json.loads(bytes(buf[start:start + header_len]).decode("utf-8"))
+	payload_start = start + header_len
+	payload_start += -payload_start % _ALIGN
+	if len(buf) - payload_start != header["payload_size"]:
+		raise ValueError("artifact is truncated")
+	return header, payload_start
+
+
+def _payload_ok(buf, header: Dict, payload_start: int) -> bool:
+	digest = hashlib.sha256()
+	for start in range(payload_start, len(buf), HASH_BLOCK_BYTES):
+		digest.update(buf[start:start + HASH_BLOCK_BYTES])
+	return digest.hexdigest() == header["payload_sha256"]
+
+
+def verify_artifact(path: str = ARTIFACT_PATH) -> bool:
+	"""Check the payload checksum of the artifact (reads the whole file)."""
+	with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+		header, payload_start = _read_header(buf)
+		return _payload_ok(buf, header, payload_start)
+
+
+def load_artifact(path: str = ARTIFACT_PATH):
+	"""Memory-map the artifact and return a KnowledgeIndex, or None if it is missing, stale or corrupt.
+
+	The payload checksum is checked on every load; hashing touches each page
+	once, and the pages stay in the page cache shared by all workers.
+	"""
+	from .retrieval import Corpus, KnowledgeIndex
+	if not os.path.exists(path):
+		return None
+	try:
+		with open(path, "rb") as fh:
+			buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+		header, payload_start = _read_header(buf)
+		if header["builder"] != _builder_stamp():
+			return None
+		for kind, name in SOURCE_FILES.items():
+			if not _source_is_fresh(os.path.join(RAW_DATA_PATH, name), header["sources"][kind]):
+				return None
+		if not _payload_ok(buf, header, payload_start):
+			logger.warning("Artifact %s fails its checksum; loading the CSVs instead", path)
+			return None
+
+		sections = header["sections"]
+
+		def array(name: str) -> np.ndarray:
+			offset, count, dtype = sections[name]
+			return np.frombuffer(buf, dtype=np.dtype(dtype), count=count, offset=payload_start + offset)
+
+		def strings(name: str) -> StringColumn:
+			return StringColumn(array(name + ".data"), array(name + ".offsets"), array(name + ".null"))
+
+		corpora = []
+		for kind in ("schemes", "pests", "qa"):
+			meta = header["corpora"][kind]
+			columns = [strings(f"{kind}.col{i}") for i in range(len(meta["text_columns"]))]
+			bm25 = None
+			if meta["bm25"]:
+				bm25 = BM25Index.from_arrays(
+					strings(f"{kind}.bm25.vocab"),
+					array(f"{kind}.bm25.offsets"),
+					array(f"{kind}.bm25.ids"),
+					array(f"{kind}.bm25.tfs"),
+					array(f"{kind}.bm25.doc_lens"),
+					array(f"{kind}.bm25.weights"),
+					**meta["bm25"],
+				)
+			records = ColumnRecords(meta["text_columns"], columns)
+			version = header["sources"][kind]["sha256"]
+			corpora.append(Corpus.from_columns(meta["text_columns"], records, strings(f"{kind}.docs"), bm25, version))
+		return KnowledgeIndex.from_corpora(*corpora)
+	except (OSError, ValueError, KeyError, TypeError):
+		logger.warning("Artifact %s is unreadable; loading the CSVs instead", path, exc_info=True)
+		return None
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description="Compile or verify the knowledge-base artifact.")
+	parser.add_argument("command", choices=["compile", "verify"])
+	parser.add_argument("--path", default=ARTIFACT_PATH)
+	args = parser.parse_args(argv)
+	if args.command == "compile":
+		print(f"Wrote {compile_artifact(args.path)}")
+		return 0
+	ok = verify_artifact(args.path)
+	print("OK" if ok else "Checksum mismatch")
+	return 0 if ok else 1
+
+
+if __name__ == "__main__":
+	sys.exit(main())
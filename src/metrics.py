@@ -0,0 +1,203 @@
+"""Stage timings for the answer pipeline.
+
+Set AGRI_METRICS=1 to time each stage (language detection, translation,
+intent detection, each knowledge-base scan, geocoding, forecasts) into
+in-memory histograms, read back with `snapshot()` or `render_prometheus()`.
+With it unset, `timed` leaves functions unwrapped and `span` is a shared
+no-op, so the pipeline runs as before.
+
+Set AGRI_PROFILE_SLOW_MS to profile requests run under `profile()`; those
+slower than the threshold are written to AGRI_PROFILE_DIR as .prof files
+(open them with `python -m pstats` or snakeviz).
+
+Histograms live in the process, so each API worker reports its own.
+"""
+import bisect
+import cProfile
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from .cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("AGRI_METRICS", "0").lower() in ("1", "true", "yes")
+PROFILE_SLOW_MS = float(os.environ.get("AGRI_PROFILE_SLOW_MS", "0"))
+PROFILE_DIR = os.environ.get("AGRI_PROFILE_DIR") or os.path.join(CACHE_DIR, "profiles")
+# Upper bounds in seconds, from sub-millisecond scans to upstream HTTP timeouts
+BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+# Only one cProfile profiler can run at a time
+_profile_lock = threading.Lock()
+_profile_seq = itertools.count(1)
+
+
+class Histogram:
+	"""Thread-safe fixed-bucket latency histogram (seconds)."""
+
+	def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)
+		self.count = 0
+		self.sum = 0.0
+		self.max = 0.0
+		self._lock = threading.Lock()
+
+	def observe(self, seconds: float) -> None:
+		i = bisect.bisect_left(self.buckets, seconds)
+		with self._lock:
+			self.counts[i] += 1
+			self.count += 1
+			self.sum += seconds
+			if seconds > self.max:
+				self.max = seconds
+
+	def quantile(self, q: float) -> float:
+		"""Estimate of the `q` quantile, interpolated within its bucket like Prometheus' histogram_quantile."""
+		with self._lock:
+			counts, count, peak = list(self.counts), self.count, self.max
+		if not count:
+			return 0.0
+		rank = q * count
+		seen = 0
+		for i, n in enumerate(counts):
+			if n and seen + n >= rank:
+				lower = self.buckets[i - 1] if i > 0 else 0.0
+				upper = self.buckets[i] if i < len(self.buckets) else peak
+				return min(peak, lower + (upper - lower) * (rank - seen) / n)
+			seen += n
+		return peak
+
+
+_histograms: Dict[str, Histogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(stage: str) -> Histogram:
+	hist = _histograms.get(stage)
+	if hist is None:
+		with _histograms_lock:
+			hist = _histograms.setdefault(stage, Histogram())
+	return hist
+
+
+def observe(stage: str, seconds: float) -> None:
+	histogram(stage).observe(seconds)
+
+
+@contextmanager
+def _timing(stage: str) -> Iterator[None]:
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		observe(stage, time.perf_counter() - start)
+
+
+def span(stage: str) -> ContextManager:
+	"""Time the enclosed block as `stage` (a no-op unless metrics are enabled)."""
+	return _timing(stage) if ENABLED else _NOOP
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+	"""Decorator timing every call as `stage`; returns the function untouched when metrics are disabled."""
+	def decorate(fn: Callable) -> Callable:
+		if not ENABLED:
+			return fn
+
+		@functools.wraps(fn)
+		def wrapper(*args, **kwargs):
+			start = time.perf_counter()
+			try:
+				return fn(*args, **kwargs)
+			finally:
+				observe(stage, time.perf_counter() - start)
+		return wrapper
+	return decorate
+
+
+def reset() -> None:
+	with _histograms_lock:
+		_histograms.clear()
+
+
+def snapshot() -> List[Dict]:
+	"""One row per stage (call count and latency in milliseconds), slowest total first."""
+	with _histograms_lock:
+		items = list(_histograms.items())
+	rows = []
+	for stage, hist in items:
+		if not hist.count:
+			continue
+		rows.append({
+			"stage": stage,
+			"calls": hist.count,
+			"total_ms": round(hist.sum * 1000, 2),
+			"mean_ms": round(hist.sum * 1000 / hist.count, 3),
+			"p50_ms": round(hist.quantile(0.5) * 1000, 3),
+			"p95_ms": round(hist.quantile(0.95) * 1000, 3),
+			"max_ms": round(hist.max * 1000, 3),
+		})
+	rows.sort(key=lambda r: -r["total_ms"])
+	return rows
+
+
+def _label(value: float) -> str:
+	return repr(float(value))
+
+
+def render_prometheus() -> str:
+	"""All stage histograms in the Prometheus text exposition format."""
+	lines = [
+		"# HELP agri_stage_seconds Time spent in each answer pipeline stage.",
+		"# TYPE agri_stage_seconds histogram",
+	]
+	with _histograms_lock:
+		items = sorted(_histograms.items())
+	for stage, hist in items:
+		with hist._lock:
+			counts, count, total = list(hist.counts), hist.count, hist.sum
+		cumulative = 0
+		for upper, n in zip(hist.buckets, counts):
+			cumulative += n
+			lines.append(f'agri_stage_seconds_bucket{{stage="{stage}",le="{_label(upper)}"}} {cumulative}')
+		lines.append(f'agri_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+		lines.append(f'agri_stage_seconds_sum{{stage="{stage}"}} {total!r}')
+		lines.append(f'agri_stage_seconds_count{{stage="{stage}"}} {count}')
+	return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profile(name: str, slow_ms: Optional[float] = None) -> Iterator[None]:
+	"""Profile the enclosed block and keep the profile if it took at least `slow_ms` (AGRI_PROFILE_SLOW_MS).
+
+	Does nothing when the threshold is 0, or while another request is being
+	profiled. Only the calling thread is profiled.
+	"""
+	threshold = PROFILE_SLOW_MS if slow_ms is None else slow_ms
+	if threshold <= 0 or not _profile_lock.acquire(blocking=False):
+		yield
+		return
+	profiler = cProfile.Profile()
+	start = time.perf_counter()
+	try:
+		profiler.enable()
+		try:
+			yield
+		finally:
+			profiler.disable()
+		elapsed_ms = (time.perf_counter() - start) * 1000
+		if elapsed_ms >= threshold:
+			os.makedirs(PROFILE_DIR, exist_ok=True)
+			path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{os.getpid()}-{next(_profile_seq)}.prof")
+			profiler.dump_stats(path)
+			logger.warning("Slow %s (%.0f ms); profile written to %s", name, elapsed_ms, path)
+	finally:
+		_profile_lock.release()
@@ -0,0 +1,156 @@
+"""Compact, pandas-free row storage for the knowledge bases.
+
+Rows are kept column-wise (one list or StringColumn per CSV column) and read
+through small `Row` views, so a corpus costs one Python object per cell at
+most and repeated values such as crop or source names share one string.
+"""
+import csv
+import io
+import math
+import sys
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# pandas' default markers for missing values, so both loaders agree on what is NaN
+NA_VALUES = frozenset([
+	"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+	"<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+# Low-cardinality columns whose values are interned and shared between rows
+INTERNED_COLUMNS = frozenset(["Crop", "Category", "Source", "Language Hint", "Nodal Ministry/Department", "Funding Structure"])
+
+
+def _intern(values: List) -> List:
+	return [sys.intern(v) if isinstance(v, str) else v for v in values]
+
+
+class StringColumn(Sequence):
+	"""Read-only column of optional strings stored as one UTF-8 blob plus row offsets.
+
+	Missing values read back as NaN, like they do in the source DataFrame.
+	"""
+
+	__slots__ = ("_data", "_offsets", "_null")
+
+	def __init__(self, data: np.ndarray, offsets: np.ndarray, null: np.ndarray):
+		self._data = data
+		self._offsets = offsets
+		self._null = null
+
+	def __len__(self) -> int:
+		return len(self._offsets) - 1
+
+	def __getitem__(self, i: int):
+		if self._null[i]:
+			return math.nan
+		return self._data[self._offsets[i]:self._offsets[i + 1]].tobytes().decode("utf-8")
+
+	def __iter__(self):
+		for i in range(len(self)):
+			yield self[i]
+
+	@staticmethod
+	def encode(values: Iterable) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+		blobs: List[bytes] = []
+		null: List[bool] = []
+		for value in values:
+			missing = value is None or (isinstance(value, float) and math.isnan(value))
+			null.append(missing)
+			blobs.append(b"" if missing else str(value).encode("utf-8"))
+		offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+		np.cumsum([len(b) for b in blobs], out=offsets[1:])
+		return np.frombuffer(b"".join(blobs), dtype=np.uint8), offsets, np.asarray(null, dtype=np.bool_)
+
+
+class Row:
+	"""Read-only view of one row; supports the `row.get(col, default)` access used by search results."""
+
+	__slots__ = ("_records", "_i")
+
+	def __init__(self, records: "ColumnRecords", i: int):
+		self._records = records
+		self._i = i
+
+	def get(self, col: str, default=None):
+		j = self._records.index.get(col)
+		return default if j is None else self._records.columns[j][self._i]
+
+	def __getitem__(self, col: str):
+		return self._records.columns[self._records.index[col]][self._i]
+
+	def to_dict(self) -> Dict:
+		return {name: column[self._i] for name, column in zip(self._records.names, self._records.columns)}
+
+
+class ColumnRecords(Sequence):
+	"""Table rows stored column-wise; indexing returns a `Row` view."""
+
+	__slots__ = ("names", "columns", "index", "_len")
+
+	def __init__(self, names: List[str], columns: List[Sequence]):
+		self.names = list(names)
+		self.columns = list(columns)
+		self.index = {name: j for j, name in enumerate(self.names)}
+		self._len = len(self.columns[0]) if self.columns else 0
+
+	@classmethod
+	def from_rows(cls, names: List[str], rows: Iterable[List]) -> "ColumnRecords":
+		columns: List[List] = [[] for _ in names]
+		for row in rows:
+			for j, column in enumerate(columns):
+				column.append(row[j] if j < len(row) else math.nan)
+		return cls(names, [_intern(c) if n in INTERNED_COLUMNS else c for n, c in zip(names, columns)])
+
+	@classmethod
+	def from_frame(cls, df) -> "ColumnRecords":
+		"""Convert a DataFrame once; nothing downstream needs pandas afterwards."""
+		names = [str(c) for c in df.columns]
+		columns = [df[c].tolist() for c in df.columns]
+		return cls(names, [_intern(c) if n in INTERNED_COLUMNS else c for n, c in zip(names, columns)])
+
+	def __len__(self) -> int:
+		return self._len
+
+	def __getitem__(self, i: int) -> Row:
+		if not -self._len <= i < self._len:
+			raise IndexError(i)
+		return Row(self, i % self._len)
+
+	def column(self, name: str) -> Optional[Sequence]:
+		j = self.index.get(name)
+		return None if j is None else self.columns[j]
+
+	def concat(self, other: "ColumnRecords") -> "ColumnRecords":
+		"""New records with `other`'s rows appended, keeping this table's columns."""
+		columns = []
+		for name, column in zip(self.names, self.columns):
+			extra = other.column(name)
+			columns.append(list(column) + (list(extra) if extra is not None else [math.nan] * len(other)))
+		return ColumnRecords(self.names, columns)
+
+
+def parse_csv_records(text: str, names: Optional[List[str]] = None) -> ColumnRecords:
+	"""Parse CSV text into ColumnRecords without pandas.
+
+	Mirrors the parts of `pd.read_csv` the knowledge bases rely on: blank header
+	cells become "Unnamed: <i>", header names are stripped, blank lines are
+	skipped, short rows are padded and pandas' NA markers become NaN. When
+	`names` is given the text has no header row (e.g. rows appended to a file).
+	"""
+	reader = csv.reader(io.StringIO(text, newline=""))
+	if names is None:
+		names = _csv_header(next(reader, []))
+	rows = ([math.nan if v in NA_VALUES else v for v in row] for row in reader if row)
+	return ColumnRecords.from_rows(names, rows)
+
+
+def _csv_header(header: List[str]) -> List[str]:
+	return [h.strip() or f"Unnamed: {i}" for i, h in enumerate(header)]
+
+
+def read_csv_records(path: str) -> ColumnRecords:
+	"""Read a CSV file into ColumnRecords without pandas (see `parse_csv_records`)."""
+	with open(path, newline="", encoding="utf-8-sig") as fh:
+		return parse_csv_records(fh.read())
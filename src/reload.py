@@ -0,0 +1,187 @@
+"""Hot reload of the data/raw knowledge bases.
+
+`LiveKnowledgeBase` owns the current `KnowledgeIndex` and polls the three CSVs.
+When one changes it rebuilds only that corpus - or, if rows were only
+appended, only the new rows - and then replaces the index reference in one
+assignment. Searches that already hold the old index finish against it.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .data_loader import PEST_FILE, QA_FILE, RAW_DATA_PATH, SCHEMES_FILE
+from .ingest import DEDUPE_COLUMNS, STREAM_MIN_BYTES, ingest_corpus
+from .records import parse_csv_records
+from .retrieval import PEST_COLUMNS, QA_COLUMNS, SCHEME_COLUMNS, Corpus, KnowledgeIndex
+from .suggest import SUGGEST_LIMIT
+
+logger = logging.getLogger(__name__)
+
+RELOAD_INTERVAL_S = float(os.environ.get("AGRI_RELOAD_INTERVAL", "30"))
+# Files modified more recently than this may still be mid-write; look again next poll
+SETTLE_S = 1.0
+# Files are hashed in blocks of this size, so fingerprinting never holds a whole CSV in memory
+HASH_BLOCK_BYTES = 1 << 20
+
+DATASETS = {
+	"schemes": (SCHEMES_FILE, SCHEME_COLUMNS),
+	"pests": (PEST_FILE, PEST_COLUMNS),
+	"qa": (QA_FILE, QA_COLUMNS),
+}
+
+
+class _Fingerprint:
+	__slots__ = ("size", "mtime_ns", "sha256", "ends_with_newline")
+
+	def __init__(self, size: int, mtime_ns: int, sha256: str, ends_with_newline: bool):
+		self.size = size
+		self.mtime_ns = mtime_ns
+		self.sha256 = sha256
+		self.ends_with_newline = ends_with_newline
+
+
+def _fingerprint(path: str, prefix_size: Optional[int] = None) -> Tuple[_Fingerprint, Optional[str]]:
+	"""Fingerprint of `path`, plus the hash of its first `prefix_size` bytes (None if it is shorter).
+
+	Comparing that prefix hash with the previous fingerprint tells whether
+	rows were only appended, without a second pass over the file.
+	"""
+	st = os.stat(path)
+	digest = hashlib.sha256()
+	prefix = None
+	size = 0
+	last = b""
+	with open(path, "rb") as fh:
+		for block in iter(lambda: fh.read(HASH_BLOCK_BYTES), b""):
+			if prefix_size is not None and prefix is None and size + len(block) >= prefix_size:
+				head = digest.copy()
+				head.update(block[:prefix_size - size])
+				prefix = head.hexdigest()
+			digest.update(block)
+			size += len(block)
+			last = block[-1:]
+	return _Fingerprint(size, st.st_mtime_ns, digest.hexdigest(), last == b"\n"), prefix
+
+
+class LiveKnowledgeBase:
+	"""The current KnowledgeIndex plus a watcher that swaps in a rebuilt one when the CSVs change."""
+
+	def __init__(self, index: Optional[KnowledgeIndex] = None, raw_path: str = RAW_DATA_PATH):
+		self.raw_path = raw_path
+		# Fingerprint before loading so an edit made during the load is seen by the first check
+		self._prints: Dict[str, Optional[_Fingerprint]] = {}
+		for kind, (name, _) in DATASETS.items():
+			try:
+				self._prints[kind] = _fingerprint(os.path.join(raw_path, name))[0]
+			except OSError:
+				self._prints[kind] = None
+		# Versions that failed to load; each one is logged once and not retried until the file changes again
+		self._failed: Dict[str, _Fingerprint] = {}
+		self._index = index if index is not None else KnowledgeIndex.load()
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self.reloads = 0
+
+	@property
+	def index(self) -> KnowledgeIndex:
+		return self._index
+
+	def search(self, query: str) -> Dict:
+		return self._index.search(query)
+
+	def suggest(self, prefix: str, limit: int = SUGGEST_LIMIT) -> List[Dict]:
+		return self._index.suggest(prefix, limit)
+
+	def known_answer(self, query: str) -> Optional[Dict]:
+		return self._index.known_answer(query)
+
+	def check(self) -> List[str]:
+		"""Rebuild the datasets whose CSV changed since the last check and swap them in.
+
+		Returns the names of the datasets that were reloaded. A file that is
+		missing or fails to parse keeps its last good version; each bad version
+		is logged once and only read again after the file changes.
+		"""
+		with self._lock:
+			index = self._index
+			corpora = {"schemes": index.schemes, "pests": index.pests, "qa": index.qa}
+			changed: List[str] = []
+			for kind, (name, columns) in DATASETS.items():
+				path = os.path.join(self.raw_path, name)
+				old = self._prints[kind]
+				try:
+					st = os.stat(path)
+				except OSError:
+					continue
+				failed = self._failed.get(kind)
+				if any(fp is not None and (st.st_size, st.st_mtime_ns) == (fp.size, fp.mtime_ns) for fp in (old, failed)):
+					continue
+				if time.time() - st.st_mtime < SETTLE_S:
+					continue
+				try:
+					new, head = _fingerprint(path, None if old is None else old.size)
+				except OSError:
+					# Replaced or removed while hashing; look again next poll
+					continue
+				if failed is not None and new.sha256 == failed.sha256:
+					self._failed[kind] = new
+					continue
+				if old is None or new.sha256 != old.sha256:
+					appended = old is not None and old.ends_with_newline and new.size > old.size and head == old.sha256
+					try:
+						corpora[kind] = self._rebuild(path, corpora[kind], columns, old if appended else None, new, kind)
+					except Exception:
+						logger.warning("Could not load %s (sha256 %s); keeping the last good version", name, new.sha256[:12], exc_info=True)
+						self._failed[kind] = new
+						continue
+					changed.append(kind)
+				self._prints[kind] = new
+				self._failed.pop(kind, None)
+			if changed:
+				self._index = KnowledgeIndex.from_corpora(corpora["schemes"], corpora["pests"], corpora["qa"])
+				self.reloads += 1
+				logger.info("Reloaded knowledge base: %s", ", ".join(changed))
+			return changed
+
+	@staticmethod
+	def _rebuild(path: str, corpus: Corpus, columns: List[str], appended_to: Optional[_Fingerprint], new: _Fingerprint, kind: str) -> Corpus:
+		"""Corpus for the file's `new` contents; when it only grew past `appended_to`, just the new bytes are read."""
+		if appended_to is not None:
+			with open(path, "rb") as fh:
+				header = fh.readline()
+				fh.seek(appended_to.size)
+				tail = fh.read(new.size - appended_to.size)
+			names = parse_csv_records(header.decode("utf-8-sig")).names
+			rows = parse_csv_records(tail.decode("utf-8"), names)
+			return corpus.extended(rows, new.sha256)
+		if new.size >= STREAM_MIN_BYTES:
+			return ingest_corpus(path, columns, DEDUPE_COLUMNS.get(kind))
+		with open(path, "rb") as fh:
+			data = fh.read(new.size)
+		return Corpus(parse_csv_records(data.decode("utf-8-sig")), columns, new.sha256)
+
+	def start(self, interval: float = RELOAD_INTERVAL_S) -> None:
+		"""Poll for changes every `interval` seconds on a daemon thread."""
+		if self._thread is not None:
+			return
+		self._stop.clear()
+
+		def loop() -> None:
+			while not self._stop.wait(interval):
+				try:
+					self.check()
+				except Exception:
+					logger.exception("Knowledge-base reload check failed")
+
+		self._thread = threading.Thread(target=loop, name="kb-reload", daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
@@ -1,121 +1,692 @@
-import re
-from typing import Dict, List, Tuple
-import pandas as pd
+import copy
+import hashlib
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 try:
+	import numpy as np
 	from rapidfuzz import fuzz as _rf_fuzz
+	from rapidfuzz import process as _rf_process
+	_HAS_RAPIDFUZZ = True
 	def _similarity(a: str, b: str) -> int:
 		return int(_rf_fuzz.token_set_ratio(a, b))
 except Exception:
-	from difflib import SequenceMatcher
+	_HAS_RAPIDFUZZ = False
 	def _similarity(a: str, b: str) -> int:
 		return int(SequenceMatcher(None, (a or "").lower(), (b or "").lower()).ratio() * 100)
-from .weather import get_weather_recommendation
+from . import deadline, metrics
+from .bm25 import BM25Index
+from .cache import TTLCache
+from .facets import FacetIndex, crop_names, pest_facets, qa_facets
+from .intent import INTENTS, best_intent, normalize_text, score_intents
+from .records import ColumnRecords, Row
+from .suggest import SUGGEST_LIMIT, SuggestIndex
+from .tfidf import TfidfIndex
+
+if TYPE_CHECKING:
+	import pandas as pd
 
 Intent = str
 
-INTENT_PATTERNS: List[Tuple[Intent, re.Pattern]] = [
-	("pest", re.compile(r"\b(pest|disease|insect|mite|borer|blight|rot|weevil|aphid|thrips|wilt|virus|fungus|fungal|bacteria|bacterial)\b", re.I)),
-	("scheme", re.compile(r"\b(scheme|subsidy|pm[- ]?kisan|pm[- ]?kusum|kcc|loan|support|grant|policy|benefit)\b", re.I)),
-	("weather", re.compile(r"\b(weather|rain|monsoon|flood|drought|hail|storm|wind|heat|temperature|forecast)\b", re.I)),
+
+def detect_intent(query: str) -> Intent:
+	"""Best-scoring intent of a query (see `src.intent`), or "general"."""
+	return best_intent(score_intents(query))
+
+
+PEST_COLUMNS = ["Crop", "Pest/Disease", "Symptoms", "Recommended Solution", "Source"]
+SCHEME_COLUMNS = ["Scheme Name", "Acronym", "Nodal Ministry/Department", "Primary Objective", "Key Features & Benefits", "Target Beneficiaries", "Funding Structure", "Official Link"]
+QA_COLUMNS = ["Query", "Category", "Answer", "Source"]
+
+# Corpus that answers each intent; "general" queries search all of them
+INTENT_SOURCES: Dict[Intent, str] = {"pest": "pests", "scheme": "schemes", "weather": "qa"}
+GENERAL_SOURCES = ("qa", "schemes", "pests")
+
+# Corpora at least this large are pre-filtered with BM25 before fuzzy reranking;
+# smaller ones are cheap enough to score exhaustively.
+BM25_MIN_DOCS = 2000
+BM25_CANDIDATES = 300
+
+# Repeated queries are answered from a result cache keyed by the normalized query,
+# its intent and the knowledge-base version. Set AGRI_RESULT_CACHE_SIZE=0 to disable.
+RESULT_CACHE_SIZE = int(os.environ.get("AGRI_RESULT_CACHE_SIZE", "2048"))
+RESULT_CACHE_TTL_S = float(os.environ.get("AGRI_RESULT_CACHE_TTL", "3600"))
+_result_cache = TTLCache(maxsize=max(RESULT_CACHE_SIZE, 1), ttl=RESULT_CACHE_TTL_S)
+
+# Upper bound on query x document cells scored in one cdist call by the batch API
+MATRIX_CELLS = 20_000_000
+# Threads used by fused_search to score knowledge bases concurrently; 1 scores them in turn with early stopping
+FUSED_WORKERS = int(os.environ.get("AGRI_FUSED_WORKERS", "1"))
+
+
+def _select_top(scores, top_k: int) -> List[Tuple[int, int]]:
+	"""Pick the best (score, row) pairs from a vector of integer scores, ties favouring earlier rows."""
+	if len(scores) > top_k:
+		cutoff = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+		ids = np.flatnonzero(scores >= cutoff).tolist()
+	else:
+		ids = list(range(len(scores)))
+	best = heapq.nlargest(top_k, ids, key=scores.__getitem__)
+	return [(int(scores[i]), i) for i in best]
+
+
+def _top_scores(query: str, docs: List[str], top_k: int, min_score: int = 0) -> List[Tuple[int, int]]:
+	"""Score every document against the query and return the best (score, row) pairs.
+
+	Ordering matches a stable descending sort on the integer score, so ties keep
+	the earlier row. Rows that cannot reach the current top-k, or `min_score`,
+	are skipped.
+	"""
+	if top_k <= 0 or not docs:
+		return []
+	query = query or ""
+	if _HAS_RAPIDFUZZ:
+		# With a cutoff rapidfuzz abandons hopeless rows early and reports them as 0
+		scores = np.floor(_rf_process.cdist([query], docs, scorer=_rf_fuzz.token_set_ratio, dtype=np.float64, score_cutoff=min_score or None)[0])
+		return [(score, i) for score, i in _select_top(scores, top_k) if score >= min_score]
+
+	# difflib fallback: the cheap upper bounds let us skip rows that cannot beat the heap floor
+	query = query.lower()
+	heap: List[Tuple[int, int]] = []
+	for i, doc in enumerate(docs):
+		matcher = SequenceMatcher(None, query, doc)
+		floor = heap[0][0] if len(heap) == top_k else min_score - 1
+		if int(matcher.real_quick_ratio() * 100) <= floor or int(matcher.quick_ratio() * 100) <= floor:
+			continue
+		score = int(matcher.ratio() * 100)
+		if score < min_score:
+			continue
+		if len(heap) < top_k:
+			heapq.heappush(heap, (score, -i))
+		elif score > heap[0][0]:
+			heapq.heapreplace(heap, (score, -i))
+	return [(score, -neg_i) for score, neg_i in sorted(heap, reverse=True)]
+
+
+def _top_scores_many(queries: List[str], docs: List[str], top_k: int, workers: int = -1) -> List[List[Tuple[int, int]]]:
+	"""Batch version of `_top_scores`: score queries x docs as one matrix on `workers` threads."""
+	if top_k <= 0 or not docs:
+		return [[] for _ in queries]
+	if not _HAS_RAPIDFUZZ:
+		return [_top_scores(q, docs, top_k) for q in queries]
+	step = max(1, MATRIX_CELLS // len(docs))
+	out: List[List[Tuple[int, int]]] = []
+	for start in range(0, len(queries), step):
+		chunk = [q or "" for q in queries[start:start + step]]
+		matrix = _rf_process.cdist(chunk, docs, scorer=_rf_fuzz.token_set_ratio, dtype=np.float64, workers=workers)
+		out.extend(_select_top(row, top_k) for row in np.floor(matrix))
+	return out
+
+
+class FuzzyEngine:
+	"""Pairwise fuzzy matching: rapidfuzz token_set_ratio, or difflib when rapidfuzz is missing.
+
+	Every document is compared with the query on its own, so large corpora are
+	narrowed with BM25 first (`prefilter`).
+	"""
+
+	prefilter = True
+
+	def __init__(self, docs: Sequence[str]):
+		self.docs = docs
+		self._match_cache: Optional[List[str]] = None
+
+	@property
+	def _match_docs(self) -> List[str]:
+		# Documents are compared in the same normalized form as queries (see `normalize_query`)
+		if self._match_cache is None:
+			self._match_cache = [normalize_text(d) for d in self.docs]
+		return self._match_cache
+
+	def _match_doc(self, i: int) -> str:
+		if self._match_cache is not None:
+			return self._match_cache[i]
+		return normalize_text(self.docs[i])
+
+	def top(self, query: str, top_k: int, min_score: int = 0, ids: Optional[Sequence[int]] = None) -> List[Tuple[int, int]]:
+		if ids is None:
+			return _top_scores(query, self._match_docs, top_k, min_score)
+		docs = [self._match_doc(i) for i in ids]
+		return [(score, ids[j]) for score, j in _top_scores(query, docs, top_k, min_score)]
+
+	def top_many(self, queries: List[str], top_k: int, workers: int = -1) -> List[List[Tuple[int, int]]]:
+		return _top_scores_many(queries, self._match_docs, top_k, workers)
+
+
+class TfidfEngine:
+	"""Character n-gram TF-IDF cosine similarity (see `src.tfidf`), NumPy only.
+
+	One sparse matrix-vector product scores the whole corpus, so there is no
+	BM25 prefilter.
+	"""
+
+	prefilter = False
+
+	def __init__(self, docs: Sequence[str]):
+		self.index = TfidfIndex(docs)
+
+	def top(self, query: str, top_k: int, min_score: int = 0, ids: Optional[Sequence[int]] = None) -> List[Tuple[int, int]]:
+		return self.index.top(query, top_k, min_score, ids)
+
+	def top_many(self, queries: List[str], top_k: int, workers: int = -1) -> List[List[Tuple[int, int]]]:
+		return [self.index.top(q, top_k) for q in queries]
+
+
+def _sharded_engine(docs: Sequence[str]):
+	# Imported on use: src.shards builds on FuzzyEngine
+	from .shards import ShardedEngine
+	return ShardedEngine(docs)
+
+
+# Scoring engines by name. An engine is built from a corpus' documents and
+# returns (score 0-100, doc id) pairs from `top`/`top_many`; `prefilter` says
+# whether large corpora should be narrowed with BM25 before calling it.
+ENGINES: Dict[str, Callable[[Sequence[str]], Any]] = {"fuzzy": FuzzyEngine, "tfidf": TfidfEngine, "sharded": _sharded_engine}
+RETRIEVAL_ENGINE = os.environ.get("AGRI_RETRIEVAL_ENGINE", "fuzzy")
+
+
+def _join_docs(records: ColumnRecords, text_columns: List[str]) -> List[str]:
+	columns = [records.column(col) or [""] * len(records) for col in text_columns]
+	return [" ".join([str(v) for v in values]) for values in zip(*columns)]
+
+
+class Corpus:
+	"""One knowledge base with its searchable text pre-joined per row.
+
+	Built once from a DataFrame or ColumnRecords so queries only pay for
+	scoring, not for row access and string building. `records` and `docs`
+	only need to be sequences, so a compiled artifact can back them with
+	memory-mapped columns (see `from_columns`).
+	"""
+
+	def __init__(self, data: "TableLike", text_columns: List[str], version: Optional[str] = None, engine: Optional[str] = None):
+		self.text_columns = list(text_columns)
+		if data is None:
+			data = ColumnRecords([], [])
+		elif not isinstance(data, ColumnRecords):
+			data = ColumnRecords.from_frame(data)
+		self.records: Sequence = data
+		self.docs: Sequence[str] = _join_docs(data, self.text_columns)
+		self.bm25 = BM25Index(self.docs) if len(self.docs) >= BM25_MIN_DOCS else None
+		self._facets: Optional[FacetIndex] = None
+		self._build_facets: Optional[Callable[[], FacetIndex]] = None
+		self.engine_name = engine or RETRIEVAL_ENGINE
+		self._engine = None
+		self._version = version
+
+	@classmethod
+	def from_columns(cls, text_columns: List[str], records: Sequence, docs: Sequence[str], bm25: Optional[BM25Index], version: Optional[str] = None, engine: Optional[str] = None) -> "Corpus":
+		"""Wrap prebuilt rows, joined documents and BM25 postings without recomputing anything."""
+		corpus = cls.__new__(cls)
+		corpus.text_columns = list(text_columns)
+		corpus.records = records
+		corpus.docs = docs
+		corpus.bm25 = bm25
+		corpus._facets = None
+		corpus._build_facets = None
+		corpus.engine_name = engine or RETRIEVAL_ENGINE
+		corpus._engine = None
+		corpus._version = version
+		return corpus
+
+	def with_facets(self, build: Callable[[], FacetIndex]) -> "Corpus":
+		"""Same corpus, but queries that mention a facet value only score the rows carrying it.
+
+		`build` runs on the first query rather than here, so wrapping a
+		memory-mapped corpus does not read every row at load.
+		"""
+		corpus = copy.copy(self)
+		corpus._facets = None
+		corpus._build_facets = build
+		return corpus
+
+	@property
+	def has_facets(self) -> bool:
+		return self._build_facets is not None
+
+	@property
+	def facets(self) -> Optional[FacetIndex]:
+		if self._facets is None and self._build_facets is not None:
+			self._facets = self._build_facets()
+		return self._facets
+
+	def extended(self, rows: ColumnRecords, version: Optional[str] = None) -> "Corpus":
+		"""New corpus with `rows` appended; only the new rows are joined and tokenized.
+
+		`self` is not modified, so searches already running against it are unaffected.
+		"""
+		new_docs = _join_docs(rows, self.text_columns)
+		docs = list(self.docs) + new_docs
+		if self.bm25 is not None:
+			bm25 = self.bm25.extended(new_docs)
+		else:
+			bm25 = BM25Index(docs) if len(docs) >= BM25_MIN_DOCS else None
+		return Corpus.from_columns(self.text_columns, self.records.concat(rows), docs, bm25, version, self.engine_name)
+
+	@property
+	def version(self) -> str:
+		"""Content hash of the searchable columns; changes whenever the knowledge base does."""
+		if self._version is None:
+			digest = hashlib.sha1()
+			for col in self.text_columns:
+				digest.update(col.encode("utf-8") + b"\x1e")
+				for value in self.records.column(col) or []:
+					digest.update(str(value).encode("utf-8") + b"\x1f")
+			self._version = digest.hexdigest()
+		return self._version
+
+	def __len__(self) -> int:
+		return len(self.records)
+
+	@property
+	def engine(self):
+		"""The scoring engine (see ENGINES), built on first use."""
+		if self._engine is None:
+			factory = ENGINES.get(self.engine_name)
+			if factory is None:
+				raise ValueError(f"unknown retrieval engine {self.engine_name!r}; choose from {sorted(ENGINES)}")
+			self._engine = factory(self.docs)
+		return self._engine
+
+	def _candidates(self, query: str, top_k: int) -> Optional[List[int]]:
+		"""Ascending row ids worth scoring for the query, or None for every row."""
+		ids = self.facets.candidates(query, top_k) if self.facets is not None else None
+		if self.bm25 is None or not self.engine.prefilter or (ids is not None and len(ids) <= BM25_CANDIDATES):
+			return ids
+		found = self.bm25.candidates(query, max(BM25_CANDIDATES, top_k), ids)
+		# No shared token (typos, transliteration): leave it to the typo-tolerant scorer over the facet rows or everything
+		return found or ids
+
+	def top(self, query: str, top_k: int = 3, min_score: int = 0) -> List[Tuple[int, Row]]:
+		"""Best `top_k` rows for the query, leaving out rows that score below `min_score`."""
+		# Candidate ids are ascending, so ties still favour earlier rows
+		query = normalize_query(query)
+		ids = self._candidates(query, top_k)
+		return [(score, self.records[i]) for score, i in self.engine.top(query, top_k, min_score, ids)]
+
+	def top_many(self, queries: List[str], top_k: int = 3, workers: int = -1) -> List[List[Tuple[int, Row]]]:
+		"""`top` for many queries on `workers` threads (-1: one per CPU).
+
+		Queries that score every row share one matrix. Queries narrowed to
+		candidate rows (BM25 or facets) each have their own candidate set, so
+		they are scored one per thread; fuzzy scoring releases the GIL.
+		"""
+		queries = [normalize_query(q) for q in queries]
+		out: List[Optional[List[Tuple[int, Row]]]] = [None] * len(queries)
+		full: List[int] = []
+		narrowed: List[Tuple[int, List[int]]] = []
+		for n, query in enumerate(queries):
+			ids = self._candidates(query, top_k)
+			if ids is None:
+				full.append(n)
+			else:
+				narrowed.append((n, ids))
+		best_full = self.engine.top_many([queries[n] for n in full], top_k, workers) if full else []
+		for n, best in zip(full, best_full):
+			out[n] = [(score, self.records[i]) for score, i in best]
+
+		def score(item: Tuple[int, List[int]]) -> Tuple[int, List[Tuple[int, int]]]:
+			n, ids = item
+			return n, self.engine.top(queries[n], top_k, 0, ids)
+
+		threads = min(len(narrowed), (os.cpu_count() or 1) if workers < 0 else max(1, workers))
+		if threads > 1:
+			with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="top-many") as pool:
+				scored = list(pool.map(score, narrowed))
+		else:
+			scored = [score(item) for item in narrowed]
+		for n, best in scored:
+			out[n] = [(s, self.records[i]) for s, i in best]
+		return out
+
+
+TableLike = Union["pd.DataFrame", ColumnRecords]
+CorpusLike = Union["pd.DataFrame", ColumnRecords, Corpus]
+
+
+def _as_corpus(data: CorpusLike, text_columns: List[str]) -> Corpus:
+	return data if isinstance(data, Corpus) else Corpus(data, text_columns)
+
+
+def _pest_result(score: int, row: Row) -> Dict:
+	return {
+		"type": "pest",
+		"score": float(score),
+		"crop": row.get("Crop", ""),
+		"name": row.get("Pest/Disease", ""),
+		"symptoms": row.get("Symptoms", ""),
+		"solution": row.get("Recommended Solution", ""),
+		"source": row.get("Source", ""),
+	}
+
+
+def _scheme_result(score: int, row: Row) -> Dict:
+	return {
+		"type": "scheme",
+		"score": float(score),
+		"scheme": row.get("Scheme Name", ""),
+		"acronym": row.get("Acronym", ""),
+		"objective": row.get("Primary Objective", ""),
+		"benefits": row.get("Key Features & Benefits", ""),
+		"beneficiaries": row.get("Target Beneficiaries", ""),
+		"funding": row.get("Funding Structure", ""),
+		"link": row.get("Official Link", ""),
+	}
+
+
+def _qa_result(score: int, row: Row) -> Dict:
+	return {
+		"type": "qa",
+		"score": float(score),
+		"query": row.get("Query", ""),
+		"category": row.get("Category", ""),
+		"answer": row.get("Answer", ""),
+		"source": row.get("Source", ""),
+	}
+
+
+# Searchable columns and result builder of each knowledge base, by source name
+SOURCES: Dict[str, Tuple[List[str], Callable[[int, Row], Dict]]] = {
+	"schemes": (SCHEME_COLUMNS, _scheme_result),
+	"pests": (PEST_COLUMNS, _pest_result),
+	"qa": (QA_COLUMNS, _qa_result),
+}
+
+# Columns offered as autocomplete suggestions: (source, column, suggestion kind)
+SUGGEST_FIELDS = [
+	("qa", "Query", "question"),
+	("pests", "Crop", "crop"),
+	("pests", "Pest/Disease", "pest"),
+	("schemes", "Acronym", "scheme"),
+	("schemes", "Scheme Name", "scheme"),
 ]
+# Suggestion kinds a pick is answered from directly, and the source holding their row
+KNOWN_ANSWER_SOURCES = {"question": "qa", "pest": "pests", "scheme": "schemes"}
 
 
-def detect_intent(query: str) -> Intent:
-	for intent, pattern in INTENT_PATTERNS:
-		if pattern.search(query or ""):
-			return intent
-	return "general"
-
-
-def search_pests(df_pests: pd.DataFrame, query: str, top_k: int = 3) -> List[Dict]:
-	candidates = []
-	for _, row in df_pests.iterrows():
-		text = " ".join([str(row.get(col, "")) for col in ["Crop", "Pest/Disease", "Symptoms", "Recommended Solution", "Source", "Language Hint"]])
-		score = _similarity(query, text)
-		candidates.append((score, row))
-	candidates.sort(key=lambda x: x[0], reverse=True)
-	results: List[Dict] = []
-	for score, row in candidates[:top_k]:
-		results.append({
-			"type": "pest",
-			"score": float(score),
-			"crop": row.get("Crop", ""),
-			"name": row.get("Pest/Disease", ""),
-			"symptoms": row.get("Symptoms", ""),
-			"solution": row.get("Recommended Solution", ""),
-			"source": row.get("Source", ""),
-		})
-	return results
-
-
-def search_schemes(df_schemes: pd.DataFrame, query: str, top_k: int = 3) -> List[Dict]:
-	candidates = []
-	for _, row in df_schemes.iterrows():
-		text = " ".join([str(row.get(col, "")) for col in ["Scheme Name", "Acronym", "Nodal Ministry/Department", "Primary Objective", "Key Features & Benefits", "Target Beneficiaries", "Funding Structure", "Official Link"]])
-		score = _similarity(query, text)
-		candidates.append((score, row))
-	candidates.sort(key=lambda x: x[0], reverse=True)
-	results: List[Dict] = []
-	for score, row in candidates[:top_k]:
-		results.append({
-			"type": "scheme",
-			"score": float(score),
-			"scheme": row.get("Scheme Name", ""),
-			"acronym": row.get("Acronym", ""),
-			"objective": row.get("Primary Objective", ""),
-			"benefits": row.get("Key Features & Benefits", ""),
-			"beneficiaries": row.get("Target Beneficiaries", ""),
-			"funding": row.get("Funding Structure", ""),
-			"link": row.get("Official Link", ""),
-		})
-	return results
-
-
-def search_qa(df_qa: pd.DataFrame, query: str, top_k: int = 3) -> List[Dict]:
-	candidates = []
-	for _, row in df_qa.iterrows():
-		text = " ".join([str(row.get(col, "")) for col in ["Query", "Category", "Answer", "Source"]])
-		score = _similarity(query, text)
-		candidates.append((score, row))
-	candidates.sort(key=lambda x: x[0], reverse=True)
-	results: List[Dict] = []
-	for score, row in candidates[:top_k]:
-		results.append({
-			"type": "qa",
-			"score": float(score),
-			"query": row.get("Query", ""),
-			"category": row.get("Category", ""),
-			"answer": row.get("Answer", ""),
-			"source": row.get("Source", ""),
-		})
-	return results
-
-
-def route_and_search(df_schemes: pd.DataFrame, df_pests: pd.DataFrame, df_qa: pd.DataFrame, query: str) -> Dict:
-	intent = detect_intent(query)
-	if intent == "pest":
-		results = search_pests(df_pests, query)
-	elif intent == "scheme":
-		results = search_schemes(df_schemes, query)
-	elif intent == "weather":
-		# For weather-related queries, let the UI pass a location using a simple marker syntax like
-		# "weather: <location>" e.g., "weather: Pune". If not provided, just return generic weather Q&A results.
-		location = None
-		if ":" in (query or ""):
-			parts = query.split(":", 1)
-			if parts and len(parts) == 2:
-				location = parts[1].strip()
+def _timed_top(name: str, corpus: Corpus, query: str, top_k: int, min_score: int = 0) -> List[Tuple[int, Row]]:
+	with metrics.span("search_" + name):
+		return corpus.top(query, top_k, min_score)
+
+
+def fused_search(corpora: List[Tuple[str, CorpusLike]], query: str, top_k: int = 3, workers: int = FUSED_WORKERS) -> List[Dict]:
+	"""Global top-k over several knowledge bases searched as one logical corpus.
+
+	`corpora` is a list of (source name, table) pairs. Every source is scored
+	with the same 0-100 fuzzy scorer, so scores are already comparable and
+	share one bounded heap. Ties favour earlier sources, then earlier rows - the
+	same order as stably sorting the concatenated per-source results.
+
+	Sources are scored smallest first, and each later one only considers rows
+	that can still enter the heap; a source is skipped outright once the heap
+	holds `top_k` perfect scores that would win ties against it. With
+	`workers` > 1 the sources are instead scored concurrently on threads, without
+	the cross-source cutoff. Once the request deadline (see `src.deadline`) has
+	passed, remaining sources are skipped if there is already something to return.
+	"""
+	if top_k <= 0:
+		return []
+	prepared = [(pos, name, _as_corpus(table, SOURCES[name][0]), SOURCES[name][1]) for pos, (name, table) in enumerate(corpora)]
+	# Min-heap of (score, -source position, -rank within source, result)
+	heap: List[Tuple[int, int, int, Dict]] = []
+
+	def offer(pos: int, found: List[Tuple[int, Row]], build: Callable[[int, Row], Dict]) -> None:
+		for rank, (score, row) in enumerate(found):
+			key = (score, -pos, -rank)
+			if len(heap) < top_k:
+				heapq.heappush(heap, key + (build(score, row),))
+			elif key > heap[0][:3]:
+				heapq.heapreplace(heap, key + (build(score, row),))
+			else:
+				# Later rows of this source rank lower still
+				break
+
+	if workers > 1 and len(prepared) > 1:
+		with ThreadPoolExecutor(max_workers=min(workers, len(prepared))) as pool:
+			futures = [(pos, pool.submit(_timed_top, name, corpus, query, top_k), build) for pos, name, corpus, build in prepared]
+			for pos, future, build in futures:
+				offer(pos, future.result(), build)
+	else:
+		for pos, name, corpus, build in sorted(prepared, key=lambda p: len(p[2])):
+			if heap and deadline.expired():
+				# Out of time: answer from the sources scored so far
+				break
+			if len(heap) == top_k:
+				if heap[0][:2] >= (100, -pos):
+					continue
+				found = _timed_top(name, corpus, query, top_k, heap[0][0])
+			else:
+				found = _timed_top(name, corpus, query, top_k)
+			offer(pos, found, build)
+	return [entry[3] for entry in sorted(heap, reverse=True)]
+
+
+def search_pests(df_pests: CorpusLike, query: str, top_k: int = 3) -> List[Dict]:
+	corpus = _as_corpus(df_pests, PEST_COLUMNS)
+	return [_pest_result(score, row) for score, row in corpus.top(query, top_k)]
+
+
+def search_schemes(df_schemes: CorpusLike, query: str, top_k: int = 3) -> List[Dict]:
+	corpus = _as_corpus(df_schemes, SCHEME_COLUMNS)
+	return [_scheme_result(score, row) for score, row in corpus.top(query, top_k)]
+
+
+def search_qa(df_qa: CorpusLike, query: str, top_k: int = 3) -> List[Dict]:
+	corpus = _as_corpus(df_qa, QA_COLUMNS)
+	return [_qa_result(score, row) for score, row in corpus.top(query, top_k)]
+
+
+def _weather_location(query: str) -> Optional[str]:
+	# For weather-related queries, let the UI pass a location using a simple marker syntax like
+	# "weather: <location>" e.g., "weather: Pune". If not provided, just return generic weather Q&A results.
+	location = None
+	if ":" in (query or ""):
+		parts = query.split(":", 1)
+		if parts and len(parts) == 2:
+			location = parts[1].strip()
+	return location
+
+
+def normalize_query(query: str) -> str:
+	"""Case-, whitespace- and punctuation-insensitive form of a query.
+
+	Routing and scoring only ever see this form, so it is also the result cache key.
+	"""
+	return normalize_text(query or "")
+
+
+def route_query(query: str) -> Tuple[Intent, Tuple[str, ...]]:
+	"""The intent of a query plus the corpora to search, best-matching intent first.
+
+	A query that hits keywords of several intents (e.g. a pest and a subsidy)
+	searches each of their corpora and merges the results; one that hits none
+	searches all three.
+	"""
+	with metrics.span("detect_intent"):
+		scores = score_intents(normalize_query(query))
+		intent = best_intent(scores)
+	if intent == "general":
+		return intent, GENERAL_SOURCES
+	# sorted() is stable, so intents with equal scores keep their INTENTS order
+	ranked = sorted((i for i in INTENTS if scores[i] > 0), key=lambda i: -scores[i])
+	return intent, tuple(dict.fromkeys(INTENT_SOURCES[i] for i in ranked))
+
+
+def _result_key(route: Tuple[Intent, Tuple[str, ...]], query: str, schemes: CorpusLike, pests: CorpusLike, qa: CorpusLike) -> Optional[Tuple]:
+	"""Cache key for a query, or None when its results must not be cached.
+
+	Only prebuilt corpora are cached (a DataFrame may change between calls), and
+	weather lookups for a location are left to the weather module's own caches.
+	"""
+	if RESULT_CACHE_SIZE <= 0 or not all(isinstance(c, Corpus) for c in (schemes, pests, qa)):
+		return None
+	if route[0] == "weather" and _weather_location(query):
+		return None
+	corpora = tuple((c.version, c.has_facets, c.engine_name) for c in (schemes, pests, qa))
+	return (corpora, route, normalize_query(query))
+
+
+def _frozen(results: List[Dict]) -> Tuple[Dict, ...]:
+	# The cache keeps its own copies, so callers may change the dicts they get back
+	return tuple(dict(r) for r in results)
+
+
+def result_cache_stats() -> Dict[str, int]:
+	"""Hit, miss and eviction counters of the route_and_search result cache."""
+	return _result_cache.stats()
+
+
+def clear_result_cache() -> None:
+	_result_cache.clear()
+
+
+def route_and_search(df_schemes: CorpusLike, df_pests: CorpusLike, df_qa: CorpusLike, query: str) -> Dict:
+	route = route_query(query)
+	intent = route[0]
+	key = _result_key(route, query, df_schemes, df_pests, df_qa)
+	if key is not None:
+		cached = _result_cache.get(key)
+		if cached is not None:
+			return {"intent": intent, "results": [dict(r) for r in cached]}
+	results = _search_route(df_schemes, df_pests, df_qa, route, query)
+	# Results cut short by the request deadline are not worth keeping
+	if key is not None and not deadline.expired():
+		_result_cache.set(key, _frozen(results))
+	return {"intent": intent, "results": list(results)}
+
+
+def _search_route(df_schemes: CorpusLike, df_pests: CorpusLike, df_qa: CorpusLike, route: Tuple[Intent, Tuple[str, ...]], query: str) -> List[Dict]:
+	intent, sources = route
+	if intent == "weather":
+		location = _weather_location(query)
 		if location:
 			try:
-				rec = get_weather_recommendation(location)
-				results = [rec]
+				from .weather import get_weather_recommendation
+				return [get_weather_recommendation(location)]
 			except Exception:
-				results = search_qa(df_qa, query)
+				pass
+	tables = {"schemes": df_schemes, "pests": df_pests, "qa": df_qa}
+	return fused_search([(source, tables[source]) for source in sources], query)
+
+
+def route_and_search_many(df_schemes: CorpusLike, df_pests: CorpusLike, df_qa: CorpusLike, queries: List[str], workers: int = -1) -> List[Dict]:
+	"""Answer many queries at once; returns the same dicts as `route_and_search`, in input order.
+
+	Queries are grouped by the corpora they route to and each group is scored
+	against each corpus as one query x document matrix spread over `workers`
+	threads (-1 = all cores).
+	"""
+	schemes = _as_corpus(df_schemes, SCHEME_COLUMNS)
+	pests = _as_corpus(df_pests, PEST_COLUMNS)
+	qa = _as_corpus(df_qa, QA_COLUMNS)
+	corpora = {"schemes": schemes, "pests": pests, "qa": qa}
+
+	groups: Dict[Tuple[str, ...], List[int]] = {}
+	intents: List[Intent] = [""] * len(queries)
+	keys: List[Optional[Tuple]] = [None] * len(queries)
+	out: List[Optional[Dict]] = [None] * len(queries)
+	for i, query in enumerate(queries):
+		route = route_query(query)
+		intents[i] = route[0]
+		if route[0] == "weather" and _weather_location(query):
+			# Live forecast lookups are not batchable; keep the single-query path
+			out[i] = route_and_search(schemes, pests, qa, query)
+			continue
+		keys[i] = _result_key(route, query, schemes, pests, qa)
+		cached = _result_cache.get(keys[i]) if keys[i] is not None else None
+		if cached is not None:
+			out[i] = {"intent": route[0], "results": [dict(r) for r in cached]}
 		else:
-			results = search_qa(df_qa, query)
-	else:
-		qa = search_qa(df_qa, query)
-		schemes = search_schemes(df_schemes, query)
-		pests = search_pests(df_pests, query)
-		results = sorted(qa + schemes + pests, key=lambda x: x["score"], reverse=True)[:3]
-	return {"intent": intent, "results": results}
+			groups.setdefault(route[1], []).append(i)
+
+	def batch(source: str, ids: List[int]) -> List[List[Dict]]:
+		corpus, build = corpora[source], SOURCES[source][1]
+		found = corpus.top_many([queries[i] for i in ids], 3, workers)
+		return [[build(score, row) for score, row in best] for best in found]
+
+	for sources, ids in groups.items():
+		per_source = [batch(source, ids) for source in sources]
+		for n, i in enumerate(ids):
+			results = sorted([r for found in per_source for r in found[n]], key=lambda x: x["score"], reverse=True)[:3]
+			if keys[i] is not None:
+				_result_cache.set(keys[i], _frozen(results))
+			out[i] = {"intent": intents[i], "results": list(results)}
+	return out
+
+
+class KnowledgeIndex:
+	"""All three knowledge bases prepared for retrieval. Build once and reuse across queries."""
+
+	def __init__(self, df_schemes: TableLike, df_pests: TableLike, df_qa: TableLike, engine: Optional[str] = None):
+		self._set_corpora(
+			Corpus(df_schemes, SCHEME_COLUMNS, engine=engine),
+			Corpus(df_pests, PEST_COLUMNS, engine=engine),
+			Corpus(df_qa, QA_COLUMNS, engine=engine),
+		)
+
+	@classmethod
+	def from_corpora(cls, schemes: Corpus, pests: Corpus, qa: Corpus) -> "KnowledgeIndex":
+		index = cls.__new__(cls)
+		index._set_corpora(schemes, pests, qa)
+		return index
+
+	def _set_corpora(self, schemes: Corpus, pests: Corpus, qa: Corpus) -> None:
+		# Facets are rebuilt from the current rows on first use; Q&A crops are the crops of the pest knowledge base
+		self.schemes = schemes
+		self.pests = pests.with_facets(lambda: pest_facets(pests.records))
+		self.qa = qa.with_facets(lambda: qa_facets(qa.records, crop_names(pests.records.column("Crop") or [])))
+		self._suggestions: Optional[SuggestIndex] = None
+
+	@classmethod
+	def load(cls) -> "KnowledgeIndex":
+		"""Load the compiled knowledge-base artifact, or build from the CSVs in data/raw if it is missing or stale.
+
+		CSVs of AGRI_STREAM_MIN_BYTES or more are streamed in chunks (see `src.ingest`).
+		"""
+		from .kb_artifact import load_artifact
+		index = load_artifact()
+		if index is not None:
+			return index
+		from .ingest import load_corpora
+		return cls.from_corpora(*load_corpora())
+
+	def search(self, query: str) -> Dict:
+		return route_and_search(self.schemes, self.pests, self.qa, query)
+
+	def search_many(self, queries: List[str], workers: int = -1) -> List[Dict]:
+		return route_and_search_many(self.schemes, self.pests, self.qa, queries, workers)
+
+	@property
+	def suggestions(self) -> SuggestIndex:
+		"""Prefix index over SUGGEST_FIELDS, built on first use."""
+		if self._suggestions is None:
+			corpora = {"schemes": self.schemes, "pests": self.pests, "qa": self.qa}
+			self._suggestions = SuggestIndex(
+				(text, kind, row)
+				for source, column, kind in SUGGEST_FIELDS
+				for row, text in enumerate(corpora[source].records.column(column) or [])
+			)
+		return self._suggestions
+
+	def suggest(self, prefix: str, limit: int = SUGGEST_LIMIT) -> List[Dict]:
+		return self.suggestions.suggest(prefix, limit)
+
+	def known_answer(self, query: str) -> Optional[Dict]:
+		"""The stored answer of a picked suggestion that is exactly a known question, pest or scheme.
+
+		Only meant for queries the user picked from `suggest`; typed queries
+		always go through `search`. Returns None for anything else (including
+		crop names and weather lookups).
+		"""
+		if _weather_location(query) and detect_intent(query) == "weather":
+			return None
+		hit = self.suggestions.exact(query, KNOWN_ANSWER_SOURCES)
+		if hit is None:
+			return None
+		kind, row = hit
+		source = KNOWN_ANSWER_SOURCES[kind]
+		corpus = {"schemes": self.schemes, "pests": self.pests, "qa": self.qa}[source]
+		intent = detect_intent(query) if kind == "question" else kind
+		return {"intent": intent, "results": [SOURCES[source][1](100, corpus.records[row])]}
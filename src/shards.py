@@ -0,0 +1,136 @@
+"""Sharded multi-process scoring for very large knowledge bases.
+
+`ShardedEngine` (AGRI_RETRIEVAL_ENGINE=sharded) copies a corpus' joined
+documents once into a shared-memory block and starts one worker process per
+shard (AGRI_SHARDS, default: CPU count). A worker maps the block, decodes
+only its own slice of rows and fuzzy-scores it; the parent merges the
+per-shard top-k lists. Rows are compared pairwise, so the merged result is
+exactly what one process scoring every row would return, ties included, and
+no BM25 prefilter is needed.
+
+Corpora smaller than SHARD_MIN_DOCS rows per shard are scored in-process.
+Workers are spawned, so scripts that search with this engine need the usual
+`if __name__ == "__main__":` guard (the app, the API and the benchmarks have it).
+"""
+import heapq
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .records import StringColumn
+from .retrieval import FuzzyEngine
+
+SHARDS = int(os.environ.get("AGRI_SHARDS", str(os.cpu_count() or 1)))
+# A shard smaller than this is not worth a process round trip
+SHARD_MIN_DOCS = int(os.environ.get("AGRI_SHARD_MIN_DOCS", "10000"))
+# "spawn" never inherits the parent's threads or locks; "forkserver" starts workers faster
+SHARD_START_METHOD = os.environ.get("AGRI_SHARD_START_METHOD", "spawn")
+
+# Worker process state: the mapped block, the first row of this shard and its engine
+_block: Optional[shared_memory.SharedMemory] = None
+_first = 0
+_engine: Optional[FuzzyEngine] = None
+
+
+def _init_shard(name: str, count: int, first: int, last: int) -> None:
+	global _block, _first, _engine
+	# Workers share the parent's resource tracker, which unlinks the block only if the parent leaks it
+	_block = shared_memory.SharedMemory(name=name)
+	offsets = np.frombuffer(_block.buf, dtype=np.int64, count=count + 1)
+	data = np.frombuffer(_block.buf, dtype=np.uint8, offset=offsets.nbytes)
+	docs = StringColumn(data, offsets[first:last + 1], np.zeros(last - first, dtype=np.bool_))
+	_first = first
+	_engine = FuzzyEngine(docs)
+	_engine._match_docs  # decode this shard's rows now rather than on the first query
+
+
+def _ready() -> bool:
+	return _engine is not None
+
+
+def _shard_top(query: str, top_k: int, min_score: int, ids: Optional[List[int]]) -> List[Tuple[int, int]]:
+	local = None if ids is None else [i - _first for i in ids]
+	return [(score, _first + i) for score, i in _engine.top(query, top_k, min_score, local)]
+
+
+def _shard_top_many(queries: List[str], top_k: int) -> List[List[Tuple[int, int]]]:
+	return [[(score, _first + i) for score, i in best] for best in _engine.top_many(queries, top_k, 1)]
+
+
+def _merge(parts: List[List[Tuple[int, int]]], top_k: int) -> List[Tuple[int, int]]:
+	# Each part is already ordered best first, ties by row; keep that order across shards
+	return heapq.nsmallest(top_k, (pair for part in parts for pair in part), key=lambda p: (-p[0], p[1]))
+
+
+def _close(pools: List[ProcessPoolExecutor], block: shared_memory.SharedMemory) -> None:
+	for pool in pools:
+		pool.shutdown(wait=False, cancel_futures=True)
+	block.close()
+	block.unlink()
+
+
+def _share(docs: Sequence[str]) -> Tuple[shared_memory.SharedMemory, int]:
+	"""Copy the documents into a new shared-memory block laid out as int64 offsets then UTF-8 data."""
+	if isinstance(docs, StringColumn) and docs._offsets[0] == 0:
+		data, offsets = docs._data, docs._offsets
+	else:
+		data, offsets, _ = StringColumn.encode(docs)
+	block = shared_memory.SharedMemory(create=True, size=max(1, offsets.nbytes + data.nbytes))
+	np.frombuffer(block.buf, dtype=np.int64, count=len(offsets))[:] = offsets
+	np.frombuffer(block.buf, dtype=np.uint8, count=len(data), offset=offsets.nbytes)[:] = data
+	return block, len(offsets) - 1
+
+
+class ShardedEngine:
+	"""Fuzzy scoring of every row, split over `shards` worker processes sharing one copy of the documents."""
+
+	prefilter = False
+
+	def __init__(self, docs: Sequence[str], shards: int = SHARDS):
+		self.shards = max(1, min(shards, len(docs) // max(1, SHARD_MIN_DOCS)))
+		self._pools: List[ProcessPoolExecutor] = []
+		if self.shards == 1:
+			self._local: Optional[FuzzyEngine] = FuzzyEngine(docs)
+			return
+		self._local = None
+		block, count = _share(docs)
+		step = -(-count // self.shards)
+		self.bounds = [(lo, min(lo + step, count)) for lo in range(0, count, step)]
+		context = multiprocessing.get_context(SHARD_START_METHOD)
+		for first, last in self.bounds:
+			pool = ProcessPoolExecutor(1, context, initializer=_init_shard, initargs=(block.name, count, first, last))
+			# Start every worker now, in parallel, instead of on the first query
+			pool.submit(_ready)
+			self._pools.append(pool)
+		weakref.finalize(self, _close, self._pools, block)
+
+	def _split(self, ids: Sequence[int]) -> List[Optional[List[int]]]:
+		# Candidate ids are ascending, so each shard's share is one slice
+		ids = np.asarray(ids, dtype=np.int64)
+		cuts = np.searchsorted(ids, [last for _, last in self.bounds])
+		parts, start = [], 0
+		for stop in cuts:
+			parts.append(ids[start:stop].tolist() if stop > start else None)
+			start = stop
+		return parts
+
+	def top(self, query: str, top_k: int, min_score: int = 0, ids: Optional[Sequence[int]] = None) -> List[Tuple[int, int]]:
+		if self._local is not None:
+			return self._local.top(query, top_k, min_score, ids)
+		if ids is None:
+			futures = [pool.submit(_shard_top, query, top_k, min_score, None) for pool in self._pools]
+		else:
+			futures = [pool.submit(_shard_top, query, top_k, min_score, part) for pool, part in zip(self._pools, self._split(ids)) if part]
+		return _merge([future.result() for future in futures], top_k)
+
+	def top_many(self, queries: List[str], top_k: int, workers: int = -1) -> List[List[Tuple[int, int]]]:
+		if self._local is not None:
+			return self._local.top_many(queries, top_k, workers)
+		futures = [pool.submit(_shard_top_many, queries, top_k) for pool in self._pools]
+		per_shard = [future.result() for future in futures]
+		return [_merge([shard[n] for shard in per_shard], top_k) for n in range(len(queries))]
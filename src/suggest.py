@@ -0,0 +1,141 @@
+"""Autocomplete over known questions and entity names.
+
+`SuggestIndex` keeps the normalized entries in one sorted list, so the
+entries starting with a typed prefix are a contiguous range found with two
+binary searches. When nothing starts with the prefix, it allows one edit
+(substitution, insertion, deletion or transposition) at the first character
+that no entry continues with, trying only the characters that entries really
+have there. A lookup is a few dozen bisections whatever the index size,
+cheap enough to run on every keystroke.
+"""
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .intent import normalize_text
+from .records import StringColumn
+
+SUGGEST_LIMIT = 5
+# Entries looked at per prefix range; ranking only reorders these
+SCAN_LIMIT = 64
+# Kinds in suggestion order when otherwise tied: short entity names before whole questions
+KINDS = ("crop", "pest", "scheme", "question")
+_KIND_RANK = {kind: i for i, kind in enumerate(KINDS)}
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def suggest_key(text: str) -> str:
+	"""Lowercase, punctuation-free, single-spaced form of `text` that prefixes are matched against."""
+	return normalize_text(text)
+
+
+class SuggestIndex:
+	"""Sorted prefix index of (text, kind, row) entries.
+
+	Entries with the same key and kind are stored once; their row becomes -1
+	when the texts came from different rows, since a pick can then not be
+	answered from a single row.
+	"""
+
+	def __init__(self, entries: Iterable[Tuple[str, str, int]]):
+		items: Dict[Tuple[str, str], Tuple[str, int]] = {}
+		for text, kind, row in entries:
+			if not isinstance(text, str):
+				continue
+			key = suggest_key(text)
+			if not key:
+				continue
+			seen = items.get((key, kind))
+			if seen is None:
+				items[(key, kind)] = (text.strip(), row)
+			elif seen[1] != row:
+				items[(key, kind)] = (seen[0], -1)
+		order = sorted(items, key=lambda k: (k[0], _KIND_RANK[k[1]]))
+		self.keys: List[str] = [key for key, _ in order]
+		self.kinds = np.asarray([_KIND_RANK[kind] for _, kind in order], dtype=np.uint8)
+		self.rows = np.asarray([items[k][1] for k in order], dtype=np.int64)
+		self.texts = StringColumn(*StringColumn.encode(items[k][0] for k in order))
+
+	def __len__(self) -> int:
+		return len(self.keys)
+
+	def _range(self, prefix: str) -> Tuple[int, int]:
+		lo = bisect.bisect_left(self.keys, prefix)
+		if lo == len(self.keys) or not self.keys[lo].startswith(prefix):
+			return lo, lo
+		return lo, bisect.bisect_left(self.keys, prefix + _MAX_CHAR, lo)
+
+	def _has_prefix(self, prefix: str) -> bool:
+		lo = bisect.bisect_left(self.keys, prefix)
+		return lo < len(self.keys) and self.keys[lo].startswith(prefix)
+
+	def _next_chars(self, prefix: str) -> List[str]:
+		"""Distinct characters that follow `prefix` in some entry, one bisection each."""
+		lo, hi = self._range(prefix)
+		n = len(prefix)
+		chars = []
+		while lo < hi:
+			key = self.keys[lo]
+			if len(key) == n:
+				lo += 1
+				continue
+			chars.append(key[n])
+			lo = bisect.bisect_left(self.keys, prefix + chr(ord(key[n]) + 1), lo, hi)
+		return chars
+
+	def _fuzzy_prefixes(self, prefix: str) -> List[str]:
+		"""Prefixes one edit away from `prefix` that some entry starts with."""
+		# Longest leading part of the prefix that entries still continue
+		lo, hi = 0, len(prefix) - 1
+		while lo < hi:
+			mid = (lo + hi + 1) // 2
+			if self._has_prefix(prefix[:mid]):
+				lo = mid
+			else:
+				hi = mid - 1
+		base, rest = prefix[:lo], prefix[lo:]
+		variants = [base + rest[1:]]
+		if len(rest) > 1:
+			variants.append(base + rest[1] + rest[0] + rest[2:])
+		for ch in self._next_chars(base):
+			variants.append(base + ch + rest[1:])
+			variants.append(base + ch + rest)
+		return [v for v in dict.fromkeys(variants) if v and self._has_prefix(v)]
+
+	def suggest(self, prefix: str, limit: int = SUGGEST_LIMIT) -> List[Dict]:
+		"""Up to `limit` entries completing `prefix`: exact matches first, then entity names, then shorter entries."""
+		key = suggest_key(prefix)
+		if not key or limit <= 0 or not self.keys:
+			return []
+		ranges = [self._range(key)]
+		if ranges[0][0] == ranges[0][1]:
+			ranges = [self._range(v) for v in self._fuzzy_prefixes(key)]
+		# Typo variants share the scan budget, so a short prefix with many variants costs no more to rank
+		scan = max(SCAN_LIMIT // max(1, len(ranges)), limit)
+		found = set()
+		for lo, hi in ranges:
+			found.update(range(lo, min(hi, lo + scan)))
+		best = sorted(found, key=lambda i: (self.keys[i] != key, self.kinds[i], len(self.keys[i]), i))
+		out: List[Dict] = []
+		texts = set()
+		for i in best:
+			text = self.texts[i]
+			if text in texts:
+				continue
+			texts.add(text)
+			out.append({"text": text, "kind": KINDS[self.kinds[i]], "row": int(self.rows[i])})
+			if len(out) == limit:
+				break
+		return out
+
+	def exact(self, text: str, kinds: Iterable[str] = KINDS) -> Optional[Tuple[str, int]]:
+		"""(kind, row) of the entry whose key equals `text`'s, first by `kinds` order; None if there is none or its row is ambiguous."""
+		key = suggest_key(text)
+		lo, hi = self._range(key)
+		matches = {KINDS[self.kinds[i]]: int(self.rows[i]) for i in range(lo, hi) if self.keys[i] == key}
+		for kind in kinds:
+			row = matches.get(kind)
+			if row is not None:
+				return (kind, row) if row >= 0 else None
+		return None
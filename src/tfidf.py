@@ -0,0 +1,94 @@
+"""Character n-gram TF-IDF retrieval using NumPy only.
+
+Documents and queries are bags of character trigrams taken inside each word
+(padded with spaces, like scikit-learn's "char_wb"), so a misspelt word still
+shares most of its n-grams with the right one. Document vectors are stored
+column-wise (n-gram -> documents), which makes scoring a query one sparse
+matrix-vector product over the postings of the query's own n-grams.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+NGRAM = 3
+
+
+def char_ngrams(text: str, n: int = NGRAM) -> List[str]:
+	grams: List[str] = []
+	for word in _WORD_RE.findall((text or "").lower()):
+		padded = f" {word} "
+		grams.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+	return grams
+
+
+class TfidfIndex:
+	"""L2-normalised sublinear TF-IDF vectors of char n-grams, stored as CSC arrays.
+
+	`offsets` slices `ids`/`weights` per entry of `vocab`, like BM25Index.
+	Scores are cosine similarities scaled to 0-100.
+	"""
+
+	def __init__(self, docs: Iterable[str], n: int = NGRAM):
+		self.n = n
+		features: Dict[str, int] = {}
+		gram_ids: List[int] = []
+		doc_ids: List[int] = []
+		tfs: List[int] = []
+		num_docs = 0
+		for doc_id, doc in enumerate(docs):
+			num_docs += 1
+			for gram, tf in Counter(char_ngrams(doc, n)).items():
+				gram_ids.append(features.setdefault(gram, len(features)))
+				doc_ids.append(doc_id)
+				tfs.append(tf)
+		self.num_docs = num_docs
+		self._features = features
+		grams = np.asarray(gram_ids, dtype=np.int64)
+		order = np.argsort(grams, kind="stable")
+		df = np.bincount(grams, minlength=len(features))
+		self.idf = (np.log((1 + num_docs) / (1 + df)) + 1).astype(np.float32)
+		self.offsets = np.zeros(len(features) + 1, dtype=np.int64)
+		np.cumsum(df, out=self.offsets[1:])
+		self.ids = np.asarray(doc_ids, dtype=np.int32)[order]
+		weights = (1 + np.log(np.asarray(tfs, dtype=np.float32)[order])) * self.idf[grams[order]]
+		norms = np.sqrt(np.bincount(self.ids, weights=weights.astype(np.float64) ** 2, minlength=num_docs))
+		self.weights = (weights / np.where(norms > 0, norms, 1)[self.ids]).astype(np.float32)
+
+	def __len__(self) -> int:
+		return self.num_docs
+
+	def scores(self, query: str) -> np.ndarray:
+		"""Cosine similarity (0-100) of the query against every document."""
+		counts = Counter(g for g in char_ngrams(query, self.n) if g in self._features)
+		if not counts:
+			return np.zeros(self.num_docs, dtype=np.float64)
+		slots = np.fromiter((self._features[g] for g in counts), dtype=np.int64, count=len(counts))
+		q = (1 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))) * self.idf[slots]
+		q /= math.sqrt(float(np.dot(q, q)))
+		lengths = self.offsets[slots + 1] - self.offsets[slots]
+		ids = np.concatenate([self.ids[self.offsets[j]:self.offsets[j + 1]] for j in slots])
+		weights = np.concatenate([self.weights[self.offsets[j]:self.offsets[j + 1]] for j in slots])
+		return np.bincount(ids, weights=weights * np.repeat(q, lengths), minlength=self.num_docs) * 100.0
+
+	def top(self, query: str, top_k: int, min_score: int = 0, ids: Optional[Sequence[int]] = None) -> List[Tuple[int, int]]:
+		"""Best (score, doc id) pairs, ties favouring earlier documents; scores are floored to integers."""
+		if top_k <= 0 or not self.num_docs:
+			return []
+		# Weights are float32, so an exact match can land a few 1e-6 below 100; the epsilon keeps it at 100
+		scores = np.floor(self.scores(query) + 1e-4)
+		if ids is not None:
+			ids = np.asarray(ids, dtype=np.int64)
+			scores = scores[ids]
+		if len(scores) > top_k:
+			cutoff = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+			keep = np.flatnonzero(scores >= max(cutoff, min_score))
+		else:
+			keep = np.flatnonzero(scores >= min_score)
+		# Stable sort on -score keeps ascending ids among ties
+		best = keep[np.argsort(-scores[keep], kind="stable")[:top_k]]
+		rows = ids[best] if ids is not None else best
+		return [(int(scores[j]), int(i)) for j, i in zip(best, rows)]
@@ -1,29 +1,120 @@
+import contextvars
 import datetime
-from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import requests
+import numpy as np
 
+from . import deadline, metrics
+from .cache import CACHE_DIR, DiskCache, SingleFlight, TTLCache
 
-GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
-FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+if TYPE_CHECKING:
+	import requests
 
+logger = logging.getLogger(__name__)
 
+# Overridable so the weather path can be exercised against a local stub server
+GEOCODE_URL = os.environ.get("OPEN_METEO_GEOCODE_URL", "https://geocoding-api.open-meteo.com/v1/search")
+FORECAST_URL = os.environ.get("OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+
+REQUEST_TIMEOUT = 10
+# Forecasts are shared by every location that falls in the same grid cell (0.1 deg ~ 11 km)
+FORECAST_GRID_DEG = 0.1
+FORECAST_TTL_S = 60 * 60
+# Places do not move; unknown names are retried after a day in case the upstream index changes
+GEOCODE_MISS_TTL_S = 24 * 60 * 60
+
+_geocode_cache = DiskCache(os.path.join(CACHE_DIR, "geocode.sqlite"))
+_forecast_cache = TTLCache(maxsize=4096, ttl=FORECAST_TTL_S)
+_inflight = SingleFlight()
+# One session with retries, one without, for calls made under a request deadline
+_sessions: Dict[bool, "requests.Session"] = {}
+_session_lock = threading.Lock()
+_TIMED_OUT = object()
+
+
+def get_session(retries: bool = True) -> "requests.Session":
+	"""Shared HTTP session with connection pooling and, unless `retries` is False, retries on transient upstream errors."""
+	session = _sessions.get(retries)
+	if session is None:
+		with _session_lock:
+			session = _sessions.get(retries)
+			if session is None:
+				# requests is only imported once a forecast actually has to be fetched
+				import requests
+				from requests.adapters import HTTPAdapter
+				from urllib3.util.retry import Retry
+				retry = Retry(total=3 if retries else 0, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+				session = requests.Session()
+				session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry))
+				session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry))
+				_sessions[retries] = session
+	return session
+
+
+def _get_json(url: str, params: Dict) -> Dict:
+	"""GET `url` and decode its JSON body, within the request deadline when there is one.
+
+	Under a deadline the call is made once, without retries (their backoff and
+	per-attempt timeouts would add up past the budget), and abandoned with
+	DeadlineExceeded when the budget runs out.
+	"""
+	def get() -> Dict:
+		resp = get_session(retries=deadline.current() is None).get(url, params=params, timeout=deadline.timeout(REQUEST_TIMEOUT))
+		resp.raise_for_status()
+		return resp.json() or {}
+
+	data = deadline.call(get, default=_TIMED_OUT, stage="weather")
+	if data is _TIMED_OUT:
+		raise deadline.DeadlineExceeded(f"no answer from {url} within the request budget")
+	return data
+
+
+def normalize_location(location_query: str) -> str:
+	"""Cache key for a place name: lowercase, punctuation dropped, whitespace collapsed."""
+	return " ".join(re.sub(r"[^\w\s]", " ", (location_query or "").lower()).split())
+
+
+def snap_to_grid(latitude: float, longitude: float, step: float = FORECAST_GRID_DEG) -> Tuple[float, float]:
+	return round(round(latitude / step) * step, 4), round(round(longitude / step) * step, 4)
+
+
+def clear_caches() -> None:
+	"""Drop cached geocodes and forecasts (mainly for tests)."""
+	_geocode_cache.clear()
+	_forecast_cache.clear()
+
+
+@metrics.timed("geocode_location")
 def geocode_location(location_query: str) -> Optional[Dict]:
 	"""Resolve a location name to coordinates using Open-Meteo geocoding API.
 
 	Returns a dict with latitude, longitude, name, admin1, country or None if not found.
+	Results are cached on disk by normalized name, including misses.
 	"""
 	if not location_query:
 		return None
+	key = normalize_location(location_query)
+	cached = _geocode_cache.get(key)
+	if cached is not None:
+		return cached or None
+	place = _inflight.do(("geocode", key), lambda: _geocode_uncached(location_query))
+	_geocode_cache.set(key, place or {}, ttl=None if place else GEOCODE_MISS_TTL_S)
+	return place
+
+
+def _geocode_uncached(location_query: str) -> Optional[Dict]:
 	params = {
 		"name": location_query,
 		"count": 1,
 		"language": "en",
 		"format": "json",
 	}
-	resp = requests.get(GEOCODE_URL, params=params, timeout=10)
-	resp.raise_for_status()
-	data = resp.json() or {}
+	data = _get_json(GEOCODE_URL, params)
 	results = data.get("results") or []
 	if not results:
 		return None
@@ -37,8 +128,31 @@ def geocode_location(location_query: str) -> Optional[Dict]:
 	}
 
 
+@metrics.timed("fetch_forecast")
 def fetch_forecast(latitude: float, longitude: float) -> Dict:
-	"""Fetch 7-day daily forecast for temperature and precipitation."""
+	"""Fetch 7-day daily forecast for temperature and precipitation.
+
+	Coordinates are snapped to a grid cell and the forecast is cached per cell for FORECAST_TTL_S.
+	If the upstream fails or the request deadline runs out, an expired forecast for the cell is
+	returned instead when there is one.
+	"""
+	cell = snap_to_grid(latitude, longitude)
+	cached = _forecast_cache.get(cell)
+	if cached is not None:
+		return cached
+	try:
+		forecast = _inflight.do(("forecast", cell), lambda: _forecast_uncached(*cell))
+	except Exception:
+		stale = _forecast_cache.get(cell, stale=True)
+		if stale is None:
+			raise
+		logger.warning("Forecast for %s unavailable; serving the cached one", cell, exc_info=True)
+		return stale
+	_forecast_cache.set(cell, forecast)
+	return forecast
+
+
+def _forecast_uncached(latitude: float, longitude: float) -> Dict:
 	params = {
 		"latitude": latitude,
 		"longitude": longitude,
@@ -51,29 +165,68 @@ def fetch_forecast(latitude: float, longitude: float) -> Dict:
 		"timezone": "auto",
 		"forecast_days": 7,
 	}
-	resp = requests.get(FORECAST_URL, params=params, timeout=10)
-	resp.raise_for_status()
-	return resp.json() or {}
+	return _get_json(FORECAST_URL, params)
 
 
 def summarize_forecast(forecast: Dict) -> Dict:
 	"""Compute simple aggregates from the daily forecast."""
-	daily = (forecast or {}).get("daily") or {}
-	def avg(values: List[float]) -> Optional[float]:
-		vals = [v for v in (values or []) if isinstance(v, (int, float))]
-		return round(sum(vals) / len(vals), 1) if vals else None
+	return summarize_forecasts([forecast])[0]
 
-	avg_tmax = avg(daily.get("temperature_2m_max"))
-	avg_tmin = avg(daily.get("temperature_2m_min"))
-	rain_total = round(sum(daily.get("precipitation_sum") or []), 1) if daily.get("precipitation_sum") else None
-	wind_max_avg = avg(daily.get("windspeed_10m_max"))
 
-	return {
-		"avg_temp_max_c": avg_tmax,
-		"avg_temp_min_c": avg_tmin,
-		"total_rain_mm": rain_total,
-		"avg_wind_max_kmh": wind_max_avg,
-	}
+def summarize_forecasts(forecasts: List[Dict]) -> List[Dict]:
+	"""Vectorized `summarize_forecast` over many forecasts: each daily field becomes one NaN-padded matrix."""
+	def matrix(field: str) -> Tuple[np.ndarray, np.ndarray]:
+		rows = [((f or {}).get("daily") or {}).get(field) or [] for f in forecasts]
+		mat = np.full((len(rows), max((len(r) for r in rows), default=0)), np.nan)
+		for i, r in enumerate(rows):
+			mat[i, :len(r)] = [v if isinstance(v, (int, float)) else np.nan for v in r]
+		return mat, np.array([len(r) > 0 for r in rows], dtype=bool)
+
+	def averages(field: str) -> List[Optional[float]]:
+		mat, _ = matrix(field)
+		counts = np.sum(~np.isnan(mat), axis=1)
+		sums = np.nansum(mat, axis=1)
+		return [round(float(total / n), 1) if n else None for total, n in zip(sums, counts)]
+
+	rain, has_rain = matrix("precipitation_sum")
+	rain_totals = [round(float(total), 1) if present else None for total, present in zip(np.nansum(rain, axis=1), has_rain)]
+	columns = zip(averages("temperature_2m_max"), averages("temperature_2m_min"), rain_totals, averages("windspeed_10m_max"))
+	return [
+		{
+			"avg_temp_max_c": tmax,
+			"avg_temp_min_c": tmin,
+			"total_rain_mm": rain_total,
+			"avg_wind_max_kmh": wind,
+		}
+		for tmax, tmin, rain_total, wind in columns
+	]
+
+
+# Crop rules per season, evaluated in order over arrays of (avg max temp, avg min temp, total rain)
+CROP_RULES = {
+	"kharif": [
+		("Rice (Paddy)", "High expected rainfall suits transplanted paddy", lambda tmax, tmin, rain: rain >= 150),
+		("Maize", "Moderate rain with warm temps suits maize", lambda tmax, tmin, rain: (80 <= rain) & (rain <= 180)),
+		("Soybean", "Warm and moderately wet conditions", lambda tmax, tmin, rain: (80 <= rain) & (rain <= 180)),
+		("Groundnut", "Requires warm climate and moderate rainfall", lambda tmax, tmin, rain: (80 <= rain) & (rain <= 180)),
+		("Millets (Pearl/foxtail)", "Drought-tolerant for low rainfall", lambda tmax, tmin, rain: rain < 80),
+	],
+	"rabi": [
+		# Cool season crops favor lower max temps and cool nights with low rainfall
+		("Wheat", "Cool season with low rainfall suits wheat", lambda tmax, tmin, rain: (tmax <= 30) & (5 <= tmin) & (tmin <= 15) & (rain < 50)),
+		("Mustard", "Cool-dry conditions favorable", lambda tmax, tmin, rain: (15 <= tmin) & (tmin <= 20) & (rain < 60)),
+		("Chickpea (Gram)", "Thrives in cool, relatively dry weather", lambda tmax, tmin, rain: (10 <= tmin) & (tmin <= 20) & (rain < 60)),
+	],
+	"zaid": [
+		("Watermelon/Muskmelon", "Warm short-season fruits fit zaid", lambda tmax, tmin, rain: (tmax >= 30) & (rain < 80)),
+		("Cucumber & Gourds", "Short duration, warm season", lambda tmax, tmin, rain: (tmax >= 30) & (rain < 80)),
+		("Vegetables (Okra, chilli)", "Warm temps with some rain", lambda tmax, tmin, rain: rain >= 60),
+	],
+}
+
+
+def season_for_month(month: int) -> str:
+	return "kharif" if month in [6, 7, 8, 9, 10] else ("rabi" if month in [11, 12, 1, 2, 3] else "zaid")
 
 
 def recommend_crops(summary: Dict, month: Optional[int] = None) -> List[Dict]:
@@ -83,48 +236,24 @@ def recommend_crops(summary: Dict, month: Optional[int] = None) -> List[Dict]:
 	- Rabi (Nov-Mar): wheat, mustard, chickpea prefer cool temps and low rain
 	- Zaid (Apr-May): short-duration vegetables and melons in warm temps
 	"""
+	return recommend_crops_many([summary], month)[0]
+
+
+def recommend_crops_many(summaries: List[Dict], month: Optional[int] = None) -> List[List[Dict]]:
+	"""Evaluate the CROP_RULES for many summaries at once, one boolean mask per rule."""
 	if month is None:
 		month = datetime.date.today().month
 
-	season = "kharif" if month in [6, 7, 8, 9, 10] else ("rabi" if month in [11, 12, 1, 2, 3] else "zaid")
-	avg_tmax = summary.get("avg_temp_max_c") or 0
-	avg_tmin = summary.get("avg_temp_min_c") or 0
-	rain_total = summary.get("total_rain_mm") or 0
-
-	recs: List[Dict] = []
-	if season == "kharif":
-		if rain_total >= 150:
-			recs.append({"crop": "Rice (Paddy)", "why": "High expected rainfall suits transplanted paddy"})
-		if 80 <= rain_total <= 180:
-			recs.append({"crop": "Maize", "why": "Moderate rain with warm temps suits maize"})
-			recs.append({"crop": "Soybean", "why": "Warm and moderately wet conditions"})
-			recs.append({"crop": "Groundnut", "why": "Requires warm climate and moderate rainfall"})
-		if rain_total < 80:
-			recs.append({"crop": "Millets (Pearl/foxtail)", "why": "Drought-tolerant for low rainfall"})
-	elif season == "rabi":
-		# Cool season crops favor lower max temps and cool nights with low rainfall
-		if avg_tmax <= 30 and 5 <= avg_tmin <= 15 and rain_total < 50:
-			recs.append({"crop": "Wheat", "why": "Cool season with low rainfall suits wheat"})
-		if 15 <= avg_tmin <= 20 and rain_total < 60:
-			recs.append({"crop": "Mustard", "why": "Cool-dry conditions favorable"})
-		if 10 <= avg_tmin <= 20 and rain_total < 60:
-			recs.append({"crop": "Chickpea (Gram)", "why": "Thrives in cool, relatively dry weather"})
-	else:  # zaid
-		if avg_tmax >= 30 and rain_total < 80:
-			recs.append({"crop": "Watermelon/Muskmelon", "why": "Warm short-season fruits fit zaid"})
-			recs.append({"crop": "Cucumber & Gourds", "why": "Short duration, warm season"})
-		if rain_total >= 60:
-			recs.append({"crop": "Vegetables (Okra, chilli)", "why": "Warm temps with some rain"})
-
-	# Deduplicate by crop keeping first rationale
-	seen = set()
-	unique_recs: List[Dict] = []
-	for r in recs:
-		c = r.get("crop")
-		if c and c not in seen:
-			seen.add(c)
-			unique_recs.append(r)
-	return unique_recs[:6]
+	def column(key: str) -> np.ndarray:
+		return np.array([s.get(key) or 0 for s in summaries], dtype=np.float64)
+
+	tmax, tmin, rain = column("avg_temp_max_c"), column("avg_temp_min_c"), column("total_rain_mm")
+	recs: List[List[Dict]] = [[] for _ in summaries]
+	for crop, why, rule in CROP_RULES[season_for_month(month)]:
+		for i in np.flatnonzero(rule(tmax, tmin, rain)):
+			if len(recs[i]) < 6:
+				recs[i].append({"crop": crop, "why": why})
+	return recs
 
 
 def build_advice_message(place: Dict, summary: Dict, recs: List[Dict]) -> str:
@@ -167,3 +296,49 @@ def get_weather_recommendation(location_query: str) -> Dict:
 	}
 
 
+# Upper bound on concurrent upstream lookups made by one bulletin
+BULLETIN_WORKERS = 16
+
+
+def get_weather_bulletin(locations: List[str], max_workers: int = BULLETIN_WORKERS, month: Optional[int] = None) -> List[Dict]:
+	"""Weather advice for many locations at once, in input order.
+
+	Geocoding and forecasts are fetched concurrently on a bounded thread pool;
+	summaries and crop rules are then evaluated for all locations together.
+	Each entry has the same shape as `get_weather_recommendation` output.
+	"""
+	def fetch(location: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+		place = geocode_location(location)
+		if not place:
+			return None, None
+		return place, fetch_forecast(place["latitude"], place["longitude"])
+
+	with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(locations) or 1))) as pool:
+		# Each task runs in a copy of the caller's context so it sees the request deadline
+		futures = [pool.submit(contextvars.copy_context().run, fetch, location) for location in locations]
+
+	out: List[Optional[Dict]] = [None] * len(locations)
+	found: List[Tuple[int, Dict, Dict]] = []
+	for i, (location, future) in enumerate(zip(locations, futures)):
+		try:
+			place, forecast = future.result()
+		except Exception as e:
+			out[i] = {"type": "weather", "score": 100.0, "error": f"Failed to fetch weather for {location}: {e}"}
+			continue
+		if not place:
+			out[i] = {"type": "weather", "score": 100.0, "error": f"Could not find location: {location}"}
+			continue
+		found.append((i, place, forecast))
+
+	summaries = summarize_forecasts([forecast for _, _, forecast in found])
+	all_recs = recommend_crops_many(summaries, month)
+	for (i, place, _), summary, recs in zip(found, summaries, all_recs):
+		out[i] = {
+			"type": "weather",
+			"score": 100.0,
+			"location": place,
+			"summary": summary,
+			"recommendations": recs,
+			"message": build_advice_message(place, summary, recs),
+		}
+	return out
@@ -0,0 +1,109 @@
+"""The headless HTTP API (src/api.py): routing, keep-alive and request validation."""
+import http.client
+import json
+import math
+import os
+import socket
+import sys
+import threading
+import unittest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src.api import MAX_BODY_BYTES, ApiServer, _jsonable
+from src.records import ColumnRecords
+from src.reload import LiveKnowledgeBase
+from src.retrieval import PEST_COLUMNS, QA_COLUMNS, SCHEME_COLUMNS, KnowledgeIndex, clear_result_cache
+
+
+def _index() -> KnowledgeIndex:
+	schemes = ColumnRecords(SCHEME_COLUMNS, [["Pradhan Mantri Kisan Samman Nidhi"], ["PM-KISAN"]] + [[""]] * (len(SCHEME_COLUMNS) - 2))
+	pests = ColumnRecords(PEST_COLUMNS, [["Paddy"], ["Brown Planthopper"], ["Hopper burn"], ["Drain the field"], [math.nan]])
+	qa = ColumnRecords(QA_COLUMNS, [["Blast disease in paddy"], ["pest"], ["Spray tricyclazole"], [""]])
+	return KnowledgeIndex(schemes, pests, qa)
+
+
+class ApiTests(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.server = ApiServer(("127.0.0.1", 0), LiveKnowledgeBase(_index()))
+		threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+		cls.port = cls.server.server_address[1]
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.server.shutdown()
+		cls.server.server_close()
+
+	def setUp(self):
+		clear_result_cache()
+		self.addCleanup(clear_result_cache)
+		self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+		self.addCleanup(self.conn.close)
+
+	def request(self, method: str, path: str, body=None, headers=None):
+		self.conn.request(method, path, body=body, headers=headers or {})
+		resp = self.conn.getresponse()
+		data = resp.read()
+		return resp, json.loads(data) if resp.getheader("Content-Type", "").startswith("application/json") else data
+
+	def raw(self, request: bytes) -> bytes:
+		"""Send hand-written request bytes and return everything the server sends before closing."""
+		with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+			sock.sendall(request)
+			chunks = []
+			for chunk in iter(lambda: sock.recv(65536), b""):
+				chunks.append(chunk)
+		return b"".join(chunks)
+
+	def test_get_and_post_search_on_one_connection(self):
+		resp, payload = self.request("GET", "/search?q=brown+planthopper+in+paddy&lang=en")
+		self.assertEqual(resp.status, 200)
+		self.assertEqual(payload["results"][0]["name"], "Brown Planthopper")
+		# The NaN Source cell is sent as null
+		self.assertIsNone(payload["results"][0]["source"])
+		resp, posted = self.request("POST", "/search", json.dumps({"q": "brown planthopper in paddy", "lang": "en"}), {"Content-Type": "application/json"})
+		self.assertEqual(resp.status, 200)
+		self.assertEqual(posted["results"], payload["results"])
+
+	def test_missing_parameters_and_unknown_paths(self):
+		self.assertEqual(self.request("GET", "/search")[0].status, 400)
+		self.assertEqual(self.request("GET", "/suggest?q=bro&limit=many")[0].status, 400)
+		resp, payload = self.request("GET", "/nowhere")
+		self.assertEqual(resp.status, 404)
+		self.assertIn("/search", payload["endpoints"])
+		resp, payload = self.request("GET", "/suggest?q=brow")
+		self.assertEqual(payload["suggestions"], [{"text": "Brown Planthopper", "kind": "pest"}])
+
+	def test_bodies_that_are_not_json_objects_are_rejected_but_keep_the_connection(self):
+		for body in (b"[1, 2]", b"{not json", b"\"q\""):
+			resp, payload = self.request("POST", "/search", body)
+			self.assertEqual(resp.status, 400, body)
+			self.assertEqual(payload["error"], "body must be a JSON object")
+		self.assertEqual(self.request("POST", "/search", b"")[0].status, 400)  # {} has no 'q'
+		self.assertEqual(self.request("GET", "/health")[0].status, 200)
+
+	def test_content_length_is_validated_and_the_connection_closed(self):
+		cases = [
+			(b"", b"411"),
+			(b"Content-Length: abc\r\n", b"400"),
+			(b"Content-Length: -5\r\n", b"400"),
+			(f"Content-Length: {MAX_BODY_BYTES + 1}\r\n".encode("ascii"), b"413"),
+		]
+		for header, status in cases:
+			# A second request is pipelined; the server must not read it as a body or answer it
+			reply = self.raw(b"POST /search HTTP/1.1\r\nHost: x\r\n" + header + b"\r\nGET /health HTTP/1.1\r\nHost: x\r\n\r\n")
+			self.assertTrue(reply.startswith(b"HTTP/1.1 " + status), reply[:40])
+			self.assertEqual(reply.count(b"HTTP/1.1 "), 1, header)
+
+
+class JsonableTests(unittest.TestCase):
+	def test_nan_and_numpy_values_become_json(self):
+		import numpy as np
+		value = {"a": math.nan, "b": [np.int64(3), (np.float32(0.5), math.inf)], 1: "x"}
+		self.assertEqual(_jsonable(value), {"a": None, "b": [3, [0.5, None]], "1": "x"})
+
+
+if __name__ == "__main__":
+	unittest.main()
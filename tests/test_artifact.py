@@ -0,0 +1,73 @@
+"""The compiled knowledge-base artifact (src/kb_artifact.py): load, staleness and corruption."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src import kb_artifact
+from src.data_loader import PEST_FILE, RAW_DATA_PATH
+from src.ingest import load_corpora
+from src.retrieval import KnowledgeIndex, clear_result_cache
+
+QUERIES = ["brown planthopper in paddy", "PM-KISAN installment", "leaf curl in chilli", "hello", ""]
+
+
+class ArtifactTests(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.tmp, True)
+		self.raw = os.path.join(self.tmp, "raw")
+		shutil.copytree(RAW_DATA_PATH, self.raw)
+		patch = mock.patch.object(kb_artifact, "RAW_DATA_PATH", self.raw)
+		patch.start()
+		self.addCleanup(patch.stop)
+		self.path = kb_artifact.compile_artifact(os.path.join(self.tmp, "kb.agrikb"))
+		clear_result_cache()
+		self.addCleanup(clear_result_cache)
+
+	def test_loaded_artifact_answers_like_the_csvs(self):
+		loaded = kb_artifact.load_artifact(self.path)
+		self.assertIsNotNone(loaded)
+		built = KnowledgeIndex.from_corpora(*load_corpora(self.raw))
+		for query in QUERIES:
+			clear_result_cache()
+			expected = built.search(query)
+			clear_result_cache()
+			self.assertEqual(loaded.search(query), expected, query)
+
+	def test_changed_sources_make_it_stale(self):
+		with open(os.path.join(self.raw, PEST_FILE), "a", encoding="utf-8") as fh:
+			fh.write("999,Paddy,Leaf Folder,Folded leaves,Spray chlorantraniliprole,ICAR,en\n")
+		self.assertIsNone(kb_artifact.load_artifact(self.path))
+
+	def test_touched_but_identical_sources_stay_fresh(self):
+		pests = os.path.join(self.raw, PEST_FILE)
+		st = os.stat(pests)
+		os.utime(pests, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+		self.assertIsNotNone(kb_artifact.load_artifact(self.path))
+
+	def test_corrupt_payload_falls_back(self):
+		with open(self.path, "r+b") as fh:
+			fh.seek(-1, os.SEEK_END)
+			last = fh.read(1)
+			fh.seek(-1, os.SEEK_END)
+			fh.write(bytes([last[0] ^ 0xFF]))
+		self.assertFalse(kb_artifact.verify_artifact(self.path))
+		with self.assertLogs("src.kb_artifact", "WARNING"):
+			self.assertIsNone(kb_artifact.load_artifact(self.path))
+
+	def test_truncated_or_missing_artifact_falls_back(self):
+		self.assertIsNone(kb_artifact.load_artifact(os.path.join(self.tmp, "missing.agrikb")))
+		with open(self.path, "r+b") as fh:
+			fh.truncate(os.path.getsize(self.path) - 8)
+		with self.assertLogs("src.kb_artifact", "WARNING"):
+			self.assertIsNone(kb_artifact.load_artifact(self.path))
+
+
+if __name__ == "__main__":
+	unittest.main()
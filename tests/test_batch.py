@@ -0,0 +1,73 @@
+"""Batch search (route_and_search_many, Corpus.top_many) answers exactly like one query at a time."""
+import os
+import sys
+import unittest
+from unittest import mock
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src import retrieval
+from src.data_loader import load_all_records
+from src.retrieval import KnowledgeIndex, clear_result_cache
+
+QUERIES = [
+	"brown planthopper in paddy",  # pest, narrowed by crop and pest facets
+	"Red palm weevil attack on coconut",
+	"PM-KISAN installment status",  # scheme
+	"how to apply for crop insurance",  # general: every corpus
+	"leaf spot on banana",
+	"brown planthopper in paddy",  # repeated within the batch
+	"धान में कीट",  # Hindi keywords
+	"will it rain tomorrow",  # weather without a place: Q&A search
+	"xyzzy",
+	"",
+]
+
+
+def _content(found):
+	return [(score, row.to_dict()) for score, row in found]
+
+
+class BatchParityTests(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.records = load_all_records()
+
+	def setUp(self):
+		clear_result_cache()
+		self.addCleanup(clear_result_cache)
+		self.kb = KnowledgeIndex(*self.records)
+
+	def _one_at_a_time(self):
+		out = []
+		for query in QUERIES:
+			clear_result_cache()
+			out.append(self.kb.search(query))
+		clear_result_cache()
+		return out
+
+	def test_search_many_matches_search(self):
+		expected = self._one_at_a_time()
+		for workers in (1, 2):
+			clear_result_cache()
+			self.assertEqual(self.kb.search_many(QUERIES, workers=workers), expected)
+		# Second batch is answered from the result cache
+		self.assertEqual(self.kb.search_many(QUERIES), expected)
+
+	def test_top_many_matches_top(self):
+		for corpus in (self.kb.schemes, self.kb.pests, self.kb.qa):
+			expected = [_content(corpus.top(q, 3)) for q in QUERIES]
+			for workers in (1, 2):
+				self.assertEqual([_content(found) for found in corpus.top_many(QUERIES, 3, workers)], expected)
+
+	def test_parity_holds_with_bm25_pruning(self):
+		with mock.patch.object(retrieval, "BM25_MIN_DOCS", 1), mock.patch.object(retrieval, "BM25_CANDIDATES", 5):
+			self.kb = KnowledgeIndex(*self.records)
+			self.assertIsNotNone(self.kb.qa.bm25)
+			expected = self._one_at_a_time()
+			self.assertEqual(self.kb.search_many(QUERIES, workers=2), expected)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,77 @@
+"""BM25 candidate pruning (src/bm25.py) and Corpus.top's fallback when it finds nothing."""
+import os
+import sys
+import unittest
+from unittest import mock
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src import retrieval
+from src.bm25 import BM25Index, tokenize
+from src.records import ColumnRecords
+from src.retrieval import QA_COLUMNS, Corpus
+
+DOCS = [
+	"brown planthopper in paddy",
+	"blast disease in paddy nursery",
+	"coconut bud rot",
+	"planthopper planthopper hopper burn",
+	"banana sigatoka leaf spot",
+]
+
+
+def _qa(docs):
+	return ColumnRecords(QA_COLUMNS, [list(docs), ["pest"] * len(docs), ["answer"] * len(docs), [""] * len(docs)])
+
+
+class BM25IndexTests(unittest.TestCase):
+	def setUp(self):
+		self.index = BM25Index(DOCS)
+
+	def test_tokenize_drops_stopwords(self):
+		self.assertEqual(tokenize("What is the Blast in my paddy?"), ["blast", "paddy"])
+
+	def test_candidates_are_the_best_scoring_ids_in_ascending_order(self):
+		self.assertEqual(self.index.candidates("planthopper", 10), [0, 3])
+		self.assertEqual(self.index.candidates("planthopper paddy", 1), [0])
+		# Repeating a token outranks one occurrence of an equally rare one
+		self.assertEqual(self.index.candidates("planthopper paddy", 2), [0, 3])
+		self.assertEqual(self.index.candidates("planthopper paddy", 3), [0, 1, 3])
+
+	def test_no_shared_token_or_allowed_row_gives_nothing(self):
+		self.assertEqual(self.index.candidates("brwn plnthoppr", 10), [])
+		self.assertEqual(self.index.candidates("the of and", 10), [])
+		self.assertEqual(self.index.candidates("planthopper", 10, allowed=[1, 2]), [])
+		self.assertEqual(self.index.candidates("paddy", 10, allowed=[1, 2]), [1])
+
+	def test_extended_matches_a_rebuilt_index(self):
+		extended = BM25Index(DOCS[:3]).extended(DOCS[3:])
+		self.assertEqual(list(extended.vocab), list(self.index.vocab))
+		np.testing.assert_array_equal(extended.ids, self.index.ids)
+		np.testing.assert_allclose(extended.weights, self.index.weights, rtol=1e-6)
+
+
+class CorpusPruningTests(unittest.TestCase):
+	def setUp(self):
+		for name, value in (("BM25_MIN_DOCS", 1), ("BM25_CANDIDATES", 2)):
+			patch = mock.patch.object(retrieval, name, value)
+			patch.start()
+			self.addCleanup(patch.stop)
+		self.corpus = Corpus(_qa(DOCS), QA_COLUMNS)
+
+	def test_only_bm25_candidates_are_scored(self):
+		self.assertIsNotNone(self.corpus.bm25)
+		rows = [row["Query"] for _, row in self.corpus.top("planthopper", 3)]
+		self.assertEqual(sorted(rows), [DOCS[0], DOCS[3]])
+
+	def test_queries_sharing_no_token_fall_back_to_fuzzy_scoring(self):
+		best = self.corpus.top("brwn plnthoper in pady", 3)
+		self.assertEqual(len(best), 3)
+		self.assertEqual(best[0][1]["Query"], DOCS[0])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,84 @@
+"""Crop, pest and category facets (src/facets.py) and the narrowing they give Corpus.top."""
+import os
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src.facets import crop_names, pest_facets, qa_facets
+from src.records import ColumnRecords
+from src.retrieval import PEST_COLUMNS, QA_COLUMNS, SCHEME_COLUMNS, Corpus, KnowledgeIndex, clear_result_cache
+
+PESTS = ColumnRecords(PEST_COLUMNS, [
+	["Paddy", "Banana", "Paddy", "Coconut", "Banana"],
+	["Leaf Spot", "Sigatoka", "Blast", "Bud Rot (Phytophthora)", "Rhizome Weevil"],
+	["Brown leaf spots on banana-like broad leaves", "Yellow streaks turning brown", "Spindle-shaped spots", "Rotting spindle", "Tunnels in the rhizome"],
+	["Spray mancozeb", "Spray propiconazole", "Spray tricyclazole", "Apply Bordeaux paste", "Use clean suckers"],
+	["", "", "", "", ""],
+])
+QA = ColumnRecords(QA_COLUMNS, [
+	["Blast in rice nursery", "Fertilizer dose for banana", "Crop insurance premium", "Weevil in banana rhizome", "Odd row"],
+	["Pest", "Nutrient", "Scheme", "Pest", "Kerala Rice Research Institute"],
+	["Spray tricyclazole", "Apply 200 g N per plant", "Pay 2% of sum insured", "Use clean suckers", ""],
+	["", "", "", "", ""],
+])
+
+
+class FacetIndexTests(unittest.TestCase):
+	def setUp(self):
+		self.facets = pest_facets(PESTS)
+
+	def test_crop_aliases_and_pest_name_variants_match(self):
+		self.assertEqual(self.facets.match("Blast in my rice field"), {"crop": {"Paddy"}, "pest": {"Blast"}})
+		self.assertEqual(self.facets.match("phytophthora on coconut palm"), {"crop": {"Coconut"}, "pest": {"Bud Rot (Phytophthora)"}})
+		self.assertEqual(self.facets.match("bud rot"), {"pest": {"Bud Rot (Phytophthora)"}})
+		self.assertEqual(self.facets.match("how to sell produce"), {})
+
+	def test_candidates_are_the_union_of_matched_facets(self):
+		self.assertEqual(self.facets.candidates("banana", 1), [1, 4])
+		# Facets are not intersected: "blast" on banana still looks at the Blast row
+		self.assertEqual(self.facets.candidates("blast on banana", 1), [1, 2, 4])
+		self.assertIsNone(self.facets.candidates("how to sell produce", 1))
+		# Too few rows to fill the top k: search everything
+		self.assertIsNone(self.facets.candidates("coconut", 2))
+
+	def test_qa_facets_use_categories_and_the_crops_questions_mention(self):
+		facets = qa_facets(QA, crop_names(PESTS.column("Crop")))
+		self.assertEqual(facets.candidates("pest on my farm", 1), [0, 3])
+		self.assertEqual(facets.candidates("rice", 1), [0])
+		# Categories on fewer than MIN_CATEGORY_ROWS rows (shifted rows, one-offs) are not facets
+		self.assertNotIn(("category", "Nutrient"), facets.postings)
+		self.assertNotIn(("category", "Kerala Rice Research Institute"), facets.postings)
+
+
+class FacetNarrowingTests(unittest.TestCase):
+	def setUp(self):
+		clear_result_cache()
+		self.addCleanup(clear_result_cache)
+		schemes = ColumnRecords(SCHEME_COLUMNS, [["PM Fasal Bima Yojana"]] + [[""]] * (len(SCHEME_COLUMNS) - 1))
+		self.kb = KnowledgeIndex(schemes, PESTS, QA)
+
+	def _names(self, corpus: Corpus, query: str, top_k: int = 2):
+		return [row["Pest/Disease"] for _, row in corpus.top(query, top_k)]
+
+	def test_rows_of_other_crops_are_not_scored(self):
+		query = "brown leaf spots on banana leaves"
+		plain = Corpus(PESTS, PEST_COLUMNS)
+		self.assertEqual(self._names(plain, query, 1), ["Leaf Spot"])
+		self.assertEqual(self._names(self.kb.pests, query), ["Sigatoka", "Rhizome Weevil"])
+
+	def test_queries_without_facets_search_everything(self):
+		plain = Corpus(PESTS, PEST_COLUMNS)
+		query = "spindle shaped spots"
+		self.assertEqual(self._names(self.kb.pests, query), self._names(plain, query))
+
+	def test_facets_are_built_on_first_use(self):
+		self.assertTrue(self.kb.pests.has_facets)
+		self.assertIsNone(self.kb.pests._facets)
+		self.kb.pests.top("banana", 1)
+		self.assertIsNotNone(self.kb.pests._facets)
+
+
+if __name__ == "__main__":
+	unittest.main()
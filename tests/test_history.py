@@ -0,0 +1,73 @@
+"""Bounded chat history (src/history.py): the in-memory window, archive paging and the idle-session TTL."""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src.history import ChatArchive, ChatHistory
+
+TTL_S = 60.0
+
+
+def _contents(history: ChatHistory):
+	return [turn["content"] for turn in history.turns()]
+
+
+class ChatHistoryTests(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.tmp, True)
+		self.path = os.path.join(self.tmp, "history.sqlite")
+
+	def test_window_and_paging(self):
+		history = ChatHistory(ChatArchive(self.path), window=4)
+		for i in range(11):
+			history.append("user" if i % 2 == 0 else "assistant", f"turn {i}")
+		self.assertEqual(len(history), 11)
+		self.assertEqual(_contents(history), ["turn 7", "turn 8", "turn 9", "turn 10"])
+		self.assertTrue(history.has_earlier)
+		self.assertEqual(history.load_earlier(3), 3)
+		self.assertEqual(_contents(history)[:4], ["turn 4", "turn 5", "turn 6", "turn 7"])
+		self.assertEqual(history.load_earlier(3), 3)
+		self.assertEqual(history.load_earlier(3), 1)
+		self.assertEqual(_contents(history), [f"turn {i}" for i in range(11)])
+		self.assertFalse(history.has_earlier)
+		self.assertEqual(history.load_earlier(3), 0)
+		# A new turn drops the loaded pages again
+		history.append("user", "turn 11")
+		self.assertEqual(_contents(history), ["turn 8", "turn 9", "turn 10", "turn 11"])
+		self.assertTrue(history.has_earlier)
+
+	def test_without_an_archive_old_turns_are_dropped(self):
+		history = ChatHistory(window=2)
+		for i in range(5):
+			history.append("user", str(i))
+		self.assertEqual(_contents(history), ["3", "4"])
+		self.assertFalse(history.has_earlier)
+
+	def test_ttl_removes_idle_sessions_only(self):
+		now = time.time()
+		archive = ChatArchive(self.path, ttl=TTL_S)
+		with mock.patch("src.history.time.time", return_value=now - 2 * TTL_S):
+			archive.append("idle", [(0, {"role": "user", "content": "old"})])
+			archive.append("active", [(0, {"role": "user", "content": "first"})])
+		archive.append("active", [(1, {"role": "assistant", "content": "recent"})])
+		# The purge runs when a process opens the archive
+		reopened = ChatArchive(self.path, ttl=TTL_S)
+		self.assertEqual(reopened.page("idle", 10, 10), [])
+		self.assertEqual([turn["content"] for _, turn in reopened.page("active", 10, 10)], ["first", "recent"])
+
+	def test_ttl_none_keeps_everything(self):
+		with mock.patch("src.history.time.time", return_value=time.time() - 10 * TTL_S):
+			ChatArchive(self.path).append("s", [(0, {"role": "user", "content": "kept"})])
+		self.assertEqual(len(ChatArchive(self.path, ttl=None).page("s", 10, 10)), 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
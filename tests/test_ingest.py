@@ -0,0 +1,92 @@
+"""Streaming ingestion (src/ingest.py): MinHash near-duplicate filtering of Q&A rows."""
+import math
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src import ingest
+from src.ingest import SHINGLE_CHARS, MinHashDeduper, _shingle_text, ingest_corpus
+from src.retrieval import QA_COLUMNS
+
+QUESTIONS = [
+	"How to control brown planthopper in paddy?",
+	"how to control brown plant hopper in paddy",  # near-duplicate of 0
+	"Fertilizer dose for banana",
+	"HOW TO CONTROL BROWN PLANTHOPPER IN PADDY!!",  # same text as 0 once normalized
+	math.nan,
+	"Blast disease in paddy nursery",
+	"fertilizer dose for banana plants",  # near-duplicate of 2
+	"Crop insurance premium",
+]
+
+
+def _shingles(text: str):
+	text = _shingle_text(text)
+	return {text[i:i + SHINGLE_CHARS] for i in range(len(text) - SHINGLE_CHARS + 1)}
+
+
+class MinHashDeduperTests(unittest.TestCase):
+	def test_signature_agreement_estimates_jaccard(self):
+		deduper = MinHashDeduper(num_perm=256, bands=16)
+		pairs = [(QUESTIONS[0], QUESTIONS[1]), (QUESTIONS[2], QUESTIONS[6]), (QUESTIONS[0], QUESTIONS[5])]
+		for a, b in pairs:
+			sa, sb = _shingles(a), _shingles(b)
+			exact = len(sa & sb) / len(sa | sb)
+			sig = deduper.signatures([_shingle_text(a), _shingle_text(b)])
+			self.assertAlmostEqual(float(np.mean(sig[0] == sig[1])), exact, delta=0.1, msg=(a, b))
+
+	def test_signatures_do_not_depend_on_the_batch(self):
+		deduper = MinHashDeduper()
+		texts = [_shingle_text(q) for q in ("a", "paddy", "brown planthopper", "")]
+		together = deduper.signatures(texts)
+		for text, signature in zip(texts, together):
+			np.testing.assert_array_equal(deduper.signatures([text])[0], signature)
+
+	def test_filter_drops_repeats_and_near_duplicates_keeping_the_first(self):
+		deduper = MinHashDeduper(threshold=0.5)
+		self.assertEqual(deduper.filter(QUESTIONS), [0, 2, 4, 5, 7])
+		self.assertEqual((deduper.kept, deduper.duplicates), (4, 3))
+
+	def test_state_carries_across_calls_and_hash_batches(self):
+		with mock.patch.object(ingest, "HASH_BATCH_ROWS", 2):
+			deduper = MinHashDeduper(threshold=0.5)
+			self.assertEqual(deduper.filter(QUESTIONS[:3]), [0, 2])
+			self.assertEqual(deduper.filter(QUESTIONS[3:]), [1, 2, 4])
+
+	def test_distinct_questions_are_kept(self):
+		deduper = MinHashDeduper()
+		questions = [f"Dose of urea for {crop} in {season}" for crop in ("paddy", "wheat", "maize") for season in ("kharif", "rabi")]
+		self.assertEqual(len(deduper.filter(questions)), len(questions))
+
+	def test_num_perm_must_split_into_bands(self):
+		with self.assertRaises(ValueError):
+			MinHashDeduper(num_perm=10, bands=4)
+
+
+class IngestCorpusTests(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.tmp, True)
+
+	def test_streamed_qa_rows_are_deduplicated_in_order(self):
+		path = os.path.join(self.tmp, "qa.csv")
+		with open(path, "w", encoding="utf-8", newline="") as fh:
+			fh.write(" query ,CATEGORY,Answer,Source,Extra\n")
+			for n, question in enumerate(q for q in QUESTIONS if isinstance(q, str)):
+				fh.write(f"\"{question}\",pest,answer {n},,x\n")
+		corpus = ingest_corpus(path, QA_COLUMNS, "Query", chunk_rows=2, threshold=0.5)
+		self.assertEqual(list(corpus.records.column("Query")), [QUESTIONS[i] for i in (0, 2, 5, 7)])
+		self.assertEqual(list(corpus.records.column("Answer")), ["answer 0", "answer 2", "answer 4", "answer 6"])
+		self.assertEqual(len(corpus.docs), 4)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,60 @@
+"""Single-pass keyword matching (src/intent.py): word boundaries, Hindi and intent scores."""
+import os
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src.intent import KeywordMatcher, best_intent, score_intents
+
+
+def _found(matcher: KeywordMatcher, text: str):
+	return sorted(matcher.find(text))
+
+
+class KeywordMatcherTests(unittest.TestCase):
+	def test_ascii_keywords_match_whole_words_only(self):
+		matcher = KeywordMatcher({"pest": ["rot", "mite"]})
+		self.assertEqual(_found(matcher, "Rot in carrot, rotten termite"), [(0, 3, "pest")])
+		self.assertEqual(_found(matcher, "bud-rot and mite_free"), [(4, 7, "pest")])
+		self.assertEqual(_found(matcher, "mite"), [(0, 4, "pest")])
+
+	def test_devanagari_keywords_may_start_an_inflected_word(self):
+		matcher = KeywordMatcher({"pest": ["कीट"]})
+		self.assertEqual(_found(matcher, "कीटों से बचाव"), [(0, 3, "pest")])
+		self.assertEqual(_found(matcher, "धान में कीट"), [(8, 11, "pest")])
+		# ...but not end one
+		self.assertEqual(_found(matcher, "संकीट"), [])
+
+	def test_overlapping_keywords_are_all_reported(self):
+		matcher = KeywordMatcher({"disease": ["rice blast"], "name": ["blast"], "crop": ["rice"]})
+		self.assertEqual(_found(matcher, "rice bla rice blast"), [(0, 4, "crop"), (9, 13, "crop"), (9, 19, "disease"), (14, 19, "name")])
+
+	def test_punctuated_keywords_also_match_their_plain_form(self):
+		matcher = KeywordMatcher({"scheme": ["pm-kisan"]})
+		self.assertEqual(_found(matcher, "PM-KISAN"), [(0, 8, "scheme")])
+		self.assertEqual(_found(matcher, "pm kisan status"), [(0, 8, "scheme")])
+
+
+class IntentScoreTests(unittest.TestCase):
+	def test_english_hindi_and_transliterated_queries(self):
+		self.assertEqual(best_intent(score_intents("Aphid attack on mustard")), "pest")
+		self.assertEqual(best_intent(score_intents("गेहूं में कीटों का प्रकोप")), "pest")
+		self.assertEqual(best_intent(score_intents("dhan me keede lag gaye")), "pest")
+		self.assertEqual(best_intent(score_intents("किसान क्रेडिट कार्ड कैसे बनवाएं")), "scheme")
+		self.assertEqual(best_intent(score_intents("kal mausam kaisa rahega")), "weather")
+		self.assertEqual(best_intent(score_intents("market price of onion")), "general")
+
+	def test_every_intent_is_scored_once_per_keyword_position(self):
+		scores = score_intents("कर्ज़ और बीमा, rain and wind")
+		self.assertEqual(scores, {"pest": 0.0, "scheme": 2.0, "weather": 2.0})
+
+	def test_ties_go_to_the_earlier_intent(self):
+		self.assertEqual(best_intent({"pest": 1.0, "scheme": 1.0, "weather": 0.0}), "pest")
+		self.assertEqual(best_intent({"pest": 0.0, "scheme": 1.0, "weather": 1.0}), "scheme")
+		self.assertEqual(best_intent({}), "general")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,317 @@
+"""Offline checks of the caching, weather and translation paths.
+
+Open-Meteo is replaced by a local stub server (through the module's URL
+settings) and Google Translate by a stub backend, so these run without
+network access:
+
+	python -m pytest tests
+	python -m unittest discover tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src import deadline, i18n, weather
+from src.cache import DiskCache, SingleFlight, TTLCache
+
+PLACES = {
+	"pune": {"latitude": 18.52, "longitude": 73.86, "name": "Pune", "admin1": "Maharashtra", "country": "India"},
+	"nashik": {"latitude": 20.0, "longitude": 73.79, "name": "Nashik", "admin1": "Maharashtra", "country": "India"},
+	"slowtown": {"latitude": 10.0, "longitude": 76.0, "name": "Slowtown", "admin1": "Kerala", "country": "India"},
+}
+FORECAST = {
+	"daily": {
+		"temperature_2m_max": [30, 31, 32, 33, 34, 35, 36],
+		"temperature_2m_min": [20, 21, 22, 23, 24, 25, 26],
+		"precipitation_sum": [10, 20, 30, 0, 0, 5, 5],
+		"windspeed_10m_max": [10, 12, 14, 16, 18, 20, 22],
+	}
+}
+SLOW_S = 1.0
+
+
+class _OpenMeteoStub(BaseHTTPRequestHandler):
+	"""Answers /geocode and /forecast like Open-Meteo; `fail` turns every answer into a 404."""
+
+	calls = {"geocode": 0, "forecast": 0}
+	fail = False
+
+	def do_GET(self) -> None:
+		url = urlsplit(self.path)
+		params = {k: v[0] for k, v in parse_qs(url.query).items()}
+		kind = url.path.strip("/")
+		type(self).calls[kind] = type(self).calls.get(kind, 0) + 1
+		if type(self).fail:
+			self._reply(404, {"error": True})
+			return
+		if kind == "geocode":
+			name = params.get("name", "").lower()
+			if name == "slowtown":
+				time.sleep(SLOW_S)
+			place = PLACES.get(name)
+			self._reply(200, {"results": [place]} if place else {})
+		else:
+			self._reply(200, FORECAST)
+
+	def _reply(self, status: int, payload) -> None:
+		body = json.dumps(payload).encode("utf-8")
+		try:
+			self.send_response(status)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+		except OSError:
+			# The client gave up (deadline tests)
+			pass
+
+	def log_message(self, format: str, *args) -> None:
+		pass
+
+
+class CacheTests(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.tmp, ignore_errors=True)
+
+	def test_disk_cache_expires_entries(self):
+		cache = DiskCache(os.path.join(self.tmp, "cache.sqlite"))
+		cache.set("kept", {"a": 1})
+		cache.set("short", [1, 2], ttl=0.05)
+		self.assertEqual(cache.get("short"), [1, 2])
+		time.sleep(0.1)
+		self.assertIsNone(cache.get("short"))
+		self.assertEqual(cache.get("kept"), {"a": 1})
+		self.assertEqual(cache.get("missing", "default"), "default")
+
+	def test_ttl_cache_serves_expired_entries_only_when_stale_is_allowed(self):
+		cache = TTLCache(maxsize=2, ttl=0.05)
+		cache.set("a", 1)
+		time.sleep(0.1)
+		self.assertIsNone(cache.get("a"))
+		self.assertEqual(cache.get("a", stale=True), 1)
+		cache.set("b", 2)
+		cache.set("c", 3)
+		self.assertIsNone(cache.get("a", stale=True))
+		self.assertEqual(cache.stats()["evictions"], 1)
+
+	def test_single_flight_coalesces_concurrent_calls(self):
+		flight = SingleFlight()
+		release = threading.Event()
+		calls = []
+
+		def slow():
+			calls.append(1)
+			release.wait(5)
+			return "value"
+
+		results = []
+		threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+		for t in threads:
+			t.start()
+		time.sleep(0.1)
+		release.set()
+		for t in threads:
+			t.join()
+		self.assertEqual(len(calls), 1)
+		self.assertEqual(results, ["value"] * 5)
+
+	def test_single_flight_follower_respects_its_deadline(self):
+		flight = SingleFlight()
+		release = threading.Event()
+		leader = threading.Thread(target=flight.do, args=("key", lambda: release.wait(5)))
+		leader.start()
+		time.sleep(0.05)
+		try:
+			start = time.monotonic()
+			with deadline.request_budget(0.1):
+				with self.assertRaises(deadline.DeadlineExceeded):
+					flight.do("key", lambda: None)
+			self.assertLess(time.monotonic() - start, 1.0)
+		finally:
+			release.set()
+			leader.join()
+
+
+class StagePoolTests(unittest.TestCase):
+	def setUp(self):
+		patch = mock.patch.object(deadline, "STAGE_WORKERS", 1)
+		patch.start()
+		self.addCleanup(patch.stop)
+		self.release = threading.Event()
+		self.addCleanup(self.release.set)
+
+	def _occupy(self, stage: str):
+		return deadline.submit(self.release.wait, 5, stage=stage)
+
+	def test_queued_calls_past_their_deadline_are_dropped(self):
+		blocker = self._occupy("queue-test")
+		ran = []
+		with deadline.request_budget(0.05):
+			queued = deadline.submit(ran.append, 1, stage="queue-test")
+			self.assertEqual(deadline.wait(queued, default="late"), "late")
+		self.release.set()
+		blocker.result(timeout=5)
+		with self.assertRaises(deadline.DeadlineExceeded):
+			queued.result(timeout=5)
+		self.assertEqual(ran, [])
+
+	def test_a_busy_stage_does_not_hold_up_another(self):
+		self._occupy("busy-test")
+		with deadline.request_budget(0.2):
+			self.assertEqual(deadline.call(lambda: "ok", default="late", stage="idle-test"), "ok")
+			self.assertEqual(deadline.call(lambda: "ok", default="late", stage="busy-test"), "late")
+
+	def test_expired_requests_do_not_submit(self):
+		ran = []
+		with deadline.request_budget(0.0):
+			self.assertEqual(deadline.call(ran.append, 1, default="late", stage="expired-test"), "late")
+		self.assertEqual(ran, [])
+
+
+class WeatherStubTests(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _OpenMeteoStub)
+		cls.server.daemon_threads = True
+		threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+		cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.server.shutdown()
+		cls.server.server_close()
+
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		_OpenMeteoStub.calls = {"geocode": 0, "forecast": 0}
+		_OpenMeteoStub.fail = False
+		patches = [
+			mock.patch.object(weather, "GEOCODE_URL", self.base + "/geocode"),
+			mock.patch.object(weather, "FORECAST_URL", self.base + "/forecast"),
+			mock.patch.object(weather, "_geocode_cache", DiskCache(os.path.join(self.tmp, "geocode.sqlite"))),
+			mock.patch.object(weather, "_forecast_cache", TTLCache(maxsize=64, ttl=weather.FORECAST_TTL_S)),
+		]
+		for patch in patches:
+			patch.start()
+			self.addCleanup(patch.stop)
+
+	def tearDown(self):
+		shutil.rmtree(self.tmp, ignore_errors=True)
+
+	def test_recommendation_and_caching(self):
+		rec = weather.get_weather_recommendation("Pune")
+		self.assertEqual(rec["location"]["name"], "Pune")
+		self.assertEqual(rec["summary"]["total_rain_mm"], 70.0)
+		self.assertIn("**Location:** Pune, Maharashtra, India", rec["message"])
+		weather.get_weather_recommendation(" pune! ")
+		self.assertEqual(_OpenMeteoStub.calls, {"geocode": 1, "forecast": 1})
+
+	def test_unknown_places_are_cached_as_misses(self):
+		self.assertIn("error", weather.get_weather_recommendation("Atlantis"))
+		self.assertIsNone(weather.geocode_location("atlantis"))
+		self.assertEqual(_OpenMeteoStub.calls["geocode"], 1)
+
+	def test_expired_forecast_is_served_when_upstream_fails(self):
+		with mock.patch.object(weather, "_forecast_cache", TTLCache(maxsize=64, ttl=0.05)):
+			fresh = weather.fetch_forecast(18.52, 73.86)
+			time.sleep(0.1)
+			_OpenMeteoStub.fail = True
+			self.assertEqual(weather.fetch_forecast(18.52, 73.86), fresh)
+			self.assertEqual(_OpenMeteoStub.calls["forecast"], 2)
+			# Without an earlier forecast the failure surfaces
+			with self.assertRaises(Exception):
+				weather.fetch_forecast(28.61, 77.21)
+
+	def test_bulletin_keeps_input_order(self):
+		bulletin = weather.get_weather_bulletin(["Pune", "Atlantis", "Nashik"], month=7)
+		self.assertEqual([b.get("location", {}).get("name") for b in bulletin], ["Pune", None, "Nashik"])
+		self.assertIn("Could not find location: Atlantis", bulletin[1]["error"])
+		self.assertEqual(bulletin[0]["summary"], weather.summarize_forecast(FORECAST))
+		# Pune and Nashik are in different grid cells
+		self.assertEqual(_OpenMeteoStub.calls["forecast"], 2)
+
+	def test_slow_upstream_is_abandoned_at_the_deadline(self):
+		start = time.monotonic()
+		with deadline.request_budget(0.2):
+			with self.assertRaises(deadline.DeadlineExceeded):
+				weather.geocode_location("Slowtown")
+		self.assertLess(time.monotonic() - start, SLOW_S)
+		self.assertEqual(_OpenMeteoStub.calls["geocode"], 1)
+
+
+class _StubTranslator:
+	"""Tags every line with the target language; records each request it receives."""
+
+	requests = []
+
+	def __init__(self, source: str, target: str, join_lines: bool = False):
+		self.target = target
+		self.join_lines = join_lines
+
+	def translate(self, text: str) -> str:
+		type(self).requests.append(text)
+		lines = [f"[{self.target}] {line}" for line in text.split("\n")]
+		return " ".join(lines) if self.join_lines else "\n".join(lines)
+
+
+class _SlowStubTranslator(_StubTranslator):
+	def translate(self, text: str) -> str:
+		time.sleep(0.1)
+		return super().translate(text)
+
+
+class TranslationStubTests(unittest.TestCase):
+	def setUp(self):
+		_StubTranslator.requests = []
+		i18n.set_translator_backend(_StubTranslator)
+		self.addCleanup(i18n.set_translator_backend, None)
+
+	def test_fragments_are_batched_into_one_request_and_cached(self):
+		lines = ["**Crop:** Paddy", "**Issue:** Blast", "", "**Crop:** Paddy"]
+		out = i18n.from_english_many(lines, "hi")
+		self.assertEqual(out, ["[hi] **Crop:** Paddy", "[hi] **Issue:** Blast", "", "[hi] **Crop:** Paddy"])
+		self.assertEqual(_StubTranslator.requests, ["**Crop:** Paddy\n**Issue:** Blast"])
+		self.assertEqual(i18n.from_english_many(lines, "hi"), out)
+		self.assertEqual(len(_StubTranslator.requests), 1)
+
+	def test_one_request_per_fragment_when_lines_do_not_survive(self):
+		i18n.set_translator_backend(lambda source, target: _StubTranslator(source, target, join_lines=True))
+		out = i18n.from_english_many(["one", "two"], "hi")
+		self.assertEqual(out, ["[hi] one", "[hi] two"])
+		self.assertEqual(_StubTranslator.requests, ["one\ntwo", "one", "two"])
+
+	def test_no_requests_are_sent_after_the_deadline(self):
+		i18n.set_translator_backend(lambda source, target: _SlowStubTranslator(source, target, join_lines=True))
+		with deadline.request_budget(0.15):
+			self.assertEqual(i18n.from_english_many(["one", "two", "three"], "hi"), ["one", "two", "three"])
+		# The joined request and "one" were sent before the deadline; "two" and "three" never are
+		time.sleep(0.3)
+		self.assertEqual(_StubTranslator.requests, ["one\ntwo\nthree", "one"])
+		# What did come back was cached
+		_StubTranslator.requests = []
+		self.assertEqual(i18n.from_english_many(["one"], "hi"), ["[hi] one"])
+		self.assertEqual(_StubTranslator.requests, [])
+
+	def test_english_targets_and_queries_are_not_sent(self):
+		self.assertEqual(i18n.from_english_many(["hello"], "en"), ["hello"])
+		self.assertEqual(i18n.to_english("brown planthopper", "en"), "brown planthopper")
+		self.assertEqual(_StubTranslator.requests, [])
+		self.assertEqual(i18n.to_english("धान में कीट", "hi"), "[en] धान में कीट")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,102 @@
+"""Hot reload (src/reload.py): append detection, full rebuilds and keeping the last good version."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src import reload
+from src.data_loader import PEST_FILE, RAW_DATA_PATH
+from src.ingest import load_corpora
+from src.reload import LiveKnowledgeBase
+from src.retrieval import Corpus, KnowledgeIndex, clear_result_cache
+
+NEW_PEST = "999,Cardamom,Cardamom Thrips,Scabby capsules,Spray fipronil,ICAR,English\n"
+
+
+class LiveKnowledgeBaseTests(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.tmp, True)
+		self.raw = os.path.join(self.tmp, "raw")
+		shutil.copytree(RAW_DATA_PATH, self.raw)
+		self.pests = os.path.join(self.raw, PEST_FILE)
+		# Freshly written files would otherwise wait out SETTLE_S
+		patch = mock.patch.object(reload, "SETTLE_S", 0.0)
+		patch.start()
+		self.addCleanup(patch.stop)
+		clear_result_cache()
+		self.addCleanup(clear_result_cache)
+		self.kb = LiveKnowledgeBase(KnowledgeIndex.from_corpora(*load_corpora(self.raw)), raw_path=self.raw)
+		self.rows = len(self.kb.index.pests)
+
+	def _write(self, data: bytes, append: bool = False) -> None:
+		st = os.stat(self.pests)
+		with open(self.pests, "ab" if append else "wb") as fh:
+			fh.write(data)
+		# Same-size rewrites within one clock tick must still look changed
+		os.utime(self.pests, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+	def _pest_names(self):
+		return list(self.kb.index.pests.records.column("Pest/Disease"))
+
+	def test_unchanged_files_are_not_reloaded(self):
+		self.assertEqual(self.kb.check(), [])
+		self.assertEqual(self.kb.reloads, 0)
+
+	def test_appended_rows_extend_the_corpus(self):
+		self._write(NEW_PEST.encode("utf-8"), append=True)
+		with mock.patch.object(Corpus, "extended", autospec=True, side_effect=Corpus.extended) as extended:
+			self.assertEqual(self.kb.check(), ["pests"])
+		extended.assert_called_once()
+		self.assertEqual(len(self.kb.index.pests), self.rows + 1)
+		self.assertEqual(self.kb.search("thrips pest on cardamom")["results"][0]["name"], "Cardamom Thrips")
+		self.assertEqual(self.kb.check(), [])
+
+	def test_edited_rows_rebuild_the_corpus(self):
+		with open(self.pests, "rb") as fh:
+			data = fh.read()
+		header, first, rest = data.split(b"\n", 2)
+		self._write(b"\n".join([header, NEW_PEST.rstrip("\n").encode("utf-8"), rest]))
+		with mock.patch.object(Corpus, "extended", autospec=True, side_effect=Corpus.extended) as extended:
+			self.assertEqual(self.kb.check(), ["pests"])
+		extended.assert_not_called()
+		self.assertEqual(len(self.kb.index.pests), self.rows)
+		self.assertEqual(self._pest_names()[0], "Cardamom Thrips")
+
+	def test_bad_versions_keep_the_last_good_one_and_warn_once(self):
+		good = self.kb.index
+		names = self._pest_names()
+		self._write(b"\xff\xfe not utf-8\n", append=True)
+		with self.assertLogs("src.reload", "WARNING") as logs:
+			self.assertEqual(self.kb.check(), [])
+		self.assertEqual(len(logs.records), 1)
+		self.assertIs(self.kb.index, good)
+		# Touching the same bad file is not worth another warning
+		self._write(b"", append=True)
+		with self.assertNoLogs("src.reload", "WARNING"):
+			self.assertEqual(self.kb.check(), [])
+		# A different bad version is
+		self._write(b"\xff\n", append=True)
+		with self.assertLogs("src.reload", "WARNING"):
+			self.assertEqual(self.kb.check(), [])
+		self.assertEqual(self._pest_names(), names)
+		# Fixing the file reloads it
+		with open(self.pests, "rb") as fh:
+			data = fh.read()
+		self._write(data[:data.index(b"\xff")] + NEW_PEST.encode("utf-8"))
+		self.assertEqual(self.kb.check(), ["pests"])
+		self.assertEqual(self._pest_names(), names + ["Cardamom Thrips"])
+
+	def test_missing_file_keeps_the_last_good_version(self):
+		os.remove(self.pests)
+		self.assertEqual(self.kb.check(), [])
+		self.assertEqual(len(self.kb.index.pests), self.rows)
+
+
+if __name__ == "__main__":
+	unittest.main()
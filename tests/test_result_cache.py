@@ -0,0 +1,64 @@
+"""The route_and_search result cache (user-010): normalized keys and isolated copies."""
+import os
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src.records import ColumnRecords
+from src.retrieval import (
+	PEST_COLUMNS, QA_COLUMNS, SCHEME_COLUMNS, KnowledgeIndex, clear_result_cache, normalize_query, result_cache_stats, route_query,
+)
+
+
+def _index() -> KnowledgeIndex:
+	schemes = ColumnRecords(SCHEME_COLUMNS, [["Pradhan Mantri Kisan Samman Nidhi"], ["PM-KISAN"], ["Agriculture"], ["Income support of Rs 6000"]] + [[""]] * (len(SCHEME_COLUMNS) - 4))
+	pests = ColumnRecords(PEST_COLUMNS, [
+		["Banana", "Paddy"],
+		["Sigatoka Leaf Spot", "Brown Planthopper"],
+		["Leaf spots on banana plants", "Hopper burn"],
+		["Spray propiconazole", "Drain the field"],
+		["", ""],
+		["", ""],
+	])
+	qa = ColumnRecords(QA_COLUMNS, [["Leaf spot on banana plants"], ["pest"], ["Remove infected leaves"], [""]])
+	return KnowledgeIndex(schemes, pests, qa)
+
+
+class ResultCacheTests(unittest.TestCase):
+	def setUp(self):
+		clear_result_cache()
+		self.addCleanup(clear_result_cache)
+		self.kb = _index()
+
+	def test_normalized_form(self):
+		self.assertEqual(normalize_query("  Brown Planthopper in PADDY? "), "brown planthopper in paddy")
+		self.assertEqual(normalize_query("धान में कीट!"), "धान में कीट")
+
+	def test_case_and_punctuation_variants_score_alike_and_share_an_entry(self):
+		fresh = []
+		for query in ("Leaf spot on banana plants", "leaf spot on banana plants!"):
+			clear_result_cache()
+			fresh.append(self.kb.search(query)["results"])
+		self.assertEqual(fresh[0], fresh[1])
+		clear_result_cache()
+		self.kb.search("LEAF SPOT on banana plants")
+		hits = result_cache_stats()["hits"]
+		self.assertEqual(self.kb.search("leaf spot on banana plants!")["results"], fresh[0])
+		self.assertEqual(result_cache_stats()["hits"], hits + 1)
+
+	def test_hyphenated_keywords_route_the_same_without_punctuation(self):
+		self.assertEqual(route_query("PM-KISAN installment"), route_query("pm kisan installment"))
+		self.assertEqual(route_query("pm kisan installment")[0], "scheme")
+
+	def test_callers_cannot_change_cached_results(self):
+		first = self.kb.search("Brown planthopper in paddy")
+		first["results"][0]["name"] = "changed"
+		first["results"].clear()
+		again = self.kb.search("brown planthopper in paddy")
+		self.assertEqual(again["results"][0]["name"], "Brown Planthopper")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,70 @@
+"""Sharded scoring (src/shards.py): per-shard results merge into exactly the single-process ranking."""
+import os
+import sys
+import unittest
+from unittest import mock
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src import shards
+from src.retrieval import FuzzyEngine
+from src.shards import ShardedEngine, _merge
+
+# Repeated rows tie on score in every shard
+DOCS = [
+	"brown planthopper in paddy",
+	"blast disease in paddy",
+	"coconut bud rot",
+	"blast disease in paddy",
+	"banana sigatoka leaf spot",
+	"brown planthopper in paddy",
+	"blast disease in paddy",
+	"paddy stem borer",
+	"brown planthopper in paddy",
+]
+QUERIES = ["blast disease in paddy", "brown plant hopper", "sigatoka", "xyzzy"]
+
+
+class MergeTests(unittest.TestCase):
+	def test_best_scores_first_and_ties_by_row_across_shards(self):
+		parts = [[(90, 0), (80, 1)], [(90, 3), (85, 4)], [(90, 6), (10, 7)]]
+		self.assertEqual(_merge(parts, 4), [(90, 0), (90, 3), (90, 6), (85, 4)])
+		self.assertEqual(_merge(parts, 1), [(90, 0)])
+		self.assertEqual(_merge([[], [(5, 8)], []], 3), [(5, 8)])
+		self.assertEqual(_merge([], 3), [])
+
+
+class ShardedEngineTests(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		with mock.patch.object(shards, "SHARD_MIN_DOCS", 1):
+			cls.engine = ShardedEngine(DOCS, shards=3)
+		cls.reference = FuzzyEngine(DOCS)
+
+	@classmethod
+	def tearDownClass(cls):
+		del cls.engine
+
+	def test_rows_are_split_into_contiguous_shards(self):
+		self.assertIsNone(self.engine._local)
+		self.assertEqual(self.engine.bounds, [(0, 3), (3, 6), (6, 9)])
+		self.assertEqual(self.engine._split([1, 2, 7]), [[1, 2], None, [7]])
+
+	def test_top_matches_one_process(self):
+		for query in QUERIES:
+			for top_k in (1, 3, 5):
+				self.assertEqual(self.engine.top(query, top_k), self.reference.top(query, top_k), (query, top_k))
+			self.assertEqual(self.engine.top(query, 3, min_score=60), self.reference.top(query, 3, min_score=60))
+
+	def test_candidate_ids_spanning_shards(self):
+		ids = [0, 1, 3, 6, 8]
+		for query in QUERIES:
+			self.assertEqual(self.engine.top(query, 3, ids=ids), self.reference.top(query, 3, ids=ids))
+
+	def test_top_many_matches_one_process(self):
+		self.assertEqual(self.engine.top_many(QUERIES, 4), self.reference.top_many(QUERIES, 4, 1))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,93 @@
+"""Autocomplete (src/suggest.py) and answering picked suggestions from their stored row."""
+import os
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src.answers import answer_query
+from src.records import ColumnRecords
+from src.retrieval import PEST_COLUMNS, QA_COLUMNS, SCHEME_COLUMNS, KnowledgeIndex
+from src.suggest import SuggestIndex, suggest_key
+
+ENTRIES = [
+	("Brown Planthopper", "pest", 0),
+	("Blast", "pest", 1),
+	("Paddy", "crop", 0),
+	("Paddy", "crop", 1),
+	("Brown plant hopper damaging my paddy?", "question", 0),
+	("PM-KISAN", "scheme", 0),
+]
+
+
+def _index() -> KnowledgeIndex:
+	schemes = ColumnRecords(SCHEME_COLUMNS, [["Pradhan Mantri Kisan Samman Nidhi"], ["PM-KISAN"]] + [[""]] * (len(SCHEME_COLUMNS) - 2))
+	pests = ColumnRecords(PEST_COLUMNS, [
+		["Paddy", "Paddy"],
+		["Brown Planthopper", "Blast"],
+		["Hopper burn", "Spindle-shaped spots"],
+		["Drain the field", "Spray tricyclazole"],
+		["", ""],
+		["", ""],
+	])
+	qa = ColumnRecords(QA_COLUMNS, [
+		["Blast disease in paddy", "Weather tomorrow?"],
+		["pest", "weather"],
+		["Spray tricyclazole at boot leaf stage", "Check the forecast"],
+		["", ""],
+	])
+	return KnowledgeIndex(schemes, pests, qa)
+
+
+class SuggestIndexTests(unittest.TestCase):
+	def setUp(self):
+		self.index = SuggestIndex(ENTRIES)
+
+	def texts(self, prefix: str):
+		return [s["text"] for s in self.index.suggest(prefix)]
+
+	def test_key_ignores_case_punctuation_and_spacing(self):
+		self.assertEqual(suggest_key("  PM-KISAN,  payment?? "), "pm kisan payment")
+		self.assertEqual(suggest_key("गेहूं में  रोग!"), "गेहूं में रोग")
+
+	def test_prefix_completions_rank_entities_before_questions(self):
+		self.assertEqual(self.texts("brown"), ["Brown Planthopper", "Brown plant hopper damaging my paddy?"])
+		self.assertEqual(self.texts("pm ki"), ["PM-KISAN"])
+		self.assertEqual(self.texts(""), [])
+
+	def test_one_edit_is_tolerated(self):
+		self.assertEqual(self.texts("brwn")[0], "Brown Planthopper")  # deletion
+		self.assertEqual(self.texts("borwn")[0], "Brown Planthopper")  # transposition
+		self.assertEqual(self.texts("paxdy"), ["Paddy"])  # substitution
+		self.assertEqual(self.texts("bllast"), ["Blast"])  # insertion
+		self.assertEqual(self.texts("xyzzy"), [])
+
+	def test_exact_lookup_skips_ambiguous_rows(self):
+		self.assertEqual(self.index.exact("brown planthopper!"), ("pest", 0))
+		self.assertIsNone(self.index.exact("paddy"))  # crop name shared by two rows
+		self.assertIsNone(self.index.exact("brown"))
+
+
+class PickedSuggestionTests(unittest.TestCase):
+	def test_typed_queries_are_always_searched(self):
+		kb = _index()
+		before = answer_query(kb, "Blast disease in paddy", "en")
+		kb.suggest("bla")
+		after = answer_query(kb, "Blast disease in paddy", "en")
+		self.assertEqual(before["results"], after["results"])
+
+	def test_picked_question_is_answered_from_its_row(self):
+		result = answer_query(_index(), "Blast disease in paddy", "en", picked=True)
+		self.assertEqual(len(result["results"]), 1)
+		self.assertEqual(result["results"][0]["answer"], "Spray tricyclazole at boot leaf stage")
+
+	def test_picked_crop_and_weather_fall_back_to_search(self):
+		kb = _index()
+		self.assertIsNone(kb.known_answer("Paddy"))
+		self.assertIsNone(kb.known_answer("weather: Pune"))
+		self.assertEqual(kb.known_answer("PM-KISAN")["results"][0]["acronym"], "PM-KISAN")
+
+
+if __name__ == "__main__":
+	unittest.main()
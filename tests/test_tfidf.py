@@ -0,0 +1,76 @@
+"""Character n-gram TF-IDF ranking (src/tfidf.py), checked against a dense reference."""
+import os
+import sys
+import unittest
+from collections import Counter
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+	sys.path.insert(0, PROJECT_ROOT)
+from src.records import ColumnRecords
+from src.retrieval import QA_COLUMNS, Corpus
+from src.tfidf import TfidfIndex, char_ngrams
+
+DOCS = [
+	"brown planthopper in paddy",
+	"blast disease in paddy nursery",
+	"coconut bud rot",
+	"banana sigatoka leaf spot",
+	"paddy",
+	"paddy",
+]
+
+
+def _dense_scores(docs, query):
+	"""Sublinear tf, smoothed idf, L2-normalised rows: the textbook formulation, one dense matrix."""
+	counts = [Counter(char_ngrams(d)) for d in docs]
+	vocab = sorted(set().union(*counts))
+	tf = np.array([[c[g] for g in vocab] for c in counts], dtype=np.float64)
+	idf = np.log((1 + len(docs)) / (1 + (tf > 0).sum(axis=0))) + 1
+	weights = np.where(tf > 0, 1 + np.log(np.where(tf > 0, tf, 1)), 0) * idf
+	weights /= np.linalg.norm(weights, axis=1, keepdims=True)
+	q_counts = Counter(char_ngrams(query))
+	q_tf = np.array([q_counts[g] for g in vocab], dtype=np.float64)
+	q = np.where(q_tf > 0, 1 + np.log(np.where(q_tf > 0, q_tf, 1)), 0) * idf
+	norm = np.linalg.norm(q)
+	return weights @ (q / norm) * 100 if norm else np.zeros(len(docs))
+
+
+class TfidfIndexTests(unittest.TestCase):
+	def setUp(self):
+		self.index = TfidfIndex(DOCS)
+
+	def test_ngrams_are_taken_inside_padded_words(self):
+		self.assertEqual(char_ngrams("Rot!"), [" ro", "rot", "ot "])
+		self.assertEqual(char_ngrams("a b"), [" a ", " b "])
+		self.assertEqual(char_ngrams("  "), [])
+
+	def test_scores_match_the_dense_formulation(self):
+		for query in ("brown plant hopper", "paddy", "sigatoka on banana leaves", "blsat in nursary", "xyz"):
+			np.testing.assert_allclose(self.index.scores(query), _dense_scores(DOCS, query), rtol=1e-5, atol=1e-4, err_msg=query)
+
+	def test_top_ranks_misspellings_and_breaks_ties_by_row(self):
+		self.assertEqual(self.index.top("brwn planthoper", 1)[0][1], 0)
+		self.assertEqual(self.index.top("paddy", 2), [(100, 4), (100, 5)])
+		self.assertEqual(self.index.top("coconut bud rot", 1), [(100, 2)])
+
+	def test_candidate_ids_and_min_score(self):
+		best = self.index.top("paddy", 3, ids=[0, 1, 3])
+		self.assertEqual([i for _, i in best], [0, 1, 3])
+		self.assertEqual([i for _, i in self.index.top("paddy", 6, min_score=50)], [4, 5])
+		self.assertEqual(self.index.top("paddy", 0), [])
+		self.assertEqual(TfidfIndex([]).top("paddy", 3), [])
+
+	def test_corpus_uses_the_tfidf_engine(self):
+		records = ColumnRecords(QA_COLUMNS, [DOCS, [""] * len(DOCS), [""] * len(DOCS), [""] * len(DOCS)])
+		corpus = Corpus(records, QA_COLUMNS, engine="tfidf")
+		best = corpus.top("Blast disease in paddy nursery?", 2)
+		self.assertEqual(best[0][0], 100)
+		self.assertEqual(best[0][1]["Query"], DOCS[1])
+		self.assertEqual(len(best), 2)
+
+
+if __name__ == "__main__":
+	unittest.main()